@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+'''
+Measure the parse time and the memory retained by FDSObjectListing on
+synthetic listing pages.
+
+The "eager" case reproduces the listing FDSObjectListing used to be, which
+kept the parsed JSON and built a summary and an owner for every entry, and
+serves as the baseline for the compact one. Parse time includes decoding the
+JSON body; memory is what the listing keeps once the body is released.
+
+  python benchmark/listing_benchmark.py --sizes 1000 1000000
+'''
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fds.model.fds_object_listing import FDSObjectListing
+from fds.model.permission import Owner
+
+
+class EagerSummary(object):
+  def __init__(self):
+    self.bucket_name = None
+    self.object_name = None
+    self.owner = None
+    self.size = None
+
+
+class EagerListing(dict):
+  def __init__(self, json):
+    dict.__init__(self, json)
+    self._objects = []
+    for obj in self['objects']:
+      summary = EagerSummary()
+      summary.bucket_name = self['name']
+      summary.object_name = obj['name']
+      summary.owner = Owner().from_json(obj['owner'])
+      summary.size = obj['size']
+      self._objects.append(summary)
+
+  @property
+  def objects(self):
+    return self._objects
+
+
+def make_body(count, owners=3):
+  objects = [{'name': 'logs/2026/%06d/part-%08d.gz' % (i // 1000, i),
+              'size': (i * 7919) % (64 * 1024 * 1024),
+              'owner': {'id': 'user%d' % (i % owners),
+                        'displayName': 'user%d' % (i % owners)}}
+             for i in range(count)]
+  return json.dumps({'name': 'bucket', 'prefix': 'logs/', 'delimiter': '',
+                     'marker': '', 'nextMarker': objects[-1]['name'],
+                     'maxKeys': count, 'truncated': True,
+                     'commonPrefixes': [], 'objects': objects}).encode()
+
+
+def measure(cls, body):
+  # Timed without tracemalloc, which slows allocations down.
+  gc.collect()
+  start = time.perf_counter()
+  listing = cls(json.loads(body))
+  parsed = time.perf_counter() - start
+  start = time.perf_counter()
+  sum(x.size for x in listing.objects)
+  accessed = time.perf_counter() - start
+  del listing
+
+  gc.collect()
+  tracemalloc.start()
+  listing = cls(json.loads(body))
+  gc.collect()
+  retained = tracemalloc.get_traced_memory()[0]
+  sum(x.size for x in listing.objects)
+  gc.collect()
+  retained_after = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  del listing
+  return parsed, retained, accessed, retained_after
+
+
+def main():
+  parser = argparse.ArgumentParser(description='fds listing benchmark')
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 1000000],
+                      help='entries per listing (default: 1000 1000000)')
+  args = parser.parse_args()
+
+  print('%-10s %-8s %10s %10s %12s %12s' % (
+    'entries', 'listing', 'parse ms', 'MB kept', 'objects ms',
+    'MB after'))
+  for count in args.sizes:
+    body = make_body(count)
+    print('%-10d %-8s %10s %10.1f' % (count, 'body', '', len(body) / 1e6))
+    for name, cls in (('eager', EagerListing), ('compact', FDSObjectListing)):
+      parsed, retained, accessed, retained_after = measure(cls, body)
+      print('%-10d %-8s %10.1f %10.1f %12.1f %12.1f' % (
+        count, name, parsed * 1000, retained / 1e6, accessed * 1000,
+        retained_after / 1e6))
+
+
+if __name__ == '__main__':
+  main()
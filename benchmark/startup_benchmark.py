@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+'''
+Measure the start-up cost of the fds command line tool.
+
+Each case is run in a fresh interpreter so that nothing is cached between
+runs. The "eager" case reproduces the imports fds_cmd used to perform before
+parsing its arguments and serves as the baseline for the lazy cases.
+
+  python benchmark/startup_benchmark.py --runs 30
+'''
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+  ('eager imports (baseline)',
+   'import argparse, argcomplete\n'
+   'from argcomplete.completers import ChoicesCompleter\n'
+   'from fds.galaxy_fds_client import GalaxyFDSClient\n'
+   'from fds.model.fds_object_metadata import FDSObjectMetadata\n'
+   'from fds.model.upload_part_result_list import UploadPartResultList\n'),
+  ('import fds', 'import fds\n'),
+  ('import fds.fds_cmd', 'import fds.fds_cmd\n'),
+  ('fds (usage, no client)',
+   'import sys, io\n'
+   'sys.argv = ["fds"]\n'
+   'sys.stdout = io.StringIO()\n'
+   'import fds.fds_cmd\n'
+   'fds.fds_cmd.main()\n'),
+  ('fds + client for an operation',
+   'import fds.fds_cmd\n'
+   'from fds.galaxy_fds_client import GalaxyFDSClient\n'),
+]
+
+
+def run_case(code, runs):
+  env = dict(os.environ)
+  env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+  env.pop('_ARGCOMPLETE', None)
+  samples = []
+  for _ in range(runs):
+    start = time.perf_counter()
+    subprocess.check_call([sys.executable, '-c', code], env=env,
+                          stdout=subprocess.DEVNULL)
+    samples.append((time.perf_counter() - start) * 1000.0)
+  return samples
+
+
+def main():
+  parser = argparse.ArgumentParser(description='fds start-up benchmark')
+  parser.add_argument('--runs', type=int, default=20,
+                      help='interpreter launches per case (default: 20)')
+  args = parser.parse_args()
+
+  empty = statistics.median(run_case('pass\n', args.runs))
+  print('bare interpreter: %.1f ms (subtracted below)' % empty)
+  print('%-32s %10s %10s %10s' % ('case', 'median ms', 'min ms', 'x baseline'))
+  baseline = None
+  for name, code in CASES:
+    samples = run_case(code, args.runs)
+    median = statistics.median(samples) - empty
+    if baseline is None:
+      baseline = median
+    print('%-32s %10.1f %10.1f %10.2f' % (
+      name, median, min(samples) - empty, median / baseline))
+
+
+if __name__ == '__main__':
+  main()
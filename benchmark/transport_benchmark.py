@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+'''
+Compare the per-request cost of the FDS transports on small objects.
+
+A minimal stand-in for the FDS REST API runs in a separate process on
+localhost, so the numbers are dominated by client side overhead: signing,
+request construction, the transport and response handling. Client CPU time
+per request is reported next to throughput since it is what the transport
+choice changes.
+
+  python benchmark/transport_benchmark.py --requests 5000 --threads 1 8
+'''
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fds import FDSClientConfiguration, GalaxyFDSClient
+from fds.transport import TRANSPORTS
+
+PUT_RESULT = (b'{"bucketName": "bench", "objectName": "o", "accessKeyId": "a",'
+              b' "signature": "s", "expires": 0}')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  # Send headers and body in one segment, otherwise Nagle and delayed ACKs
+  # add tens of milliseconds to every request.
+  wbufsize = 64 * 1024
+  disable_nagle_algorithm = True
+  objects = {}
+
+  def log_message(self, *args):
+    pass
+
+  def _reply(self, status, body=b''):
+    self.send_response(status)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    if self.command != 'HEAD':
+      self.wfile.write(body)
+
+  def do_GET(self):
+    body = self.objects.get(self.path)
+    self._reply(200 if body is not None else 404, body or b'')
+
+  def do_HEAD(self):
+    self._reply(200 if self.path in self.objects else 404)
+
+  def do_PUT(self):
+    length = int(self.headers.get('Content-Length') or 0)
+    self.objects[self.path] = self.rfile.read(length)
+    self._reply(200, PUT_RESULT)
+
+
+def serve(port, ready):
+  server = ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+  server.daemon_threads = True
+  ready.set()
+  server.serve_forever()
+
+
+def run(transport, port, operation, requests, threads, size):
+  config = FDSClientConfiguration(enable_https=False,
+                                  max_connections=threads)
+  config.set_endpoint('127.0.0.1:%d' % port)
+  config.transport = transport
+  client = GalaxyFDSClient('bench', 'bench', config)
+  payload = os.urandom(size)
+  client.put_object('bench', 'object', payload)
+
+  if operation == 'get':
+    def one(i):
+      obj = client.get_object('bench', 'object')
+      for _ in obj.stream:
+        pass
+  elif operation == 'put':
+    def one(i):
+      client.put_object('bench', 'object-%d' % (i % 100), payload)
+  else:
+    def one(i):
+      client.does_object_exists('bench', 'object')
+
+  per_thread = requests // threads
+
+  def worker(offset):
+    for i in range(per_thread):
+      one(offset + i)
+
+  workers = [threading.Thread(target=worker, args=(n * per_thread,))
+             for n in range(threads)]
+  cpu = time.process_time()
+  start = time.perf_counter()
+  for w in workers:
+    w.start()
+  for w in workers:
+    w.join()
+  elapsed = time.perf_counter() - start
+  cpu = time.process_time() - cpu
+  client.close()
+  total = per_thread * threads
+  return total / elapsed, cpu / total * 1e6
+
+
+def main():
+  parser = argparse.ArgumentParser(description='FDS transport benchmark')
+  parser.add_argument('--requests', type=int, default=3000)
+  parser.add_argument('--threads', type=int, nargs='+', default=[1, 8])
+  parser.add_argument('--size', type=int, default=1024,
+                      help='object size in bytes (default: 1024)')
+  parser.add_argument('--port', type=int, default=18765)
+  args = parser.parse_args()
+
+  ready = multiprocessing.Event()
+  server = multiprocessing.Process(target=serve, args=(args.port, ready))
+  server.daemon = True
+  server.start()
+  ready.wait()
+  try:
+    print('%-5s %7s %-9s %12s %16s' % (
+      'op', 'threads', 'transport', 'requests/s', 'client CPU us/req'))
+    for operation in ('head', 'get', 'put'):
+      for threads in args.threads:
+        for transport in TRANSPORTS:
+          rate, cpu = run(transport, args.port, operation, args.requests,
+                          threads, args.size)
+          print('%-5s %7d %-9s %12.0f %16.0f' % (
+            operation, threads, transport, rate, cpu))
+  finally:
+    server.terminate()
+
+
+if __name__ == '__main__':
+  main()
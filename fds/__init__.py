@@ -1,3 +1,25 @@
-from .galaxy_fds_client import GalaxyFDSClient
-from .galaxy_fds_client_exception import GalaxyFDSClientException
-from .fds_client_configuration import FDSClientConfiguration
+import importlib
+
+# The client pulls in requests and every model class. Resolve these names on
+# first access so that importing the package (as the fds command does before
+# it has even parsed its arguments) stays cheap.
+_LAZY_ATTRIBUTES = {
+  'GalaxyFDSClient': '.galaxy_fds_client',
+  'GalaxyFDSClientException': '.galaxy_fds_client_exception',
+  'FDSClientConfiguration': '.fds_client_configuration',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES.keys())
+
+
+def __getattr__(name):
+  module_name = _LAZY_ATTRIBUTES.get(name)
+  if module_name is None:
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+  value = getattr(importlib.import_module(module_name, __name__), name)
+  globals()[name] = value
+  return value
+
+
+def __dir__():
+  return sorted(set(globals().keys()) | set(__all__))
@@ -53,7 +53,7 @@ class Signer(AuthBase):
     :return: The signed result, aka the signature
     '''
     signature = self._sign(method, headers, url, app_secret)
-    return base64.encodestring(signature).strip()
+    return base64.encodebytes(signature).strip()
 
   def _construct_string_to_sign(self, http_method, http_headers, uri):
     '''
@@ -0,0 +1,298 @@
+import math
+import os
+import random
+import threading
+import time
+
+from . import utils
+from .galaxy_fds_client_exception import GalaxyFDSClientException
+
+OPERATIONS = ('put', 'get', 'head', 'list', 'delete')
+
+_UNITS = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(text):
+  '''
+  Parse a size like 512, 4K, 1.5M or 1G.
+  '''
+  text = text.strip().upper()
+  unit = text[-1:] if text[-1:] in _UNITS else ''
+  try:
+    return int(float(text[:len(text) - len(unit)]) * _UNITS[unit])
+  except ValueError:
+    raise GalaxyFDSClientException('Invalid size: %s' % text)
+
+
+def parse_mix(text):
+  '''
+  Parse an operation mix like "put=1,get=4,head=2", weights being relative.
+  :return: A list of (operation, weight)
+  '''
+  mix = []
+  for item in text.split(','):
+    operation, _, weight = item.strip().partition('=')
+    if operation not in OPERATIONS:
+      raise GalaxyFDSClientException('Unknown operation %s, expect one of %s'
+                                     % (operation, '/'.join(OPERATIONS)))
+    try:
+      mix.append((operation, float(weight or 1)))
+    except ValueError:
+      raise GalaxyFDSClientException('Invalid weight: %s' % item)
+  return mix
+
+
+class SizeDistribution(object):
+  '''
+  The sizes of the objects put:
+    4K                   every object is 4 KiB
+    1K-1M                uniformly distributed between 1 KiB and 1 MiB
+    1K,64K,1M            one of the sizes, equally likely
+    lognormal:64K:1.0    log-normal with a median of 64 KiB and a sigma of
+                         1.0, capped at 64 times the median
+  '''
+
+  def __init__(self, spec):
+    self.spec = spec
+    if spec.startswith('lognormal:'):
+      _, median, sigma = spec.split(':')
+      self._median = parse_size(median)
+      self._sigma = float(sigma)
+      self.max_size = self._median * 64
+      self._sample = self._lognormal
+    elif ',' in spec:
+      self._sizes = [parse_size(x) for x in spec.split(',')]
+      self.max_size = max(self._sizes)
+      self._sample = lambda rng: rng.choice(self._sizes)
+    elif '-' in spec:
+      low, high = spec.split('-')
+      self._low = parse_size(low)
+      self.max_size = parse_size(high)
+      self._sample = lambda rng: rng.randint(self._low, self.max_size)
+    else:
+      self.max_size = parse_size(spec)
+      self._sample = lambda rng: self.max_size
+
+  def _lognormal(self, rng):
+    size = int(rng.lognormvariate(math.log(self._median), self._sigma))
+    return min(size, self.max_size)
+
+  def sample(self, rng):
+    return self._sample(rng)
+
+
+class _OperationResult(object):
+
+  def __init__(self):
+    self.count = 0
+    self.errors = 0
+    self.bytes = 0
+    # Milliseconds.
+    self.latencies = []
+
+
+class BenchResult(object):
+  '''
+  The latencies, bytes and errors of every operation of a run.
+  '''
+
+  def __init__(self):
+    self.elapsed = 0.0
+    self.operations = dict((x, _OperationResult()) for x in OPERATIONS)
+    # The first error of every operation, to tell why it failed.
+    self.first_errors = {}
+
+  @property
+  def total(self):
+    return sum(x.count for x in self.operations.values())
+
+  def summary(self):
+    '''
+    :return: A list of (operation, statistics dict) of the operations run
+    '''
+    result = []
+    for name in OPERATIONS:
+      operation = self.operations[name]
+      if not operation.count:
+        continue
+      latencies = operation.latencies
+      result.append((name, {
+        'count': operation.count, 'errors': operation.errors,
+        'ops_per_second': operation.count / self.elapsed
+                          if self.elapsed else 0.0,
+        'mb_per_second': operation.bytes / 1e6 / self.elapsed
+                         if self.elapsed else 0.0,
+        'p50': utils.percentile(latencies, 50),
+        'p95': utils.percentile(latencies, 95),
+        'p99': utils.percentile(latencies, 99),
+        'max': max(latencies)}))
+    return result
+
+  def report(self):
+    lines = ['%-8s %8s %7s %9s %9s %9s %9s %9s %9s' % (
+      'op', 'count', 'errors', 'ops/s', 'MB/s', 'p50 ms', 'p95 ms',
+      'p99 ms', 'max ms')]
+    for name, stats in self.summary():
+      lines.append('%-8s %8d %7d %9.1f %9.2f %9.1f %9.1f %9.1f %9.1f' % (
+        name, stats['count'], stats['errors'], stats['ops_per_second'],
+        stats['mb_per_second'], stats['p50'], stats['p95'], stats['p99'],
+        stats['max']))
+    lines.append('total %d operations in %.2fs, %.1f ops/s' % (
+      self.total, self.elapsed,
+      self.total / self.elapsed if self.elapsed else 0.0))
+    for name, error in sorted(self.first_errors.items()):
+      lines.append('first %s error: %s' % (name, error))
+    return '\n'.join(lines) + '\n'
+
+
+class Bench(object):
+  '''
+  A load generator running a mix of operations through a GalaxyFDSClient
+  on concurrent worker threads, so that it measures the client code path
+  itself:
+
+    bench = Bench(client, 'bench-bucket', parse_mix('put=1,get=4'),
+                  SizeDistribution('4K-1M'), workers=16, duration=30)
+    sys.stdout.write(bench.run().report())
+
+  Objects are put under prefix; get, head and delete pick one of the
+  objects put so far and fall back to a put while there is none. The
+  objects left at the end are deleted unless keep is set.
+  '''
+
+  def __init__(self, client, bucket_name, mix, sizes, workers=8,
+               duration=None, operations=None, prefix='fds-bench/',
+               keep=False, seed=None):
+    '''
+    :param mix:        A list of (operation, weight), see parse_mix
+    :param sizes:      The SizeDistribution of the objects put
+    :param duration:   Stop after this many seconds
+    :param operations: Stop after this many operations
+    '''
+    if duration is None and operations is None:
+      raise GalaxyFDSClientException('A duration or an operation count is '
+                                     'required')
+    self._client = client
+    self.bucket_name = bucket_name
+    self._operations = [x[0] for x in mix]
+    self._weights = [x[1] for x in mix]
+    self._sizes = sizes
+    self._workers = workers
+    self._duration = duration
+    self._limit = operations
+    self.prefix = prefix
+    self._keep = keep
+    self._seed = seed
+    self._lock = threading.Lock()
+    self._objects = []
+    self._next_object = 0
+    self._started = 0
+    # Puts send slices of one random buffer instead of generating data.
+    self._payload = os.urandom(sizes.max_size)
+
+  def _take_slot(self):
+    with self._lock:
+      if self._limit is not None and self._started >= self._limit:
+        return False
+      self._started += 1
+      return True
+
+  def _pick_object(self, rng, remove=False):
+    with self._lock:
+      if not self._objects:
+        return None
+      index = rng.randrange(len(self._objects))
+      if remove:
+        # Swap with the last one, order does not matter.
+        self._objects[index], self._objects[-1] = \
+          self._objects[-1], self._objects[index]
+        return self._objects.pop()
+      return self._objects[index]
+
+  def _put(self, rng):
+    size = self._sizes.sample(rng)
+    with self._lock:
+      object_name = '%s%010d' % (self.prefix, self._next_object)
+      self._next_object += 1
+    self._client.put_object(self.bucket_name, object_name,
+                            self._payload[:size])
+    with self._lock:
+      self._objects.append(object_name)
+    return size
+
+  def _run_one(self, operation, rng):
+    '''
+    :return: The operation actually run and the bytes it moved
+    '''
+    client = self._client
+    if operation == 'list':
+      client.list_objects(self.bucket_name, self.prefix, '')
+      return operation, 0
+    if operation == 'put':
+      return operation, self._put(rng)
+    object_name = self._pick_object(rng, remove=operation == 'delete')
+    if object_name is None:
+      return 'put', self._put(rng)
+    if operation == 'get':
+      fds_object = client.get_object(self.bucket_name, object_name,
+                                     size=1024 * 1024)
+      return operation, sum(len(x) for x in fds_object.stream)
+    if operation == 'head':
+      client.get_object_metadata(self.bucket_name, object_name)
+      return operation, 0
+    client.delete_object(self.bucket_name, object_name)
+    return operation, 0
+
+  def _worker(self, index, deadline, result):
+    rng = random.Random(None if self._seed is None else self._seed + index)
+    while (deadline is None or time.monotonic() < deadline) and \
+        self._take_slot():
+      operation = rng.choices(self._operations, self._weights)[0]
+      start = time.perf_counter()
+      error = None
+      try:
+        operation, size = self._run_one(operation, rng)
+      except Exception as e:
+        error = e
+        size = 0
+      latency = (time.perf_counter() - start) * 1000.0
+      with self._lock:
+        stats = result.operations[operation]
+        stats.count += 1
+        stats.bytes += size
+        stats.latencies.append(latency)
+        if error is not None:
+          stats.errors += 1
+          result.first_errors.setdefault(
+            operation, getattr(error, 'message', None) or str(error))
+
+  def run(self):
+    '''
+    :return: The BenchResult
+    '''
+    result = BenchResult()
+    start = time.monotonic()
+    deadline = start + self._duration if self._duration is not None \
+      else None
+    threads = [threading.Thread(target=self._worker,
+                                args=(i, deadline, result))
+               for i in range(self._workers)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    result.elapsed = time.monotonic() - start
+    if not self._keep:
+      self.cleanup()
+    return result
+
+  def cleanup(self):
+    '''
+    Delete the objects put and not deleted by the run.
+    '''
+    with self._lock:
+      objects, self._objects = self._objects, []
+    for _ in utils.imap_unordered(
+        lambda x: self._client.delete_object(self.bucket_name, x), objects,
+        self._workers):
+      pass
@@ -0,0 +1,274 @@
+import os
+import sqlite3
+import threading
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS objects (
+  name TEXT PRIMARY KEY,
+  size INTEGER,
+  owner TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (
+  key TEXT PRIMARY KEY,
+  value TEXT
+) WITHOUT ROWID;
+'''
+
+
+def _prefix_end(prefix):
+  '''
+  The smallest string greater than every string starting with prefix, None
+  if there is none. SQLite compares text as UTF-8 bytes, which orders
+  strings by code point like this.
+  '''
+  while prefix:
+    last = ord(prefix[-1])
+    if last < 0x10ffff:
+      return prefix[:-1] + chr(last + 1)
+    prefix = prefix[:-1]
+  return None
+
+
+class IndexDiff(object):
+  '''
+  The differences between a local directory and the objects of an index.
+  '''
+
+  def __init__(self):
+    # Relative paths of local files with no object.
+    self.only_local = []
+    # Relative paths of objects with no local file.
+    self.only_remote = []
+    # Relative paths of files whose size differs from their object's.
+    self.changed = []
+
+  def __repr__(self):
+    return '<IndexDiff only_local=%d only_remote=%d changed=%d>' % (
+      len(self.only_local), len(self.only_remote), len(self.changed))
+
+
+class BucketIndex(object):
+  '''
+  A local SQLite index of the objects of a bucket under a prefix, to answer
+  prefix, existence and directory diff queries without listing the bucket
+  again:
+
+    index = BucketIndex(client, 'logs', 'logs.index')
+    index.refresh()
+    index.attach()
+    names = list(index.iter_objects('2026/10/'))
+
+  refresh lists the objects after the marker stored by the previous
+  refresh, so it only picks up objects whose names sort after every object
+  seen before; attach keeps the index up to date with the writes of the
+  client itself. Changes made by others to names before the marker need a
+  rebuild.
+  '''
+
+  def __init__(self, client, bucket_name, path, prefix=''):
+    '''
+    :param client:      The GalaxyFDSClient listing the bucket
+    :param bucket_name: The name of the bucket
+    :param path:        The path of the SQLite database, created if needed
+    :param prefix:      Index only the objects under this prefix
+    '''
+    self._client = client
+    self.bucket_name = bucket_name
+    self.prefix = prefix
+    self._lock = threading.Lock()
+    # Write listeners run on the threads of the client.
+    self._db = sqlite3.connect(path, check_same_thread=False)
+    with self._lock, self._db:
+      self._db.executescript(_SCHEMA)
+      stored = self._get_state('source')
+      source = '%s/%s' % (bucket_name, prefix)
+      if stored is None:
+        self._set_state('source', source)
+      elif stored != source:
+        raise ValueError('%s indexes %s, not %s' % (path, stored, source))
+
+  def _get_state(self, key):
+    row = self._db.execute('SELECT value FROM state WHERE key = ?',
+                           (key,)).fetchone()
+    return row[0] if row else None
+
+  def _set_state(self, key, value):
+    self._db.execute('INSERT OR REPLACE INTO state VALUES (?, ?)',
+                     (key, value))
+
+  @property
+  def marker(self):
+    '''
+    The name of the last object listed by refresh, None before the first
+    one.
+    '''
+    with self._lock:
+      return self._get_state('marker')
+
+  def refresh(self, progress=None):
+    '''
+    Add the objects listed after the stored marker, one transaction per
+    listing page so an interrupted refresh resumes where it stopped.
+    :param progress: Callable receiving the number of objects added so far
+    :return: The number of objects added
+    '''
+    listing = self._client.list_objects(self.bucket_name, self.prefix, '',
+                                        self.marker)
+    added = 0
+    while listing is not None:
+      names = listing.object_names
+      if names:
+        rows = [(name, size, owner.get('id') if owner else None)
+                for name, size, owner in zip(names, listing.sizes,
+                                             listing.owners)]
+        with self._lock, self._db:
+          self._db.executemany(
+            'INSERT OR REPLACE INTO objects VALUES (?, ?, ?)', rows)
+          self._set_state('marker', names[-1])
+        added += len(rows)
+        if progress is not None:
+          progress(added)
+      listing = self._client.list_next_batch_of_objects(listing)
+    return added
+
+  def rebuild(self, progress=None):
+    '''
+    Drop every indexed object and list the prefix again.
+    '''
+    with self._lock, self._db:
+      self._db.execute('DELETE FROM objects')
+      self._db.execute("DELETE FROM state WHERE key = 'marker'")
+    return self.refresh(progress)
+
+  def attach(self):
+    '''
+    Record the puts, deletes and renames the client makes in the index.
+    '''
+    self._client.add_write_listener(self._on_write)
+
+  def detach(self):
+    self._client.remove_write_listener(self._on_write)
+
+  def _on_write(self, event, bucket_name, object_name, value):
+    if bucket_name != self.bucket_name:
+      return
+    with self._lock, self._db:
+      if event == 'put':
+        if object_name.startswith(self.prefix):
+          self._db.execute('INSERT OR REPLACE INTO objects VALUES (?, ?, ?)',
+                           (object_name, value, None))
+      elif event == 'delete':
+        self._db.execute('DELETE FROM objects WHERE name = ?', (object_name,))
+      elif event == 'rename':
+        row = self._db.execute('SELECT size, owner FROM objects WHERE name = ?',
+                               (object_name,)).fetchone()
+        self._db.execute('DELETE FROM objects WHERE name = ?', (object_name,))
+        if value.startswith(self.prefix):
+          self._db.execute('INSERT OR REPLACE INTO objects VALUES (?, ?, ?)',
+                           (value,) + (row or (None, None)))
+
+  def __len__(self):
+    with self._lock:
+      return self._db.execute('SELECT COUNT(*) FROM objects').fetchone()[0]
+
+  def exists(self, object_name):
+    with self._lock:
+      return self._db.execute('SELECT 1 FROM objects WHERE name = ?',
+                              (object_name,)).fetchone() is not None
+
+  def get_size(self, object_name):
+    '''
+    :return: The indexed size of the object, None if it is unknown or the
+             object is not indexed
+    '''
+    with self._lock:
+      row = self._db.execute('SELECT size FROM objects WHERE name = ?',
+                             (object_name,)).fetchone()
+    return row[0] if row else None
+
+  def _prefix_query(self, columns, prefix, suffix=''):
+    end = _prefix_end(prefix)
+    if end is None:
+      return ('SELECT %s FROM objects WHERE name >= ?%s' % (columns, suffix),
+              (prefix,))
+    return ('SELECT %s FROM objects WHERE name >= ? AND name < ?%s' % (
+      columns, suffix), (prefix, end))
+
+  def iter_objects(self, prefix=''):
+    '''
+    Iterate over the (name, size) of the indexed objects under a prefix, in
+    name order. The rows are read in one query up front.
+    '''
+    query, args = self._prefix_query('name, size', prefix, ' ORDER BY name')
+    with self._lock:
+      rows = self._db.execute(query, args).fetchall()
+    return iter(rows)
+
+  def stat(self, prefix=''):
+    '''
+    :return: The (object count, total size) under a prefix, objects of
+             unknown size counting as 0 bytes
+    '''
+    query, args = self._prefix_query('COUNT(*), TOTAL(size)', prefix)
+    with self._lock:
+      count, size = self._db.execute(query, args).fetchone()
+    return count, int(size)
+
+  def common_prefixes(self, prefix='', delimiter='/'):
+    '''
+    The names of the next level under a prefix, like a listing with a
+    delimiter: the common prefixes of the objects, ending with delimiter.
+    Seeks past every common prefix instead of reading the objects under it.
+    '''
+    prefixes = []
+    start = prefix
+    with self._lock:
+      while True:
+        row = self._db.execute(
+          'SELECT name FROM objects WHERE name >= ? ORDER BY name LIMIT 1',
+          (start,)).fetchone()
+        if row is None or not row[0].startswith(prefix):
+          break
+        name = row[0]
+        cut = name.find(delimiter, len(prefix))
+        if cut < 0:
+          # An object directly under prefix, skip just this one.
+          start = name + '\0'
+          continue
+        common = name[:cut + len(delimiter)]
+        prefixes.append(common)
+        start = _prefix_end(common)
+        if start is None:
+          break
+    return prefixes
+
+  def diff(self, directory, prefix=None):
+    '''
+    Compare a local directory with the indexed objects under a prefix, a
+    file matching the object named prefix plus its relative path with '/'
+    separators. Sizes are only compared when the indexed size is known.
+    :param prefix: The prefix of the objects, the prefix of the index if None
+    :return: An IndexDiff
+    '''
+    if prefix is None:
+      prefix = self.prefix
+    local = {}
+    for root, _, files in os.walk(directory):
+      for name in files:
+        path = os.path.join(root, name)
+        relative = os.path.relpath(path, directory).replace(os.sep, '/')
+        local[relative] = os.path.getsize(path)
+    result = IndexDiff()
+    for name, size in self.iter_objects(prefix):
+      relative = name[len(prefix):]
+      local_size = local.pop(relative, None)
+      if local_size is None:
+        result.only_remote.append(relative)
+      elif size is not None and size != local_size:
+        result.changed.append(relative)
+    result.only_local = sorted(local)
+    return result
+
+  def close(self):
+    with self._lock:
+      self._db.close()
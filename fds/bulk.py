@@ -0,0 +1,88 @@
+import collections
+import time
+
+from . import utils
+from .rate_limiter import TokenBucket
+
+
+class BulkResult(object):
+  '''
+  The outcome of an operation applied to many objects.
+  '''
+
+  def __init__(self):
+    self.succeeded = 0
+    # (object name, error message) of every object the operation failed on.
+    self.failures = []
+    self.elapsed = 0.0
+    # Every object up to and including marker, in the order they were
+    # given, has been processed: pass it back to resume after an
+    # interruption. Failed objects are behind the marker too, retry them
+    # from failures.
+    self.marker = None
+
+  @property
+  def total(self):
+    return self.succeeded + len(self.failures)
+
+  @property
+  def throughput(self):
+    '''
+    Objects processed per second.
+    '''
+    if not self.elapsed:
+      return 0.0
+    return self.total / self.elapsed
+
+  def __repr__(self):
+    return '<BulkResult succeeded=%d failed=%d elapsed=%.2fs %.1f/s>' % (
+      self.succeeded, len(self.failures), self.elapsed, self.throughput)
+
+
+def run(func, object_names, max_workers=8, qps=None, progress=None):
+  '''
+  Apply func to every object name on a pool of max_workers threads.
+  :param func:         Callable taking an object name, its exceptions are
+                       recorded as failures of that object
+  :param object_names: An iterable of object names, consumed lazily
+  :param qps:          The most calls started per second, None for no limit
+  :param progress:     Callable receiving the BulkResult after every call
+  :return:             The BulkResult
+  '''
+  result = BulkResult()
+  start = time.monotonic()
+  bucket = TokenBucket(qps) if qps else None
+
+  def call(object_name):
+    if bucket is not None:
+      bucket.acquire()
+    return func(object_name)
+
+  submitted = collections.deque()
+  completed = set()
+
+  def names():
+    for object_name in object_names:
+      submitted.append(object_name)
+      yield object_name
+
+  for object_name, _, error in utils.imap_unordered(call, names(),
+                                                    max_workers):
+    if error is None:
+      result.succeeded += 1
+    else:
+      result.failures.append((object_name, error_message(error)))
+    completed.add(object_name)
+    while submitted and submitted[0] in completed:
+      result.marker = submitted.popleft()
+      completed.discard(result.marker)
+    result.elapsed = time.monotonic() - start
+    if progress is not None:
+      progress(result)
+  result.elapsed = time.monotonic() - start
+  return result
+
+
+def error_message(error):
+  return getattr(error, 'message', None) or '%s: %s' % (
+    type(error).__name__, error)
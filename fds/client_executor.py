@@ -0,0 +1,65 @@
+import functools
+from concurrent import futures
+
+from . import tracing
+
+# Re-exported so callers do not need concurrent.futures for the common case.
+wait = futures.wait
+as_completed = futures.as_completed
+FIRST_COMPLETED = futures.FIRST_COMPLETED
+FIRST_EXCEPTION = futures.FIRST_EXCEPTION
+ALL_COMPLETED = futures.ALL_COMPLETED
+
+
+class ClientExecutor(object):
+  '''
+  Runs calls of a GalaxyFDSClient on a thread pool and returns
+  concurrent.futures.Future objects. Every public client method is
+  available under the same name:
+
+    executor = client.executor
+    pending = [executor.get_object_metadata('bucket', x) for x in names]
+    for future in as_completed(pending):
+      metadata = future.result()
+
+  Future.cancel() stops a call that has not started yet. All calls share
+  the client's connection pool.
+  '''
+
+  def __init__(self, client, max_workers):
+    self._client = client
+    self._executor = futures.ThreadPoolExecutor(
+      max_workers=max_workers, thread_name_prefix='fds-client')
+
+  def submit(self, fn, *args, **kwargs):
+    '''
+    Schedule fn(*args, **kwargs); fn is a callable or the name of a client
+    method.
+    :return: The Future of the call
+    '''
+    if isinstance(fn, str):
+      fn = self._method(fn)
+    return self._executor.submit(tracing.bind(fn), *args, **kwargs)
+
+  def map(self, fn, *iterables, **kwargs):
+    '''
+    Like Executor.map, fn being a callable or the name of a client method.
+    '''
+    if isinstance(fn, str):
+      fn = self._method(fn)
+    return self._executor.map(tracing.bind(fn), *iterables, **kwargs)
+
+  def shutdown(self, wait=True, cancel_futures=False):
+    self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+  def __getattr__(self, name):
+    return functools.partial(self.submit, self._method(name))
+
+  def _method(self, name):
+    method = None
+    if not name.startswith('_'):
+      method = getattr(self._client, name, None)
+    if not callable(method):
+      raise AttributeError('%s has no method %s' % (
+        type(self._client).__name__, name))
+    return method
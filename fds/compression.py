@@ -0,0 +1,125 @@
+import fnmatch
+import zlib
+
+from .galaxy_fds_client_exception import GalaxyFDSClientException
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+ENCODINGS = (GZIP, ZSTD)
+
+# Text formats that typically shrink several times.
+DEFAULT_CONTENT_TYPES = [
+  'text/*',
+  'application/json',
+  'application/x-ndjson',
+  'application/javascript',
+  'application/xml',
+  'application/x-yaml',
+  'application/csv',
+]
+
+_BLOCK_SIZE = 256 * 1024
+
+
+def _zstandard():
+  try:
+    import zstandard
+  except ImportError:
+    raise GalaxyFDSClientException(
+        'zstd compression requires the zstandard package')
+  return zstandard
+
+
+def is_compressible(content_type, content_types):
+  '''
+  Whether content_type matches one of the glob patterns in content_types.
+  None for content_types matches everything.
+  '''
+  if content_types is None:
+    return True
+  if not content_type:
+    return False
+  content_type = content_type.split(';', 1)[0].strip().lower()
+  for pattern in content_types:
+    if fnmatch.fnmatchcase(content_type, pattern.lower()):
+      return True
+  return False
+
+
+def compressor(encoding, level=None):
+  '''
+  An object with compress(bytes) and flush() producing the encoded stream.
+  '''
+  if encoding == GZIP:
+    # wbits 16 + MAX_WBITS writes a gzip header and trailer.
+    return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None
+                            else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+  if encoding == ZSTD:
+    zstandard = _zstandard()
+    params = {} if level is None else {'level': level}
+    return zstandard.ZstdCompressor(**params).compressobj()
+  raise GalaxyFDSClientException('Unsupported content encoding: %s' % encoding)
+
+
+def decompressor(encoding):
+  '''
+  An object with decompress(bytes) decoding the stream incrementally.
+  '''
+  if encoding in (GZIP, 'x-gzip'):
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+  if encoding == ZSTD:
+    return _zstandard().ZstdDecompressor().decompressobj()
+  raise GalaxyFDSClientException('Unsupported content encoding: %s' % encoding)
+
+
+def compress_bytes(data, encoding, level=None):
+  if isinstance(data, str):
+    data = data.encode('utf-8')
+  c = compressor(encoding, level)
+  return c.compress(bytes(data)) + c.flush()
+
+
+def compress_stream(data, encoding, level=None):
+  '''
+  Compress a file like object or an iterable of chunks lazily, yielding the
+  encoded chunks. Memory use is bounded by the block size regardless of the
+  input size.
+  '''
+  c = compressor(encoding, level)
+  if hasattr(data, 'read'):
+    def blocks():
+      while True:
+        block = data.read(_BLOCK_SIZE)
+        if not block:
+          return
+        yield block
+    chunks = blocks()
+  else:
+    chunks = data
+  for chunk in chunks:
+    if isinstance(chunk, str):
+      chunk = chunk.encode('utf-8')
+    out = c.compress(chunk)
+    if out:
+      yield out
+  out = c.flush()
+  if out:
+    yield out
+
+
+def decompress_stream(chunks, encoding):
+  '''
+  Decode an iterable of encoded chunks, yielding the decoded chunks.
+  Concatenated gzip members / zstd frames are decoded one after another.
+  '''
+  d = decompressor(encoding)
+  for chunk in chunks:
+    while chunk:
+      out = d.decompress(chunk)
+      if out:
+        yield out
+      chunk = b''
+      if getattr(d, 'eof', False) and d.unused_data:
+        chunk = d.unused_data
+        d = decompressor(encoding)
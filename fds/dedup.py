@@ -0,0 +1,238 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .galaxy_fds_client_exception import GalaxyFDSClientException
+
+MANIFEST_VERSION = 1
+
+_READ_SIZE = 4 * 1024 * 1024
+
+# Cut point candidates are the occurrences of an anchor, found with
+# bytes.find instead of rolling a hash over every byte in Python. Neither
+# anchor occurs in runs of a repeated byte such as zero padding.
+_ANCHORS = (b'\x8d', b'\x8d\x3a')
+
+# The bytes ending at a candidate whose hash decides whether it is a cut.
+_WINDOW = 48
+
+
+def chunk_stream(f, min_size, average_size, max_size):
+  '''
+  Split a binary file like object into content-defined chunks.
+
+  A cut is made after an anchor byte sequence when the hash of the bytes
+  ending there has its low bits all zero, so boundaries only depend on the
+  content around them: an insertion or deletion changes the chunks around
+  it and the following boundaries line up again. Chunks are at least
+  min_size (except the last one) and at most max_size bytes.
+  '''
+  gap = average_size - min_size
+  # A one byte anchor occurs every 256 bytes in random data, a two byte one
+  # every 64 KiB; use the sparsest one that still allows the average size.
+  anchor = _ANCHORS[0] if gap < 2 * 65536 else _ANCHORS[1]
+  candidates = max(1, gap // (256 ** len(anchor)))
+  mask = (1 << (candidates.bit_length() - 1)) - 1
+  buf = bytearray()
+  eof = False
+  while True:
+    while not eof and len(buf) < max_size:
+      block = f.read(_READ_SIZE)
+      if not block:
+        eof = True
+      else:
+        buf += block
+    if not buf:
+      return
+    cut = _find_cut(buf, min_size, max_size, anchor, mask)
+    yield bytes(buf[:cut])
+    del buf[:cut]
+
+
+def _find_cut(buf, min_size, max_size, anchor, mask):
+  n = min(len(buf), max_size)
+  if n <= min_size:
+    return n
+  i = buf.find(anchor, min_size, n)
+  while i != -1:
+    cut = i + len(anchor)
+    window = buf[max(0, cut - _WINDOW):cut]
+    h = hashlib.blake2b(window, digest_size=8).digest()
+    if not int.from_bytes(h, 'big') & mask:
+      return cut
+    i = buf.find(anchor, cut, n)
+  return n
+
+
+class ChunkIndex(object):
+  '''
+  The digests of the chunks known to be stored, optionally persisted to a
+  local file with one digest per line so later uploads skip the existence
+  check for them.
+  '''
+
+  def __init__(self, path=None):
+    self._path = path
+    self._lock = threading.Lock()
+    self._digests = set()
+    if path is not None and os.path.exists(path):
+      with open(path) as f:
+        self._digests.update(line.strip() for line in f if line.strip())
+
+  def __contains__(self, digest):
+    return digest in self._digests
+
+  def __len__(self):
+    return len(self._digests)
+
+  def add(self, digest):
+    with self._lock:
+      if digest in self._digests:
+        return
+      self._digests.add(digest)
+      if self._path is not None:
+        with open(self._path, 'a') as f:
+          f.write(digest + '\n')
+
+
+class DedupStore(object):
+  '''
+  Stores files as content-defined chunks shared between all files of the
+  store, so uploading a file that is mostly identical to one uploaded
+  before only transfers the chunks that changed.
+
+  Chunks are named after the sha256 of their content under chunk_prefix; a
+  file is stored as a JSON manifest object listing its chunks in order.
+  Chunks are never deleted by the store, removing a manifest leaves its
+  chunks in place for the other manifests that may use them.
+  '''
+
+  def __init__(self, client, bucket_name, chunk_prefix='chunks/',
+               index_path=None, min_size=1024 * 1024,
+               average_size=4 * 1024 * 1024, max_size=16 * 1024 * 1024,
+               max_workers=8):
+    '''
+    :param client:       The GalaxyFDSClient chunks are stored with
+    :param bucket_name:  The bucket holding the chunks and manifests
+    :param chunk_prefix: The prefix of the chunk objects
+    :param index_path:   A local file caching the digests of stored chunks
+    :param min_size:     The minimum chunk size
+    :param average_size: The expected chunk size
+    :param max_size:     The maximum chunk size
+    :param max_workers:  The number of chunks hashed and transferred
+                         concurrently
+    '''
+    if not 0 < min_size < average_size < max_size:
+      raise GalaxyFDSClientException(
+        'Chunk sizes should satisfy 0 < min_size < average_size < max_size')
+    self._client = client
+    self._bucket_name = bucket_name
+    self._chunk_prefix = chunk_prefix
+    self._index = ChunkIndex(index_path)
+    self._min_size = min_size
+    self._average_size = average_size
+    self._max_size = max_size
+    self._max_workers = max_workers
+
+  @property
+  def index(self):
+    return self._index
+
+  def chunk_name(self, digest):
+    return self._chunk_prefix + digest
+
+  def upload(self, filename, object_name):
+    '''
+    Store a local file, uploading only the chunks not stored yet.
+    :param filename:    The path of the local file
+    :param object_name: The name of the manifest object
+    :return:            The manifest, with upload statistics under "stats"
+    '''
+    chunks = []
+    stats = {'chunks': 0, 'uploaded_chunks': 0, 'uploaded_bytes': 0}
+    size = 0
+    with open(filename, 'rb') as f, \
+        ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+      pending = collections.deque()
+      for chunk in chunk_stream(f, self._min_size, self._average_size,
+                                self._max_size):
+        size += len(chunk)
+        pending.append(executor.submit(self._store_chunk, chunk))
+        # Bound the chunks held in memory while they are uploaded.
+        while len(pending) >= self._max_workers * 2:
+          self._collect(pending.popleft(), chunks, stats)
+      while pending:
+        self._collect(pending.popleft(), chunks, stats)
+
+    manifest = {
+      'version': MANIFEST_VERSION,
+      'size': size,
+      'chunk_prefix': self._chunk_prefix,
+      'chunks': chunks,
+    }
+    self._client.put_object(self._bucket_name, object_name,
+                            json.dumps(manifest).encode('utf-8'))
+    manifest['stats'] = stats
+    return manifest
+
+  def get_manifest(self, object_name):
+    fds_object = self._client.get_object(self._bucket_name, object_name,
+                                         size=64 * 1024)
+    manifest = json.loads(b''.join(fds_object.stream).decode('utf-8'))
+    if manifest.get('version') != MANIFEST_VERSION:
+      raise GalaxyFDSClientException('Unsupported manifest version: %s' %
+                                     manifest.get('version'))
+    return manifest
+
+  def download(self, object_name, filename):
+    '''
+    Reassemble a stored file, fetching its chunks in parallel.
+    :param object_name: The name of the manifest object
+    :param filename:    The path of the local file to write
+    :return:            The manifest
+    '''
+    manifest = self.get_manifest(object_name)
+    prefix = manifest['chunk_prefix']
+    with open(filename, 'wb') as f, \
+        ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+      pending = collections.deque()
+      for digest, length in manifest['chunks']:
+        pending.append(executor.submit(self._fetch_chunk, prefix, digest,
+                                       length))
+        while len(pending) >= self._max_workers * 2:
+          f.write(pending.popleft().result())
+      while pending:
+        f.write(pending.popleft().result())
+    return manifest
+
+  def _store_chunk(self, chunk):
+    digest = hashlib.sha256(chunk).hexdigest()
+    if digest in self._index:
+      return digest, len(chunk), False
+    name = self.chunk_name(digest)
+    uploaded = False
+    if not self._client.does_object_exists(self._bucket_name, name):
+      self._client.put_object(self._bucket_name, name, chunk)
+      uploaded = True
+    self._index.add(digest)
+    return digest, len(chunk), uploaded
+
+  @staticmethod
+  def _collect(future, chunks, stats):
+    digest, length, uploaded = future.result()
+    chunks.append([digest, length])
+    stats['chunks'] += 1
+    if uploaded:
+      stats['uploaded_chunks'] += 1
+      stats['uploaded_bytes'] += length
+
+  def _fetch_chunk(self, prefix, digest, length):
+    fds_object = self._client.get_object(self._bucket_name, prefix + digest,
+                                         size=1024 * 1024)
+    chunk = b''.join(fds_object.stream)
+    if len(chunk) != length or hashlib.sha256(chunk).hexdigest() != digest:
+      raise GalaxyFDSClientException('Corrupted chunk %s%s' % (prefix, digest))
+    return chunk
@@ -0,0 +1,136 @@
+import threading
+import time
+
+
+class EndpointHealth(object):
+  '''
+  Health of a single endpoint: an exponentially weighted moving average of
+  its latency and error rate plus circuit breaker state.
+  '''
+
+  CLOSED = 'closed'
+  OPEN = 'open'
+  HALF_OPEN = 'half_open'
+
+  def __init__(self, base_uri):
+    self.base_uri = base_uri
+    self.latency = None
+    self.error_rate = 0.0
+    self.consecutive_failures = 0
+    self.state = EndpointHealth.CLOSED
+    self.opened_at = None
+    self.last_used = None
+
+  def __repr__(self):
+    return '<%s %s latency=%s error_rate=%.2f>' % (
+      self.base_uri, self.state, self.latency, self.error_rate)
+
+
+class EndpointSelector(object):
+  '''
+  Routes requests to the healthiest of several base uris (e.g. the CDN and
+  the origin) and fails over between them.
+
+  Candidates are ordered by EWMA latency inflated by their EWMA error rate;
+  endpoints that have not been measured yet are tried first, and so is a
+  healthy endpoint that has not been used for probe_interval seconds, so
+  that its statistics do not go stale. An endpoint whose circuit is open is
+  skipped until probe_interval seconds have passed, then a single request is
+  let through as a probe: success closes the circuit, failure keeps it open
+  for another interval.
+  '''
+
+  def __init__(self, base_uris, alpha=0.2, failure_threshold=3,
+               error_rate_threshold=0.5, probe_interval=30,
+               clock=time.monotonic):
+    '''
+    :param base_uris:            The candidate base uris in preference order
+    :param alpha:                The EWMA smoothing factor
+    :param failure_threshold:    Consecutive failures that open the circuit
+    :param error_rate_threshold: EWMA error rate that opens the circuit
+    :param probe_interval:       Seconds before an open circuit is probed
+    '''
+    self._lock = threading.Lock()
+    self._endpoints = [EndpointHealth(x) for x in base_uris]
+    self._alpha = alpha
+    self._failure_threshold = failure_threshold
+    self._error_rate_threshold = error_rate_threshold
+    self._probe_interval = probe_interval
+    self._clock = clock
+
+  @property
+  def endpoints(self):
+    return list(self._endpoints)
+
+  def candidates(self):
+    '''
+    The base uris to try, best first. Endpoints with an open circuit are
+    left out unless they are due for a probe; if every circuit is open they
+    are all returned, longest open first, so requests still get a chance.
+    '''
+    with self._lock:
+      now = self._clock()
+      healthy = []
+      broken = []
+      for index, endpoint in enumerate(self._endpoints):
+        if endpoint.state == EndpointHealth.CLOSED:
+          score = self._score(endpoint)
+          if (endpoint.last_used is not None and
+              now - endpoint.last_used >= self._probe_interval):
+            score = -1.0
+            endpoint.last_used = now
+          healthy.append((score, index, endpoint))
+        elif (endpoint.state == EndpointHealth.OPEN and
+              now - endpoint.opened_at >= self._probe_interval):
+          endpoint.state = EndpointHealth.HALF_OPEN
+          # Probe ahead of healthy endpoints, otherwise it may never be used.
+          healthy.append((-1.0, index, endpoint))
+        else:
+          broken.append(endpoint)
+      healthy.sort(key=lambda x: (x[0], x[1]))
+      result = [x[2].base_uri for x in healthy]
+      if not result:
+        broken.sort(key=lambda x: x.opened_at)
+        result = [x.base_uri for x in broken]
+      return result
+
+  def record_success(self, base_uri, latency):
+    with self._lock:
+      endpoint = self._find(base_uri)
+      if endpoint is None:
+        return
+      if endpoint.latency is None:
+        endpoint.latency = latency
+      else:
+        endpoint.latency += self._alpha * (latency - endpoint.latency)
+      endpoint.error_rate -= self._alpha * endpoint.error_rate
+      endpoint.consecutive_failures = 0
+      endpoint.state = EndpointHealth.CLOSED
+      endpoint.opened_at = None
+      endpoint.last_used = self._clock()
+
+  def record_failure(self, base_uri):
+    with self._lock:
+      endpoint = self._find(base_uri)
+      if endpoint is None:
+        return
+      endpoint.error_rate += self._alpha * (1.0 - endpoint.error_rate)
+      endpoint.consecutive_failures += 1
+      endpoint.last_used = self._clock()
+      if (endpoint.state == EndpointHealth.HALF_OPEN or
+          endpoint.consecutive_failures >= self._failure_threshold or
+          endpoint.error_rate >= self._error_rate_threshold):
+        endpoint.state = EndpointHealth.OPEN
+        endpoint.opened_at = self._clock()
+
+  def _find(self, base_uri):
+    for endpoint in self._endpoints:
+      if endpoint.base_uri == base_uri:
+        return endpoint
+    return None
+
+  @staticmethod
+  def _score(endpoint):
+    if endpoint.latency is None:
+      return 0.0
+    return endpoint.latency * (1.0 + 10.0 * endpoint.error_rate)
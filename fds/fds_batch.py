@@ -0,0 +1,169 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .galaxy_fds_client_exception import GalaxyFDSClientException
+
+
+class BatchRunner(object):
+  '''
+  Executes a stream of operations with one shared GalaxyFDSClient.
+
+  Every operation is a JSON object on its own line, e.g.
+
+    {"op": "put", "bucket": "b", "object": "k", "file": "/tmp/k"}
+    {"op": "put", "bucket": "b", "object": "k", "data": "inline text"}
+    {"op": "get", "bucket": "b", "object": "k", "file": "/tmp/k"}
+    {"op": "delete", "bucket": "b", "object": "k"}
+    {"op": "head", "bucket": "b", "object": "k"}
+    {"op": "list", "bucket": "b", "prefix": "logs/", "delimiter": ""}
+
+  Operations run concurrently and one result line is emitted per operation
+  in completion order. A result carries the operation's "id" (the line
+  number when the operation does not set one), "op", "ok" and either the
+  operation's output or an "error" message.
+  '''
+
+  OPERATIONS = ('put', 'get', 'delete', 'head', 'list')
+
+  def __init__(self, client, max_workers=8):
+    '''
+    :param client:      The GalaxyFDSClient all operations are sent through
+    :param max_workers: The number of operations executed concurrently
+    '''
+    self._client = client
+    self._max_workers = max_workers
+    self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+  def run(self, lines, output):
+    '''
+    Execute every operation read from lines and write the results to output.
+    At most twice max_workers operations are read ahead of their results,
+    so arbitrarily long input streams run in constant memory.
+    :param lines:  An iterable of JSON encoded operations
+    :param output: A text file like object receiving the result lines
+    :return:       The number of failed operations
+    '''
+    lock = threading.Lock()
+    in_flight = self._max_workers * 2
+    slots = threading.BoundedSemaphore(in_flight)
+    failures = [0]
+
+    def write_result(future):
+      try:
+        result = future.result()
+        with lock:
+          if not result['ok']:
+            failures[0] += 1
+          output.write(json.dumps(result) + '\n')
+          output.flush()
+      finally:
+        slots.release()
+
+    for line_number, line in enumerate(lines, 1):
+      if isinstance(line, bytes):
+        line = line.decode('utf-8')
+      if not line.strip():
+        continue
+      slots.acquire()
+      future = self._executor.submit(self.execute_line, line, line_number)
+      future.add_done_callback(write_result)
+    # Every slot is free again once the last result has been written.
+    for _ in range(in_flight):
+      slots.acquire()
+    for _ in range(in_flight):
+      slots.release()
+    return failures[0]
+
+  def execute_line(self, line, line_number):
+    try:
+      op = json.loads(line)
+    except ValueError as e:
+      return {'id': line_number, 'ok': False,
+              'error': 'Invalid operation: %s' % e}
+    if not isinstance(op, dict):
+      return {'id': line_number, 'ok': False,
+              'error': 'Invalid operation: expect a JSON object'}
+    op.setdefault('id', line_number)
+    return self.execute(op)
+
+  def execute(self, op):
+    '''
+    Execute a single operation.
+    :param op: The operation as a dict
+    :return:   The result as a dict
+    '''
+    name = op.get('op')
+    result = {'id': op.get('id'), 'op': name}
+    if name not in self.OPERATIONS:
+      result.update(ok=False, error='Unknown operation: %s' % name)
+      return result
+    try:
+      result.update(getattr(self, '_' + name)(op))
+      result['ok'] = True
+    except GalaxyFDSClientException as e:
+      result.update(ok=False, error=e.message)
+    except Exception as e:
+      # Missing fields, local file errors and connection failures are
+      # reported for this operation only; the rest of the batch carries on.
+      result.update(ok=False, error='%s: %s' % (type(e).__name__, e))
+    return result
+
+  def close(self):
+    self._executor.shutdown(wait=True)
+
+  def _put(self, op):
+    metadata = None
+    if op.get('metadata'):
+      from .model.fds_object_metadata import FDSObjectMetadata
+      metadata = FDSObjectMetadata()
+      for key, value in op['metadata'].items():
+        if key.startswith(FDSObjectMetadata.USER_DEFINED_METADATA_PREFIX):
+          metadata.add_user_metadata(key, value)
+        else:
+          metadata.add_header(key, value)
+    if 'file' in op:
+      with open(op['file'], 'rb') as f:
+        self._client.put_object(op['bucket'], op['object'], f, metadata)
+    else:
+      data = op.get('data', '')
+      if isinstance(data, str):
+        data = data.encode('utf-8')
+      self._client.put_object(op['bucket'], op['object'], data, metadata)
+    return {}
+
+  def _get(self, op):
+    fds_object = self._client.get_object(op['bucket'], op['object'],
+                                         op.get('offset', 0), 64 * 1024)
+    size = 0
+    try:
+      if 'file' in op:
+        with open(op['file'], 'wb') as f:
+          for chunk in fds_object.stream:
+            f.write(chunk)
+            size += len(chunk)
+      else:
+        for chunk in fds_object.stream:
+          size += len(chunk)
+    finally:
+      fds_object.stream.close()
+    return {'size': size}
+
+  def _delete(self, op):
+    self._client.delete_object(op['bucket'], op['object'])
+    return {}
+
+  def _head(self, op):
+    return {'exists': self._client.does_object_exists(op['bucket'],
+                                                      op['object'])}
+
+  def _list(self, op):
+    listing = self._client.list_objects(op['bucket'], op.get('prefix', ''),
+                                        op.get('delimiter'))
+    objects = []
+    common_prefixes = []
+    while listing is not None:
+      objects.extend(listing.object_names)
+      common_prefixes.extend(listing.common_prefixes)
+      listing = self._client.list_next_batch_of_objects(listing)
+    return {'objects': objects, 'common_prefixes': common_prefixes}
@@ -15,7 +15,8 @@ class FDSClientConfiguration(object):
       enable_cdn_for_upload = False,
       enable_https = True,
       timeout = 30,
-      max_retries = 3):
+      max_retries = 3,
+      max_connections = 10):
     self._region_name = region_name
     self._enable_cdn_for_download = enable_cdn_for_download
     self._enable_cdn_for_upload = enable_cdn_for_upload
@@ -23,8 +24,24 @@ class FDSClientConfiguration(object):
     self._enable_md5_calculate = False
     self._timeout = timeout
     self._max_retries = max_retries
+    self._max_connections = max_connections
     self._debug = False
     self._endpoint = ''
+    self._rate_limiter = None
+    self._tracer = None
+    self._transport = 'requests'
+    self._compression = None
+    self._compression_level = None
+    self._compression_content_types = None
+    self._enable_decompression = False
+    self._enable_hedged_get = False
+    self._hedge_delay = None
+    self._hedge_percentile = 95
+    self._hedge_max_ratio = 0.1
+    self._hedge_to_origin = False
+    self._enable_endpoint_selection = False
+    self._download_endpoints = []
+    self._endpoint_probe_interval = 30
 
   @property
   def debug(self):
@@ -58,6 +75,188 @@ class FDSClientConfiguration(object):
   def max_retries(self, max_retries):
     self._max_retries = max_retries
 
+  @property
+  def max_connections(self):
+    return self._max_connections
+
+  @max_connections.setter
+  def max_connections(self, max_connections):
+    self._max_connections = max_connections
+
+  @property
+  def rate_limiter(self):
+    '''
+    A fds.rate_limiter.RateLimiter shared by all threads using the client,
+    None to send requests unthrottled.
+    '''
+    return self._rate_limiter
+
+  @rate_limiter.setter
+  def rate_limiter(self, rate_limiter):
+    self._rate_limiter = rate_limiter
+
+  @property
+  def tracer(self):
+    '''
+    A fds.tracing.Tracer recording a span for every client operation and
+    HTTP attempt, None to disable tracing.
+    '''
+    return self._tracer
+
+  @tracer.setter
+  def tracer(self, tracer):
+    self._tracer = tracer
+
+  @property
+  def transport(self):
+    '''
+    The HTTP backend, 'requests' (default) or 'urllib3'.
+    '''
+    return self._transport
+
+  @transport.setter
+  def transport(self, transport):
+    self._transport = transport
+
+  @property
+  def compression(self):
+    '''
+    Content encoding applied by put_object and post_object, 'gzip', 'zstd'
+    or None (default) to upload bodies as they are.
+    '''
+    return self._compression
+
+  @compression.setter
+  def compression(self, compression):
+    self._compression = compression
+
+  @property
+  def compression_level(self):
+    return self._compression_level
+
+  @compression_level.setter
+  def compression_level(self, compression_level):
+    self._compression_level = compression_level
+
+  @property
+  def compression_content_types(self):
+    '''
+    Glob patterns of the content types that are compressed, by default
+    fds.compression.DEFAULT_CONTENT_TYPES. ['*'] compresses everything.
+    '''
+    if self._compression_content_types is None:
+      from .compression import DEFAULT_CONTENT_TYPES
+      return DEFAULT_CONTENT_TYPES
+    return self._compression_content_types
+
+  @compression_content_types.setter
+  def compression_content_types(self, content_types):
+    self._compression_content_types = content_types
+
+  @property
+  def enable_decompression(self):
+    '''
+    Decode gzip and zstd encoded objects returned by get_object.
+    '''
+    return self._enable_decompression
+
+  @enable_decompression.setter
+  def enable_decompression(self, enable):
+    self._enable_decompression = enable
+
+  @property
+  def enable_hedged_get(self):
+    return self._enable_hedged_get
+
+  @enable_hedged_get.setter
+  def enable_hedged_get(self, enable):
+    self._enable_hedged_get = enable
+
+  @property
+  def hedge_delay(self):
+    '''
+    Seconds to wait for the first byte before hedging a GET, None to use
+    hedge_percentile of recently observed latencies.
+    '''
+    return self._hedge_delay
+
+  @hedge_delay.setter
+  def hedge_delay(self, hedge_delay):
+    self._hedge_delay = hedge_delay
+
+  @property
+  def hedge_percentile(self):
+    return self._hedge_percentile
+
+  @hedge_percentile.setter
+  def hedge_percentile(self, hedge_percentile):
+    self._hedge_percentile = hedge_percentile
+
+  @property
+  def hedge_max_ratio(self):
+    '''
+    The maximum fraction of GETs that may be duplicated.
+    '''
+    return self._hedge_max_ratio
+
+  @hedge_max_ratio.setter
+  def hedge_max_ratio(self, hedge_max_ratio):
+    self._hedge_max_ratio = hedge_max_ratio
+
+  @property
+  def hedge_to_origin(self):
+    '''
+    Send the duplicate GET to the non-CDN base uri.
+    '''
+    return self._hedge_to_origin
+
+  @hedge_to_origin.setter
+  def hedge_to_origin(self, hedge_to_origin):
+    self._hedge_to_origin = hedge_to_origin
+
+  @property
+  def enable_endpoint_selection(self):
+    '''
+    Route downloads to the healthiest of get_download_endpoints() and fail
+    over between them.
+    '''
+    return self._enable_endpoint_selection
+
+  @enable_endpoint_selection.setter
+  def enable_endpoint_selection(self, enable):
+    self._enable_endpoint_selection = enable
+
+  @property
+  def endpoint_probe_interval(self):
+    '''
+    Seconds before a failing download endpoint is tried again.
+    '''
+    return self._endpoint_probe_interval
+
+  @endpoint_probe_interval.setter
+  def endpoint_probe_interval(self, endpoint_probe_interval):
+    self._endpoint_probe_interval = endpoint_probe_interval
+
+  def add_download_endpoint(self, endpoint):
+    '''
+    Add a host (e.g. a regional CDN domain) as candidate for downloads.
+    '''
+    self._download_endpoints.append(endpoint)
+
+  def get_download_endpoints(self):
+    '''
+    The candidate base uris for downloads in preference order: the download
+    base uri, the origin and the endpoints added by add_download_endpoint.
+    '''
+    uris = [self.get_download_base_uri(), self.get_base_uri()]
+    for endpoint in self._download_endpoints:
+      uris.append(self._build_base_uri(False, endpoint))
+    result = []
+    for uri in uris:
+      if uri not in result:
+        result.append(uri)
+    return result
+
   def set_endpoint(self, endpoint):
     self._endpoint = endpoint
 
@@ -70,7 +269,7 @@ class FDSClientConfiguration(object):
   def get_base_uri(self):
     return self._build_base_uri(False)
 
-  def _build_base_uri(self, enable_cdn):
+  def _build_base_uri(self, enable_cdn, endpoint=None):
     base_uri = str()
     if self._enable_https:
       base_uri += self.URI_HTTPS
@@ -80,8 +279,10 @@ class FDSClientConfiguration(object):
     region = self._region_name
     if not region:
       region = "cnbj0"
-    if self._endpoint:
-      base_uri += self._endpoint
+    if endpoint is None:
+      endpoint = self._endpoint
+    if endpoint:
+      base_uri += endpoint
     elif enable_cdn:
       base_uri += self.URI_CDN + '.' + region + '.' + self.URI_CDN_SUFFIX
     else:
@@ -3,13 +3,12 @@ import json
 import logging
 import os
 from os.path import expanduser
-import argcomplete
 import argparse
 import sys
-from argcomplete.completers import ChoicesCompleter
-from fds import FDSClientConfiguration, GalaxyFDSClient
-from fds.model.fds_object_metadata import FDSObjectMetadata
-from fds.model.upload_part_result_list import UploadPartResultList
+
+# Only the standard library is imported at module level. argcomplete, requests
+# and the client/model classes are imported by the code paths that need them,
+# since this script is often invoked many times from shell loops and cron jobs.
 
 logger = None
 access_key = None
@@ -20,6 +19,7 @@ enable_https = True
 enable_cdn = False
 end_point = None
 fds_client = None
+tracer = None
 
 
 def print_config(name, value):
@@ -111,18 +111,12 @@ def list_buckets(fds_client, prefix, start_mark):
 
 
 def bucket_name_completer(prefix, parsed_args, **kwargs):
+    import argcomplete
     parse_argument(args=parsed_args)
 
     if not (access_key is None) and not (secret_key is None) and not (region is None):
         argcomplete.warn(str(enable_https) + ' ' + str(enable_cdn) + ' ' + str(region))
-        fds_config = FDSClientConfiguration(region_name=region,
-                                            enable_https=enable_https,
-                                            enable_cdn_for_download=enable_cdn,
-                                            enable_cdn_for_upload=enable_cdn)
-        fds_client = GalaxyFDSClient(access_key=access_key,
-                                     access_secret=secret_key,
-                                     config=fds_config)
-        bucket_list = get_buckets(fds_client=fds_client)
+        bucket_list = get_buckets(fds_client=create_client()[0])
         rtn = []
         for i in bucket_list:
             if i.startswith(prefix):
@@ -131,6 +125,33 @@ def bucket_name_completer(prefix, parsed_args, **kwargs):
     return ['a', 'b', 'c']
 
 
+def create_client():
+    from fds.fds_client_configuration import FDSClientConfiguration
+    from fds.galaxy_fds_client import GalaxyFDSClient
+    config = FDSClientConfiguration(region_name=region,
+                                    enable_https=enable_https,
+                                    enable_cdn_for_download=enable_cdn,
+                                    enable_cdn_for_upload=enable_cdn)
+    if not end_point is None:
+        config.set_endpoint(end_point)
+    config.tracer = tracer
+    return GalaxyFDSClient(access_key=access_key,
+                           access_secret=secret_key,
+                           config=config), config
+
+
+def enable_completion(parser, method_action, bucket_action):
+    # argcomplete sets _ARGCOMPLETE when the shell asks for completions; in
+    # every other invocation we skip importing it altogether.
+    if '_ARGCOMPLETE' not in os.environ:
+        return
+    import argcomplete
+    from argcomplete.completers import ChoicesCompleter
+    method_action.completer = ChoicesCompleter(METHODS)
+    bucket_action.completer = bucket_name_completer
+    argcomplete.autocomplete(parser)
+
+
 def check_region(region):
     pass
 
@@ -159,39 +180,17 @@ def put_object(data_file, bucket_name, object_name, metadata):
                               data=fd,
                               metadata=fds_metadata)
     else:
+        from fds.multipart import MultipartUploader
         logger.debug('Put object with multipart upload')
-        upload_token = fds_client.init_multipart_upload(bucket_name=bucket_name,
-                                                        object_name=object_name)
-        logger.debug('Upload id [' + upload_token.upload_id + ']')
-        byte_buffer = bytearray(10 * 1024 * 1024)
-        part_number = 0
-        upload_list = []
-        while True:
-            length = sys.stdin.readinto(byte_buffer)
-            if length <= 0:
-                break
-            print(length)
-
-            rtn = fds_client.upload_part(bucket_name=upload_token.bucket_name,
-                                         object_name=upload_token.object_name,
-                                         upload_id=upload_token.upload_id,
-                                         part_number=part_number,
-                                         data=byte_buffer[0:length])
-            upload_list.append(rtn)
-            part_number += 1
-
-        upload_part_result = UploadPartResultList({"uploadPartResultList": upload_list})
-        print(json.dumps(upload_part_result))
-        fds_client.complete_multipart_upload(bucket_name=upload_token.bucket_name,
-                                             object_name=upload_token.object_name,
-                                             upload_id=upload_token.upload_id,
-                                             metadata=fds_metadata,
-                                             upload_part_result_list=json.dumps(upload_part_result))
+        uploader = MultipartUploader(fds_client, part_size=10 * 1024 * 1024)
+        uploader.upload(bucket_name, object_name, sys.stdin.buffer,
+                        fds_metadata)
 
 
 def parse_metadata_from_str(metadata):
     fds_metadata = None
     if metadata:
+        from fds.model.fds_object_metadata import FDSObjectMetadata
         fds_metadata = FDSObjectMetadata()
         for i in metadata.split(';'):
             key, value = i.split(':', 1)
@@ -323,26 +322,299 @@ def list_object(bucket_name, object_name_prefix, start_mark=''):
         sys.stdout.write('...\n')
 
 
+def absolute_file_paths(lines):
+    '''
+    Make the "file" of every operation absolute, as the daemon resolves
+    relative paths against its own working directory. Lines that are not
+    operations are forwarded unchanged, for the daemon to report.
+    '''
+    for line in lines:
+        try:
+            op = json.loads(line)
+        except ValueError:
+            yield line
+            continue
+        if isinstance(op, dict) and isinstance(op.get('file'), str):
+            op['file'] = os.path.abspath(op['file'])
+            line = json.dumps(op)
+        yield line
+
+
+def run_batch(batch_file, workers, socket_path):
+    if batch_file == '-':
+        lines = sys.stdin
+    else:
+        lines = open(batch_file)
+    try:
+        if socket_path:
+            from fds.fds_daemon import forward
+            return forward(socket_path, absolute_file_paths(lines), sys.stdout)
+        from fds.fds_batch import BatchRunner
+        runner = BatchRunner(fds_client, workers)
+        try:
+            return runner.run(lines, sys.stdout)
+        finally:
+            runner.close()
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def run_daemon(socket_path, workers):
+    from fds.fds_daemon import FDSDaemon
+    logger.info('Serving on [' + socket_path + ']')
+    FDSDaemon(fds_client, socket_path, workers).serve_forever()
+
+
+def operation_from_arguments():
+    '''
+    The batch operation equivalent to a single object request, or None if the
+    request streams through stdin/stdout and has to be executed locally.
+    '''
+    if not bucket_name or not object_name:
+        return None
+    op = {'op': method, 'bucket': bucket_name, 'object': object_name}
+    if method == 'put':
+        if not data_file:
+            return None
+        op['file'] = os.path.abspath(data_file)
+        if metadata:
+            op['metadata'] = parse_metadata_from_str(metadata).metadata
+    elif method == 'get':
+        if not data_file or length != -1:
+            return None
+        op['file'] = os.path.abspath(data_file)
+        op['offset'] = offset
+    elif method not in ('delete', 'head'):
+        return None
+    return op
+
+
+def forward_operation(socket_path, op):
+    import io
+    from fds.fds_daemon import forward
+    output = io.StringIO()
+    forward(socket_path, [json.dumps(op)], output)
+    result = json.loads(output.getvalue())
+    if not result['ok']:
+        sys.stderr.write(result['error'])
+        sys.stderr.flush()
+        return 1
+    if op['op'] == 'head' and not result['exists']:
+        return 1
+    return 0
+
+
+def read_object_names(path):
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        return [line.strip() for line in f if line.strip()]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def read_weights(path):
+    '''
+    Read "object_name weight" lines, e.g. request counts from an access log.
+    '''
+    weights = {}
+    with open(path) as f:
+        for line in f:
+            fields = line.rsplit(None, 1)
+            if len(fields) == 2:
+                weights[fields[0]] = float(fields[1])
+    return weights
+
+
+def cdn_objects(method, bucket_name, object_name, args):
+    '''
+    Prefetch or refresh objects in CDN, reporting progress on stderr and
+    printing the objects that failed on stdout so they can be retried
+    with --keys.
+    '''
+    import time
+    object_names = None
+    if object_name:
+        object_names = [object_name]
+    elif args.keys:
+        object_names = read_object_names(args.keys)
+    weights = read_weights(args.weights) if args.weights else None
+    prefix = args.prefix
+    if object_names is None and prefix is None and weights is None:
+        prefix = ''
+    total = len(object_names) if object_names is not None else None
+    last_report = [time.monotonic()]
+
+    def progress(result):
+        now = time.monotonic()
+        if now - last_report[0] < 1:
+            return
+        last_report[0] = now
+        sys.stderr.write('%s: %d%s done, %d failed, %.1f objects/s\n' % (
+            method, result.total, '/%d' % total if total is not None else '',
+            len(result.failures), result.throughput))
+        sys.stderr.flush()
+
+    if method == 'prefetch':
+        func = fds_client.prefetch_objects
+    else:
+        func = fds_client.refresh_objects
+    result = func(bucket_name, object_names, prefix, weights,
+                  max_workers=args.workers, qps=args.qps, progress=progress)
+    for failed_name, error in result.failures:
+        sys.stdout.write('%s\t%s\n' % (failed_name, error))
+    sys.stderr.write('%s: %d succeeded, %d failed in %.1fs (%.1f objects/s)\n' % (
+        method, result.succeeded, len(result.failures), result.elapsed,
+        result.throughput))
+    sys.stderr.flush()
+    return result
+
+
+def enable_stats():
+    global tracer
+    import atexit
+    from fds.stats import StatsExporter
+    from fds.tracing import Tracer
+    stats = StatsExporter()
+    tracer = Tracer(stats)
+    atexit.register(lambda: sys.stderr.write(stats.report()))
+
+
+def enable_profile(path):
+    import atexit
+    import cProfile
+    import tracemalloc
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    atexit.register(write_profile, profiler, path)
+    profiler.enable()
+
+
+def write_profile(profiler, path):
+    import io
+    import pstats
+    import tracemalloc
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    out = io.StringIO()
+    out.write('CPU profile, by cumulative time\n')
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(40)
+    out.write('Memory: %.1f MB allocated at exit, %.1f MB peak\n' % (
+        current / 1e6, peak / 1e6))
+    out.write('Largest allocations still held at exit, by line\n')
+    for stat in snapshot.statistics('lineno')[:25]:
+        out.write('%s\n' % stat)
+    with open(path, 'w') as f:
+        f.write(out.getvalue())
+
+
+def format_size(size):
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if size < 1024 or unit == 'T':
+            break
+        size /= 1024.0
+    if unit == 'B':
+        return '%d%s' % (size, unit)
+    return '%.1f%s' % (size, unit)
+
+
+def disk_usage(bucket_name, prefix, depth, human):
+    from fds import inventory
+    rows = inventory.iter_rows(inventory.iter_pages(fds_client, bucket_name,
+                                                    prefix))
+    # Depths are counted from the prefix.
+    relative = ((x[0][len(prefix):], x[1]) for x in rows)
+    total_count = 0
+    total_size = 0
+    for usage_prefix, count, size in inventory.iter_du(relative, depth):
+        # Every object is counted under exactly one prefix.
+        total_count += count
+        total_size += size
+        sys.stdout.write('%s\t%d\t%s\n' % (
+            format_size(size) if human else size, count,
+            prefix + usage_prefix or '/'))
+    sys.stdout.write('%s\t%d\ttotal\n' % (
+        format_size(total_size) if human else total_size, total_count))
+    sys.stdout.flush()
+
+
+def print_inventory(bucket_name, prefix, output_format):
+    from fds import inventory
+    rows = inventory.iter_rows(inventory.iter_pages(fds_client, bucket_name,
+                                                    prefix))
+    if output_format == 'jsonl':
+        inventory.write_jsonl(rows, sys.stdout)
+    else:
+        inventory.write_csv(rows, sys.stdout)
+    sys.stdout.flush()
+
+
+def run_bench(bucket_name, args):
+    from fds.bench import Bench, SizeDistribution, parse_mix
+    duration = args.duration
+    if duration is None and args.ops is None:
+        duration = 10
+    bench = Bench(fds_client, bucket_name, parse_mix(args.mix),
+                  SizeDistribution(args.sizes), workers=args.workers,
+                  duration=duration, operations=args.ops,
+                  prefix=args.prefix if args.prefix is not None else 'fds-bench/',
+                  keep=args.keep)
+    sys.stderr.write('bench: %s with %d workers, sizes %s, %s\n' % (
+        args.mix, args.workers, args.sizes,
+        '%d operations' % args.ops if args.ops is not None
+        else '%gs' % duration))
+    sys.stderr.flush()
+    result = bench.run()
+    sys.stdout.write(result.report())
+    sys.stdout.flush()
+    return result
+
+
+METHODS = ('put', 'get', 'delete', 'post', 'head', 'prefetch', 'refresh',
+           'du', 'inventory', 'bench')
+
+# Methods that can also be given as the first argument, "fds prefetch ...".
+SUBCOMMANDS = ('prefetch', 'refresh', 'du', 'inventory', 'bench')
+
+
+def str_to_bool(value):
+    if value.lower() in ('true', 'yes', 'on', '1'):
+        return True
+    if value.lower() in ('false', 'no', 'off', '0'):
+        return False
+    raise argparse.ArgumentTypeError('expect true or false, got %s' % value)
+
+
+def expand_subcommand(argv):
+    if argv and argv[0] in SUBCOMMANDS:
+        return ['-m'] + argv
+    return argv
+
+
 def main():
     parser = argparse.ArgumentParser(description="FDS command-line tool",
                                      epilog="Doc - http://docs.api.xiaomi.com/fds/")
 
-    parser.add_argument('-m', '--method',
+    method_action = parser.add_argument('-m', '--method',
                         nargs='?',
                         metavar='method',
                         const='put',
                         type=str,
                         dest='method',
-                        help='Method of the request. Can be one of put/get/delete/post/head (default: put)'
-                        ).completer = ChoicesCompleter(('put', 'get', 'delete', 'post', 'head'))
+                        help='Method of the request. Can be one of put/get/delete/post/head/prefetch/refresh/du/inventory/bench '
+                             '(default: put)'
+                        )
 
-    parser.add_argument('-b', '--bucket',
+    bucket_action = parser.add_argument('-b', '--bucket',
                         nargs='?',
                         metavar='bucket',
                         type=str,
                         dest='bucket',
                         help='Name of bucket to operate'
-                        ).completer = bucket_name_completer
+                        )
 
     parser.add_argument('-o', '--object',
                         nargs='?',
@@ -380,9 +652,11 @@ def main():
     parser.add_argument('--https',
                         metavar='https',
                         nargs='?',
+                        type=str_to_bool,
+                        const=True,
                         dest='https',
                         default=True,
-                        help='If toggled, https is enabled'
+                        help='Whether https is used, "--https false" for a plain http end point (default: true)'
                         )
 
     parser.add_argument('--ak',
@@ -463,9 +737,120 @@ def main():
                         dest='debug',
                         help='If toggled, print debug log')
 
-    argcomplete.autocomplete(parser)
+    parser.add_argument('--batch',
+                        nargs='?',
+                        metavar='operation file',
+                        const='-',
+                        dest='batch',
+                        help='Execute JSON lines operations (put/get/delete/head/list) from the file or stdin, '
+                             'printing one JSON result line per operation')
+
+    parser.add_argument('--workers',
+                        metavar='workers',
+                        type=int,
+                        default=8,
+                        dest='workers',
+                        help='Number of operations executed concurrently in batch, daemon, prefetch/refresh and bench mode (default: 8)')
+
+    parser.add_argument('--daemon',
+                        metavar='socket',
+                        dest='daemon',
+                        help='Serve batch operations on the Unix socket, keeping one client and its connections alive')
+
+    parser.add_argument('--socket',
+                        metavar='socket',
+                        dest='socket',
+                        default=os.environ.get('FDS_DAEMON_SOCKET'),
+                        help='Forward the request to the daemon listening on the Unix socket '
+                             '(default: $FDS_DAEMON_SOCKET)')
+
+    parser.add_argument('--prefix',
+                        metavar='prefix',
+                        dest='prefix',
+                        help='Used with prefetch/refresh/du/inventory, apply to every object under the prefix; '
+                             'with bench, the prefix of the objects put (default: fds-bench/)')
+
+    parser.add_argument('--keys',
+                        metavar='file',
+                        dest='keys',
+                        help='Used with prefetch/refresh, apply to the object names listed in the file, '
+                             'one per line, - for stdin')
+
+    parser.add_argument('--weights',
+                        metavar='file',
+                        dest='weights',
+                        help='Used with prefetch/refresh, "object_name weight" lines; '
+                             'heavier objects are processed first')
+
+    parser.add_argument('--qps',
+                        metavar='qps',
+                        type=float,
+                        dest='qps',
+                        help='Used with prefetch/refresh, the most requests per second')
+
+    parser.add_argument('--depth',
+                        metavar='depth',
+                        type=int,
+                        default=1,
+                        dest='depth',
+                        help='Used with du, the number of path components below the prefix to total (default: 1)')
+
+    parser.add_argument('--human',
+                        action='store_true',
+                        dest='human',
+                        help='Used with du, print sizes like 1.5G')
+
+    parser.add_argument('--format',
+                        choices=('csv', 'jsonl'),
+                        default='csv',
+                        dest='format',
+                        help='Used with inventory, the format of the key/size/owner rows (default: csv)')
+
+    parser.add_argument('--mix',
+                        metavar='mix',
+                        dest='mix',
+                        default='put=1,get=4,head=1',
+                        help='Used with bench, the relative weights of the put/get/head/list/delete operations '
+                             '(default: put=1,get=4,head=1)')
+
+    parser.add_argument('--sizes',
+                        metavar='sizes',
+                        dest='sizes',
+                        default='4K',
+                        help='Used with bench, the sizes of the objects put: 4K, 1K-1M (uniform), '
+                             '1K,64K,1M (one of) or lognormal:64K:1.0 (median and sigma) (default: 4K)')
+
+    parser.add_argument('--duration',
+                        metavar='seconds',
+                        type=float,
+                        dest='duration',
+                        help='Used with bench, stop after this many seconds (default: 10 unless --ops is given)')
+
+    parser.add_argument('--ops',
+                        metavar='count',
+                        type=int,
+                        dest='ops',
+                        help='Used with bench, stop after this many operations')
 
-    args = parser.parse_args()
+    parser.add_argument('--keep',
+                        action='store_true',
+                        dest='keep',
+                        help='Used with bench, keep the objects put instead of deleting them at the end')
+
+    parser.add_argument('--stats',
+                        action='store_true',
+                        dest='stats',
+                        help='Print the calls, errors, retries, bytes, MB/s and latency percentiles '
+                             'of every client operation to stderr on exit')
+
+    parser.add_argument('--profile',
+                        metavar='file',
+                        dest='profile',
+                        help='Write a cProfile and tracemalloc report of the run to the file')
+
+    enable_completion(parser, method_action, bucket_action)
+
+    args = parser.parse_args(expand_subcommand(sys.argv[1:]))
 
     # set logging
     log_format = '%(asctime)-15s %(message)s'
@@ -481,25 +866,40 @@ def main():
         logger.setLevel(logging.INFO)
     ## read config
     parse_argument(args=args)
+    if args.profile:
+        enable_profile(args.profile)
+    if args.stats:
+        enable_stats()
 
 
     check_region(region=region)
     check_bucket_name(bucket_name=bucket_name)
-    global fds_config
-    fds_config = FDSClientConfiguration(region_name=region,
-                                        enable_https=enable_https,
-                                        enable_cdn_for_download=enable_cdn,
-                                        enable_cdn_for_upload=enable_cdn)
-    global end_point
-    if not end_point is None:
-        fds_config.set_endpoint(end_point)
-    global fds_client
-    fds_client = GalaxyFDSClient(access_key=access_key,
-                                 access_secret=secret_key,
-                                 config=fds_config)
+    socket_path = args.socket
+    if args.daemon:
+        socket_path = None
+    elif socket_path:
+        try:
+            if args.batch:
+                exit(1 if run_batch(args.batch, args.workers, socket_path) else 0)
+            op = operation_from_arguments()
+            if op is not None:
+                exit(forward_operation(socket_path, op))
+        except (ConnectionRefusedError, FileNotFoundError) as e:
+            # No daemon is listening, do the work in this process instead.
+            logger.debug('Daemon [' + socket_path + '] unavailable: ' + str(e))
+
+    global fds_client, fds_config
+    if args.batch or args.daemon or list_dir is not None or \
+            list_objects is not None or method in METHODS:
+        fds_client, fds_config = create_client()
 
     try:
-        if not (list_dir is None):
+        if args.daemon:
+            run_daemon(args.daemon, args.workers)
+        elif args.batch:
+            if run_batch(args.batch, args.workers, None):
+                exit(1)
+        elif not (list_dir is None):
             if not (bucket_name is None):
                 list_directory(bucket_name=bucket_name,
                                object_name_prefix=list_dir, start_mark=start_mark)
@@ -552,6 +952,17 @@ def main():
                 else:
                     if not head_bucket(bucket_name=bucket_name):
                         exit(1)
+            elif method in ('prefetch', 'refresh'):
+                if cdn_objects(method, bucket_name, object_name, args).failures:
+                    exit(1)
+            elif method == 'du':
+                disk_usage(bucket_name, args.prefix or '', args.depth,
+                           args.human)
+            elif method == 'inventory':
+                print_inventory(bucket_name, args.prefix or '', args.format)
+            elif method == 'bench':
+                if run_bench(bucket_name, args).first_errors:
+                    exit(1)
             else:
                 parser.print_help()
                 print("Config:")
@@ -569,9 +980,13 @@ def main():
                 print("\t[list directory under bucket]\n\t\tfds -L DIR -b BUCKET_NAME")
                 print("\t[create object under bucket]\n\t\tfds -m put -b BUCKET_NAME -o OBJECT_NAME -d FILE_PATH")
                 print("\t[create object with pipline]\n\t\tcat file | fds -m put -b BUCKET_NAME -o OBJECT_NAME")
+                print("\t[prefetch objects to CDN, hottest first]\n\t\tfds prefetch -b BUCKET_NAME --prefix PREFIX --weights FILE")
+                print("\t[disk usage two levels under a prefix]\n\t\tfds du -b BUCKET_NAME --prefix PREFIX --depth 2")
+                print("\t[load test with 16 workers for 30 seconds]\n\t\tfds bench -b BUCKET_NAME --mix put=1,get=4 --sizes 4K-1M --workers 16 --duration 30")
+                print("\t[every object under a prefix as JSON lines]\n\t\tfds inventory -b BUCKET_NAME --prefix PREFIX --format jsonl")
 
     except Exception as e:
-        sys.stderr.write(e.message)
+        sys.stderr.write(str(getattr(e, 'message', e)))
         sys.stderr.flush()
         if debug_enabled:
             logger.debug(e, exc_info=True)
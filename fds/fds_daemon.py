@@ -0,0 +1,118 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from .fds_batch import BatchRunner
+
+
+class FDSDaemon(object):
+  '''
+  A long-lived local server that executes batch operations on behalf of the
+  fds command, keeping one GalaxyFDSClient (and its connection pool) warm.
+
+  Clients connect to a Unix socket, send operations in the BatchRunner line
+  format, shut down their write side and read one result line per operation
+  until the daemon closes the connection.
+  '''
+
+  def __init__(self, client, socket_path, max_workers=8):
+    '''
+    :param client:      The GalaxyFDSClient shared by all connections
+    :param socket_path: The path of the Unix socket to listen on
+    :param max_workers: The number of operations executed concurrently per
+                        connection
+    '''
+    self._client = client
+    self._socket_path = socket_path
+    self._max_workers = max_workers
+    self._server = None
+
+  def serve_forever(self):
+    if os.path.exists(self._socket_path):
+      os.unlink(self._socket_path)
+    daemon = self
+
+    class Handler(socketserver.StreamRequestHandler):
+      def handle(self):
+        output = _LineWriter(self.wfile)
+        runner = BatchRunner(daemon._client, daemon._max_workers)
+        try:
+          runner.run(self.rfile, output)
+        finally:
+          runner.close()
+
+    # Only the owner may connect, from the moment the socket exists.
+    umask = os.umask(0o177)
+    try:
+      self._server = socketserver.ThreadingUnixStreamServer(self._socket_path,
+                                                            Handler)
+    finally:
+      os.umask(umask)
+    self._server.daemon_threads = True
+    try:
+      self._server.serve_forever()
+    finally:
+      self._server.server_close()
+      if os.path.exists(self._socket_path):
+        os.unlink(self._socket_path)
+
+  def shutdown(self):
+    if self._server is not None:
+      self._server.shutdown()
+
+
+class _LineWriter(object):
+  '''
+  Text adapter over a socket file, as BatchRunner writes str lines.
+  '''
+
+  def __init__(self, wfile):
+    self._wfile = wfile
+
+  def write(self, line):
+    self._wfile.write(line.encode('utf-8'))
+
+  def flush(self):
+    self._wfile.flush()
+
+
+def forward(socket_path, lines, output):
+  '''
+  Send operations to a running FDSDaemon and copy its results to output.
+  :param socket_path: The path of the daemon's Unix socket
+  :param lines:       An iterable of JSON encoded operations
+  :param output:      A text file like object receiving the result lines
+  :return:            The number of failed operations
+  '''
+  sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  sock.connect(socket_path)
+
+  def send():
+    try:
+      for line in lines:
+        if isinstance(line, str):
+          line = line.encode('utf-8')
+        if not line.endswith(b'\n'):
+          line += b'\n'
+        sock.sendall(line)
+    finally:
+      sock.shutdown(socket.SHUT_WR)
+
+  # Results stream back while operations are still being sent, so the two
+  # directions must not wait on each other.
+  sender = threading.Thread(target=send)
+  sender.daemon = True
+  sender.start()
+  failures = 0
+  with sock.makefile('rb') as results:
+    for line in results:
+      line = line.decode('utf-8')
+      if not json.loads(line).get('ok'):
+        failures += 1
+      output.write(line)
+      output.flush()
+  sender.join()
+  sock.close()
+  return failures
@@ -1,29 +1,40 @@
-#wrap the requests library
+#wrap the HTTP transport (requests or urllib3)
 
-import requests
+from .transport import REQUESTS, create_transport
 
 class FDSRequest:
-  def __init__(self, timeout, max_retries):
-    from requests.sessions import HTTPAdapter
-    self._adapter = HTTPAdapter(max_retries = max_retries)
+  def __init__(self, timeout, max_retries, max_connections=10,
+               rate_limiter=None, transport=REQUESTS, tracer=None):
     self._timeout = timeout
+    self._rate_limiter = rate_limiter
+    self._transport = create_transport(transport, max_retries,
+                                       max_connections)
+    if tracer is not None:
+      from .tracing import instrument
+      instrument(self._transport.pool_manager, tracer)
+
+  @property
+  def transport(self):
+    return self._transport
 
   def request(self, method, url, kwargs):
     '''
-    Constructs a specified session and sends quest.
-    Returns :class:`Response <Response>` object.
+    Sends the request through the configured transport.
+    Returns :class:`Response <Response>` like object.
     '''
 
     kwargs.setdefault('timeout', self._timeout)
-    session = requests.Session()
-    session.mount("http://", self._adapter)
-    session.mount("https://", self._adapter)
-    response = session.request(method=method, url=url, **kwargs)
-    # By explicitly closing the session, we avoid leaving sockets open which
-    # can trigger a ResourceWarning in some cases, and look like a memory leak
-    # in others.
-    session.close()
-    return response
+    if self._rate_limiter is not None:
+      self._rate_limiter.acquire_request()
+      if kwargs.get('data') is not None:
+        kwargs['data'] = self._rate_limiter.wrap_upload(kwargs['data'])
+    return self._transport.send(method, url, **kwargs)
+
+  def close(self):
+    '''
+    Closes the pooled connections.
+    '''
+    self._transport.close()
 
 
   def get(self, url, **kwargs):
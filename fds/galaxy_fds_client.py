@@ -1,5 +1,7 @@
 import json
 import hashlib
+import mimetypes
+import types
 from urllib.parse import quote
 
 import requests
@@ -21,12 +23,34 @@ from .model.permission import Grant
 from .model.permission import Grantee
 from .model.permission import Owner
 from .model.put_object_result import PutObjectResult
+from .model.quota_policy import QuotaPolicy
 from .model.subresource import SubResource
 from .model.init_multipart_upload_result import InitMultipartUploadResult
 from .model.upload_part_result import UploadPartResult
 import os
 import sys
+import threading
+import time
+import weakref
+from . import bulk
+from . import compression
 from . import utils
+from .tracing import traced
+
+_PRE_DEFINED_METADATA = frozenset(FDSObjectMetadata.PRE_DEFINED_METADATA)
+
+# Every client, so that a forked child can give them fresh connection pools
+# instead of sharing the parent's sockets.
+_clients = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+  for client in list(_clients):
+    client._init_connections()
+
+
+if hasattr(os, 'register_at_fork'):
+  os.register_at_fork(after_in_child=_after_fork_in_child)
 
 class GalaxyFDSClient(object):
   '''
@@ -65,7 +89,31 @@ class GalaxyFDSClient(object):
       if "FDS_ENDPOINT" in os.environ:
         config.set_endpoint(os.environ["FDS_ENDPOINT"])
     self._config = config
-    self._request = FDSRequest(config.timeout, config.max_retries)
+    self._write_listeners = []
+    self._tracer = config.tracer
+    self._init_connections()
+    _clients.add(self)
+
+  def _init_connections(self):
+    '''
+    Create the connection pool and the state shared between threads. Also
+    called in a forked child, where the parent's pooled connections and
+    locks must not be used.
+    '''
+    config = self._config
+    self._request = FDSRequest(config.timeout, config.max_retries,
+                               config.max_connections, config.rate_limiter,
+                               config.transport, config.tracer)
+    self._hedger = None
+    self._hedger_lock = threading.Lock()
+    self._executor = None
+    self._executor_lock = threading.Lock()
+    self._endpoint_selector = None
+    if config.enable_endpoint_selection:
+      from .endpoint_selector import EndpointSelector
+      self._endpoint_selector = EndpointSelector(
+          config.get_download_endpoints(),
+          probe_interval=config.endpoint_probe_interval)
 
   @property
   def delimiter(self):
@@ -75,6 +123,49 @@ class GalaxyFDSClient(object):
   def delimiter(self, delimiter):
     self._delimiter = delimiter
 
+  @property
+  def executor(self):
+    '''
+    A ClientExecutor running the methods of this client on a thread pool
+    of max_connections threads, returning futures. Created on first use.
+    '''
+    with self._executor_lock:
+      if self._executor is None:
+        from .client_executor import ClientExecutor
+        self._executor = ClientExecutor(self, self._config.max_connections)
+      return self._executor
+
+  def add_write_listener(self, listener):
+    '''
+    Call listener(event, bucket_name, object_name, value) after every
+    successful write of this client, from the thread that made it:
+      'put':    an object was put, posted, restored or completed, value is
+                its stored size or None if unknown
+      'delete': an object was deleted, value is None
+      'rename': an object was renamed, value is its new name
+    Exceptions of the listener propagate to the caller of the write.
+    '''
+    self._write_listeners.append(listener)
+
+  def remove_write_listener(self, listener):
+    self._write_listeners.remove(listener)
+
+  def _notify_write(self, event, bucket_name, object_name, value=None):
+    for listener in list(self._write_listeners):
+      listener(event, bucket_name, object_name, value)
+
+  def close(self):
+    '''
+    Release the pooled connections held by this client. Calls submitted to
+    the executor that have not started yet are cancelled.
+    '''
+    if self._executor is not None:
+      self._executor.shutdown(cancel_futures=True)
+    if self._hedger is not None:
+      self._hedger.close()
+    self._request.close()
+
+  @traced
   def does_bucket_exist(self, bucket_name):
     '''
     Check the existence of a specified bucket.
@@ -95,6 +186,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def list_buckets(self):
     '''
     List all the buckets of the current developer.
@@ -120,6 +212,7 @@ class GalaxyFDSClient(object):
     else:
       return list()
 
+  @traced
   def create_bucket(self, bucket_name):
     '''
     Create a bucket with the specified name.
@@ -135,6 +228,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def delete_bucket(self, bucket_name):
     '''
     Delete a bucket of a specified name.
@@ -151,7 +245,32 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
-  def list_objects(self, bucket_name, prefix = '', delimiter = None):
+  @traced
+  def get_bucket_quota(self, bucket_name):
+    '''
+    Get the quota policy of a specified bucket.
+    :param bucket_name: The name of the bucket
+    :return: The QuotaPolicy of the bucket, None if no quota is set
+    '''
+    uri = '%s%s?%s' % (self._config.get_base_uri(), bucket_name,
+      SubResource.QUOTA)
+    response = self._request.get(uri, auth=self._auth)
+    if response.status_code == requests.codes.ok:
+      if not response.content:
+        return None
+      return QuotaPolicy.get_quota_policy(
+          json.loads(response.content.decode('utf-8')))
+    else:
+      headers = ""
+      if self._config.debug:
+        headers = ' header=%s' % response.headers
+      message = 'Get bucket quota failed, status=%s, reason=%s%s' % (
+        response.status_code, response.content, headers)
+      raise GalaxyFDSClientException(message)
+
+  @traced
+  def list_objects(self, bucket_name, prefix = '', delimiter = None,
+                   marker = None):
     '''
     List all objects in a specified bucket with prefix. If the number of objects
     in the bucket is larger than a threshold, you would get a FDSObjectListing
@@ -160,12 +279,15 @@ class GalaxyFDSClient(object):
     :param bucket_name: The name of the bucket to whom the object is put
     :param prefix:      The prefix of the object to list
     :param delimiter:   The delimiter used in listing, using '/' if 'None' given
+    :param marker:      List the objects after this object name
     :return:  FDSObjectListing contains FDSObject list and other metadata
     '''
     if delimiter is None:
       delimiter = self._delimiter
     uri = '%s%s?prefix=%s&delimiter=%s' % \
         (self._config.get_base_uri(), bucket_name, prefix, delimiter)
+    if marker:
+      uri += '&marker=%s' % marker
     response = self._request.get(uri, auth=self._auth)
     if response.status_code == requests.codes.ok:
       objects_list = FDSObjectListing(json.loads(response.content.decode('utf-8')))
@@ -179,6 +301,21 @@ class GalaxyFDSClient(object):
           (bucket_name, prefix, response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  def iter_objects(self, bucket_name, prefix = '', marker = None):
+    '''
+    Iterate over every object under a prefix, recursively, fetching the
+    listing pages as they are consumed.
+    :param bucket_name: The name of the bucket
+    :param prefix:      The prefix of the objects
+    :param marker:      Start after this object name
+    :return: A generator of FDSObjectSummary
+    '''
+    listing = self.list_objects(bucket_name, prefix, '', marker)
+    while listing is not None:
+      for summary in listing.objects:
+        yield summary
+      listing = self.list_next_batch_of_objects(listing)
+
   def list_trash_objects(self, prefix = '', delimiter = None):
     '''
     Compared with list_objects, it returns a list of objects in the trash.
@@ -188,6 +325,7 @@ class GalaxyFDSClient(object):
     '''
     return self.list_objects("trash", prefix, delimiter);
 
+  @traced
   def list_next_batch_of_objects(self, previous):
     '''
     List objects in a iterative manner
@@ -228,10 +366,12 @@ class GalaxyFDSClient(object):
     bucket_name, object_name = utils.uri_to_bucket_and_object(uri)
     self.put_object(bucket_name, object_name, data, metadata)
 
+  @traced
   def put_object(self, bucket_name, object_name, data, metadata=None):
     '''
     Put the object to a specified bucket. If a object with the same name already
-    existed, it will be overwritten.
+    existed, it will be overwritten. The body is compressed when compression
+    is configured and the content type is one of compression_content_types.
     :param bucket_name: The name of the bucket to whom the object is put
     :param object_name: The name of the object to put
     :param data:        The data to put, bytes or a file like object
@@ -242,7 +382,11 @@ class GalaxyFDSClient(object):
       object_name)
     if metadata is None:
       metadata = FDSObjectMetadata()
-    if self._config.enable_md5_calculate:
+    # Listeners are given the size of the object, not of its encoding.
+    size = len(data) if isinstance(data, (bytes, bytearray)) else None
+    data, metadata = self._encode_body(object_name, data, metadata)
+    if self._config.enable_md5_calculate and \
+        not isinstance(data, types.GeneratorType):
       digest = hashlib.md5()
       digest.update(data)
       metadata.add_header(Common.CONTENT_MD5,digest.hexdigest())
@@ -250,7 +394,9 @@ class GalaxyFDSClient(object):
     response = self._request.put(uri, data=data, auth=self._auth,
         headers=metadata.metadata)
     if response.status_code == requests.codes.ok:
-      return PutObjectResult(json.loads(response.content.decode('utf-8')))
+      result = PutObjectResult(json.loads(response.content.decode('utf-8')))
+      self._notify_write('put', bucket_name, object_name, size)
+      return result
     headers = ""
     if self._config.debug:
       headers = ' header=%s' % response.headers
@@ -258,6 +404,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
     raise GalaxyFDSClientException(message)
 
+  @traced
   def post_object(self, bucket_name, data, metadata=None):
     '''
     Post the object to a specified bucket. The object name will be generated
@@ -270,7 +417,10 @@ class GalaxyFDSClient(object):
     uri = '%s%s/' % (self._config.get_upload_base_uri(), bucket_name)
     if metadata is None:
       metadata = FDSObjectMetadata()
-    if self._config.enable_md5_calculate:
+    size = len(data) if isinstance(data, (bytes, bytearray)) else None
+    data, metadata = self._encode_body(None, data, metadata)
+    if self._config.enable_md5_calculate and \
+        not isinstance(data, types.GeneratorType):
       digest = hashlib.md5()
       digest.update(data)
       metadata.add_header(Common.CONTENT_MD5,digest.hexdigest())
@@ -278,7 +428,10 @@ class GalaxyFDSClient(object):
     response = self._request.post(uri, data=data, auth=self._auth,
         headers=metadata.metadata)
     if response.status_code == requests.codes.ok:
-      return PutObjectResult(json.loads(response.content))
+      result = PutObjectResult(json.loads(response.content))
+      self._notify_write('put', bucket_name, result.object_name,
+                         size)
+      return result
     headers = ""
     if self._config.debug:
       headers = ' header=%s' % response.headers
@@ -297,28 +450,52 @@ class GalaxyFDSClient(object):
     bucket_name, object_name = utils.uri_to_bucket_and_object(uri)
     return self.get_object(bucket_name, object_name, position, size)
 
-  def get_object(self, bucket_name, object_name, position=0, size=4096):
+  @traced
+  def get_object(self, bucket_name, object_name, position=0, size=4096,
+                 length=None):
     '''
     Get a specified object from a bucket.
     :param bucket_name: The name of the bucket from whom to get the object
     :param object_name: The name of the object to get
     :param position: The start index of object to get
     :param size:        The maximum size of each piece when return streaming is on
+    :param length:      The number of bytes to get, None to get all the bytes
+                        from position to the end of the object
     :return: The FDS object
     '''
     if position < 0:
       raise GalaxyFDSClientException("Seek position should be no less than 0")
-    uri = '%s%s/%s' % (self._config.get_download_base_uri(), bucket_name,
-      object_name)
-    if position > 0:
+    if length is not None and length <= 0:
+      raise GalaxyFDSClientException("Length should be greater than 0")
+    path = '%s/%s' % (bucket_name, object_name)
+    header = None
+    if length is not None:
+      header = {Common.RANGE : 'bytes=%d-%d' % (position, position + length - 1)}
+    elif position > 0:
       header = {Common.RANGE : 'bytes=%d-' % position}
-      response = self._request.get(uri, auth=self._auth, headers=header)
+    # A range of an encoded object cannot be decoded on its own, it is
+    # streamed as stored so that the transport does not try either.
+    decode = self._config.enable_decompression and header is None
+    stream = decode or header is not None
+    if self._endpoint_selector is not None:
+      response = self._get_with_failover(path, header)
     else:
-      response = self._request.get(uri, auth=self._auth)
+      uris = [self._config.get_download_base_uri() + path]
+      if self._config.hedge_to_origin:
+        uris.append(self._config.get_base_uri() + path)
+      response = self._download(uris, header, stream)
     if response.status_code == requests.codes.ok or \
         response.status_code == requests.codes.partial:
       obj = FDSObject()
-      obj.stream = response.iter_content(chunk_size=size)
+      encoding = response.headers.get(Common.CONTENT_ENCODING)
+      if decode and encoding in compression.ENCODINGS:
+        obj.stream = self._decoded_stream(response, encoding, size)
+      elif header is not None and encoding:
+        obj.stream = self._raw_stream(response, size)
+      else:
+        obj.stream = response.iter_content(chunk_size=size)
+      if self._config.rate_limiter is not None:
+        obj.stream = self._config.rate_limiter.wrap_download(obj.stream)
       summary = FDSObjectSummary()
       summary.bucket_name = bucket_name
       summary.object_name = object_name
@@ -334,10 +511,37 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
+  def get_object_length(self, bucket_name, object_name):
+    '''
+    Get the length of an object with a one byte Range GET.
+    :param bucket_name: The name of the bucket
+    :param object_name: The name of the object
+    :return: The length of the object in bytes
+    '''
+    uri = '%s%s/%s' % (self._config.get_base_uri(), bucket_name, object_name)
+    response = self._request.get(uri, auth=self._auth,
+                                 headers={Common.RANGE: 'bytes=0-0'})
+    if response.status_code == requests.codes.partial:
+      # Content-Range: bytes 0-0/<length>
+      return int(response.headers['content-range'].rsplit('/', 1)[1])
+    elif response.status_code == requests.codes.ok:
+      return len(response.content)
+    elif response.status_code == requests.codes.requested_range_not_satisfiable:
+      return 0
+    else:
+      headers = ""
+      if self._config.debug:
+        headers = ' header=%s' % response.headers
+      message = 'Get object length failed, status=%s, reason=%s%s' % (
+        response.status_code, response.content, headers)
+      raise GalaxyFDSClientException(message)
+
   def download_object_with_uri(self, uri, data_file, offset=0, length=-1):
     bucket_name, object_name = utils.uri_to_bucket_and_object(uri)
     self.download_object(bucket_name, object_name, data_file, offset, length)
 
+  @traced
   def download_object(self, bucket_name, object_name, data_file, offset=0, length=-1):
     fds_object = self.get_object(bucket_name=bucket_name,
                                  object_name=object_name,
@@ -364,6 +568,7 @@ class GalaxyFDSClient(object):
     finally:
         fds_object.stream.close()
 
+  @traced
   def does_object_exists(self, bucket_name, object_name):
     '''
     Check the existence of a specified object.
@@ -385,6 +590,22 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  def objects_exist(self, bucket_name, object_names, max_workers=None):
+    '''
+    Check the existence of many objects with concurrent HEAD requests over
+    the shared connection pool.
+    :param bucket_name:  The name of the bucket
+    :param object_names: An iterable of object names, consumed lazily
+    :param max_workers:  The number of requests in flight, by default the
+                         size of the connection pool
+    :return: A generator of (object name, exists, error) tuples in
+             completion order, exists being None if the check failed
+    '''
+    return utils.imap_unordered(
+      lambda x: self.does_object_exists(bucket_name, x), object_names,
+      max_workers or self._config.max_connections)
+
+  @traced
   def delete_object(self, bucket_name, object_name):
     '''
     Delete specified object.
@@ -400,14 +621,16 @@ class GalaxyFDSClient(object):
       message = 'Delete object failed, status=%s, reason=%s%s' % (
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
+    self._notify_write('delete', bucket_name, object_name)
 
+  @traced
   def restore_object(self, bucket_name, object_name):
     '''
     Restore a specified object from trash.
     :param bucket_name:     The name of the bucket
     :param object_name: The name of the object
     '''
-    uri = '%s%s/%srestore=' % (self._config.get_base_uri(),
+    uri = '%s%s/%s?restore' % (self._config.get_base_uri(),
       bucket_name, object_name)
     response = self._request.put(uri, auth=self._auth)
     if response.status_code != requests.codes.ok:
@@ -417,7 +640,9 @@ class GalaxyFDSClient(object):
       message = 'Restore object failed, status=%s, reason=%s%s' % (
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
+    self._notify_write('put', bucket_name, object_name)
 
+  @traced
   def rename_object(self, bucket_name, src_object_name, dst_object_name):
     '''
     Rename a specified object to a new name.
@@ -435,7 +660,75 @@ class GalaxyFDSClient(object):
       message = 'Rename object failed, status=%s, reason=%s%s' % (
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
+    self._notify_write('rename', bucket_name, src_object_name,
+                       dst_object_name)
+
+  def move_prefix(self, bucket_name, src_prefix, dst_prefix, max_workers=None,
+                  qps=None, marker=None, progress=None):
+    '''
+    Rename every object under src_prefix to the same name under dst_prefix,
+    streaming the listing into a pool of concurrent renames. An object that
+    is already under dst_prefix and gone from src_prefix counts as moved,
+    so an interrupted move can simply be run again, or resumed from the
+    marker of its result.
+    :param bucket_name: The name of the bucket
+    :param src_prefix:  The prefix of the objects to move
+    :param dst_prefix:  The prefix replacing src_prefix in their names
+    :param max_workers: The number of requests in flight, by default the
+                        size of the connection pool
+    :param qps:         The most renames started per second
+    :param marker:      Resume after this source object name
+    :param progress:    Callable receiving the BulkResult after every object
+    :return: The BulkResult, with the objects that failed for retry
+    '''
+    if dst_prefix.startswith(src_prefix):
+      raise GalaxyFDSClientException(
+        'Cannot move %s into %s, it is under the source prefix' % (
+          src_prefix, dst_prefix))
+
+    def move(src):
+      dst = dst_prefix + src[len(src_prefix):]
+      try:
+        self.rename_object(bucket_name, src, dst)
+      except GalaxyFDSClientException:
+        if self.does_object_exists(bucket_name, src) or \
+            not self.does_object_exists(bucket_name, dst):
+          raise
 
+    names = (x.object_name for x in self.iter_objects(bucket_name, src_prefix,
+                                                      marker))
+    return bulk.run(move, names, max_workers or self._config.max_connections,
+                    qps, progress)
+
+  def restore_prefix(self, bucket_name, prefix, max_workers=None, qps=None,
+                     marker=None, progress=None):
+    '''
+    Restore every object under a prefix from trash, streaming the trash
+    listing into a pool of concurrent restores. An object that already
+    exists counts as restored, so the call is safe to repeat.
+    :param bucket_name: The name of the bucket
+    :param prefix:      The prefix of the objects to restore
+    :param marker:      Resume after this object name in the trash listing
+                        (bucket_name/object_name), see BulkResult.marker
+    :return: The BulkResult, with the objects that failed for retry
+    '''
+    trash_prefix = '%s/' % bucket_name
+
+    def restore(trash_name):
+      object_name = trash_name[len(trash_prefix):]
+      try:
+        self.restore_object(bucket_name, object_name)
+      except GalaxyFDSClientException:
+        if not self.does_object_exists(bucket_name, object_name):
+          raise
+
+    names = (x.object_name for x in self.iter_objects(
+      'trash', trash_prefix + prefix, marker))
+    return bulk.run(restore, names,
+                    max_workers or self._config.max_connections, qps,
+                    progress)
+
+  @traced
   def set_bucket_acl(self, bucket_name, acl):
     '''
     Add grant(ACL) for specified bucket.
@@ -444,9 +737,8 @@ class GalaxyFDSClient(object):
     '''
     uri = '%s%s?%s' % (self._config.get_base_uri(), bucket_name,
       SubResource.ACL)
-    acp = self._acl_to_acp(acl)
-    response = self._request.put(uri, auth=self._auth, data=json.dumps(acp,
-        default=lambda x : x.to_string()))
+    response = self._request.put(uri, auth=self._auth,
+                                 data=self._acl_body(acl))
     if response.status_code != requests.codes.ok:
       headers = ""
       if self._config.debug:
@@ -455,6 +747,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def get_bucket_acl(self, bucket_name):
     '''
     Get the ACL of a specified bucket.
@@ -476,6 +769,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def set_object_acl(self, bucket_name, object_name, acl):
     '''
     Add grant(ACL) for a specified object.
@@ -483,11 +777,12 @@ class GalaxyFDSClient(object):
     :param object_name: The name of the object
     :param acl:         The grant(ACL) to add
     '''
+    self._put_object_acl(bucket_name, object_name, self._acl_body(acl))
+
+  def _put_object_acl(self, bucket_name, object_name, body):
     uri = '%s%s/%s?%s' % (
       self._config.get_base_uri(), bucket_name, object_name, SubResource.ACL)
-    acp = self._acl_to_acp(acl)
-    response = self._request.put(uri, auth=self._auth, data=json.dumps(acp,
-        default=lambda x : x.to_string()))
+    response = self._request.put(uri, auth=self._auth, data=body)
     if response.status_code != requests.codes.ok:
       headers = ""
       if self._config.debug:
@@ -496,6 +791,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def get_object_acl(self, bucket_name, object_name):
     '''
     Get the ACL of a specified object.
@@ -518,6 +814,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def get_object_metadata(self, bucket_name, object_name):
     '''
     Get the metadata of a specified object.
@@ -540,6 +837,22 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  def get_objects_metadata(self, bucket_name, object_names, max_workers=None):
+    '''
+    Get the metadata of many objects with concurrent requests over the
+    shared connection pool.
+    :param bucket_name:  The name of the bucket
+    :param object_names: An iterable of object names, consumed lazily
+    :param max_workers:  The number of requests in flight, by default the
+                         size of the connection pool
+    :return: A generator of (object name, metadata, error) tuples in
+             completion order, metadata being None if the request failed
+    '''
+    return utils.imap_unordered(
+      lambda x: self.get_object_metadata(bucket_name, x), object_names,
+      max_workers or self._config.max_connections)
+
+  @traced
   def prefetch_object(self, bucket_name, object_name):
     '''
     Prefetch the object to CDN
@@ -558,6 +871,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def refresh_object(self, bucket_name, object_name):
     '''
     Refresh the cache of the object in CDN
@@ -576,13 +890,103 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  def prefetch_objects(self, bucket_name, object_names=None, prefix=None,
+                       weights=None, max_workers=None, qps=None,
+                       progress=None):
+    '''
+    Prefetch many objects to CDN concurrently.
+    :param bucket_name:  The name of the bucket
+    :param object_names: An iterable of object names
+    :param prefix:       Prefetch every object under the prefix instead
+    :param weights:      Map of object name to weight, e.g. its request
+                         count: heavier objects are prefetched first. With
+                         neither object_names nor prefix, its keys are the
+                         objects to prefetch
+    :param max_workers:  The number of requests in flight, by default the
+                         size of the connection pool
+    :param qps:          The most requests started per second
+    :param progress:     Callable receiving the BulkResult after every object
+    :return: The BulkResult, with the objects that failed for retry
+    '''
+    return self._cdn_many(self.prefetch_object, bucket_name, object_names,
+                          prefix, weights, max_workers, qps, progress)
+
+  def refresh_objects(self, bucket_name, object_names=None, prefix=None,
+                      weights=None, max_workers=None, qps=None,
+                      progress=None):
+    '''
+    Refresh the CDN cache of many objects concurrently, see prefetch_objects.
+    '''
+    return self._cdn_many(self.refresh_object, bucket_name, object_names,
+                          prefix, weights, max_workers, qps, progress)
+
+  def _cdn_many(self, func, bucket_name, object_names, prefix, weights,
+                max_workers, qps, progress):
+    if object_names is None:
+      if prefix is not None:
+        object_names = (x.object_name for x in
+                        self.iter_objects(bucket_name, prefix))
+      elif weights is not None:
+        object_names = weights.keys()
+      else:
+        raise GalaxyFDSClientException(
+          'Either object names, a prefix or weights should be given')
+    if weights is not None:
+      object_names = sorted(object_names, key=lambda x: -weights.get(x, 0))
+    return bulk.run(lambda x: func(bucket_name, x), object_names,
+                    max_workers or self._config.max_connections, qps,
+                    progress)
+
   def set_public(self, bucket_name, object_name):
+    self.set_object_acl(bucket_name, object_name, self._public_read_acl())
+
+  def set_acl_for_prefix(self, bucket_name, prefix, acl, max_workers=None,
+                         qps=None, marker=None, progress=None):
+    '''
+    Add grant(ACL) for every object under a prefix. The ACL is serialized
+    once and the objects are streamed from the listing into a pool of
+    concurrent requests.
+    :param bucket_name: The name of the bucket
+    :param prefix:      The prefix of the objects
+    :param acl:         The grant(ACL) to add
+    :param max_workers: The number of requests in flight, by default the
+                        size of the connection pool
+    :param qps:         The most requests started per second
+    :param marker:      Resume after this object name, see BulkResult.marker
+    :param progress:    Callable receiving the BulkResult after every object
+    :return: The BulkResult, with the objects that failed for retry
+    '''
+    names = (x.object_name for x in self.iter_objects(bucket_name, prefix,
+                                                      marker))
+    return self._set_acl_many(bucket_name, names, acl, max_workers, qps,
+                              progress)
+
+  def set_public_many(self, bucket_name, object_names, max_workers=None,
+                      qps=None, progress=None):
+    '''
+    Make many objects public readable, see set_acl_for_prefix.
+    :param object_names: An iterable of object names, consumed lazily
+    :return: The BulkResult, with the objects that failed for retry
+    '''
+    return self._set_acl_many(bucket_name, object_names,
+                              self._public_read_acl(), max_workers, qps,
+                              progress)
+
+  def _set_acl_many(self, bucket_name, object_names, acl, max_workers, qps,
+                    progress):
+    body = self._acl_body(acl)
+    return bulk.run(lambda x: self._put_object_acl(bucket_name, x, body),
+                    object_names, max_workers or self._config.max_connections,
+                    qps, progress)
+
+  def _public_read_acl(self):
     acl = AccessControlList()
     grant = Grant(Grantee(UserGroups.ALL_USERS), Permission.READ)
     grant.type = GrantType.GROUP
     acl.add_grant(grant)
-    self.set_object_acl(bucket_name, object_name, acl)
+    return acl
 
+  @traced
   def init_multipart_upload(self, bucket_name, object_name):
     '''
     Init a multipart upload session
@@ -604,7 +1008,9 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
-  def upload_part(self, bucket_name, object_name, upload_id, part_number, data):
+  @traced
+  def upload_part(self, bucket_name, object_name, upload_id, part_number, data,
+                  content_md5=None):
     '''
     Upload a multipart upload part
     :param bucket_name:
@@ -612,12 +1018,17 @@ class GalaxyFDSClient(object):
     :param upload_id:
     :param part_number:
     :param data:
+    :param content_md5: The hex MD5 of data, verified by the server
     :return:
     '''
     uri = '%s%s/%s?%s%s' % (
       self._config.get_base_uri(), bucket_name, object_name, "uploadId=" +
         upload_id, "&partNumber=" + str(part_number))
-    response = self._request.put(uri, auth=self._auth, data=data)
+    if content_md5 is not None:
+      response = self._request.put(uri, auth=self._auth, data=data,
+                                   headers={Common.CONTENT_MD5: content_md5})
+    else:
+      response = self._request.put(uri, auth=self._auth, data=data)
     if response.status_code == requests.codes.ok:
       result = UploadPartResult(json.loads(response.content))
       return result
@@ -629,6 +1040,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def complete_multipart_upload(self, bucket_name, object_name, upload_id,
     metadata, upload_part_result_list):
     '''
@@ -649,6 +1061,7 @@ class GalaxyFDSClient(object):
       data=upload_part_result_list, headers=metadata.metadata)
     if response.status_code == requests.codes.ok:
       result = PutObjectResult(json.loads(response.content))
+      self._notify_write('put', bucket_name, object_name)
       return result
     else:
       headers = ""
@@ -658,6 +1071,7 @@ class GalaxyFDSClient(object):
         response.status_code, response.content, headers)
       raise GalaxyFDSClientException(message)
 
+  @traced
   def abort_multipart_upload(self, bucket_name, object_name, upload_id):
     '''
     Abort a multipart upload
@@ -670,7 +1084,7 @@ class GalaxyFDSClient(object):
       self._config.get_base_uri(), bucket_name, object_name, "uploadId=" +
         upload_id)
     response = self._request.put(uri, auth=self._auth, data='')
-    if response != requests.codes.ok:
+    if response.status_code != requests.codes.ok:
       headers = ""
       if self._config.debug:
         headers = ' headers=%s' % response.headers
@@ -722,6 +1136,136 @@ class GalaxyFDSClient(object):
     return '%s%s/%s' % (self._config.get_download_base_uri(), bucket_name,
       object_name)
 
+  @property
+  def endpoint_selector(self):
+    '''
+    The EndpointSelector routing downloads, None unless endpoint selection
+    is enabled in the configuration.
+    '''
+    return self._endpoint_selector
+
+  def _download(self, uris, headers, stream=False):
+    '''
+    GET the first uri, hedged to the last one if hedging is enabled.
+    '''
+    if self._config.enable_hedged_get:
+      return self._hedged_get(uris, headers).response
+    if stream:
+      return self._request.get(uris[0], auth=self._auth, headers=headers,
+                               stream=True)
+    if headers:
+      return self._request.get(uris[0], auth=self._auth, headers=headers)
+    return self._request.get(uris[0], auth=self._auth)
+
+  def _get_with_failover(self, path, headers):
+    '''
+    GET path from the best download endpoint, moving on to the next
+    candidate on connection errors and server errors. The response body is
+    streamed, so endpoints are scored by their time to headers.
+    '''
+    selector = self._endpoint_selector
+    candidates = selector.candidates()
+    error = None
+    response = None
+
+    def lost(uri, latency, lost_response, lost_error):
+      # A hedge that was only slower is no failure, only its latency counts.
+      if lost_error is not None or lost_response.status_code >= 500:
+        selector.record_failure(uri[:-len(path)])
+      else:
+        selector.record_success(uri[:-len(path)], latency)
+
+    for index, base_uri in enumerate(candidates):
+      uris = [base_uri + path]
+      if index + 1 < len(candidates):
+        uris.append(candidates[index + 1] + path)
+      if response is not None:
+        response.close()
+        response = None
+      try:
+        if self._config.enable_hedged_get:
+          # Credit the endpoint that answered, the loser is accounted for
+          # once it completes.
+          result = self._hedged_get(uris, headers, lost)
+          response, latency = result.response, result.latency
+          base_uri = result.uri[:-len(path)]
+        else:
+          start = time.monotonic()
+          response = self._download(uris, headers, True)
+          latency = time.monotonic() - start
+      except requests.exceptions.RequestException as e:
+        selector.record_failure(base_uri)
+        error = e
+        continue
+      if response.status_code >= 500:
+        selector.record_failure(base_uri)
+        continue
+      selector.record_success(base_uri, latency)
+      return response
+    if response is not None:
+      return response
+    raise error
+
+  def _encode_body(self, object_name, data, metadata):
+    '''
+    Compress the body if compression is configured, the metadata does not
+    already carry a content encoding and the content type (guessed from the
+    object name if not set) is allowed. Bytes are compressed at once so the
+    request keeps its Content-Length, files and iterables as a stream.
+    :return: The body and metadata to send
+    '''
+    encoding = self._config.compression
+    if not encoding or data is None or \
+        Common.CONTENT_ENCODING in metadata.metadata:
+      return data, metadata
+    content_type = metadata.metadata.get(Common.CONTENT_TYPE)
+    if content_type is None and object_name:
+      content_type = mimetypes.guess_type(object_name)[0]
+    if not compression.is_compressible(content_type,
+        self._config.compression_content_types):
+      return data, metadata
+    encoded = FDSObjectMetadata()
+    encoded.metadata.update(metadata.metadata)
+    encoded.add_header(Common.CONTENT_ENCODING, encoding)
+    level = self._config.compression_level
+    if isinstance(data, (bytes, bytearray, str)):
+      return compression.compress_bytes(data, encoding, level), encoded
+    return compression.compress_stream(data, encoding, level), encoded
+
+  def _raw_stream(self, response, size):
+    '''
+    The body of a streamed response as sent, still encoded.
+    '''
+    for chunk in response.raw.stream(size, decode_content=False):
+      yield chunk
+    response.raw.release_conn()
+
+  def _decoded_stream(self, response, encoding, size):
+    '''
+    Decode the raw (still encoded) body of a streamed response.
+    '''
+    return compression.decompress_stream(self._raw_stream(response, size),
+                                         encoding)
+
+  def _hedged_get(self, uris, headers, lost=None):
+    '''
+    GET the first uri, duplicating the request (to the last uri) when it is
+    slow to respond. The response body is streamed, so the race is decided
+    by the time to first byte.
+    '''
+    with self._hedger_lock:
+      if self._hedger is None:
+        from .hedged_request import HedgedRequester
+        # Room for a request and its hedge on every connection.
+        self._hedger = HedgedRequester(self._config.hedge_delay,
+                                       self._config.hedge_percentile,
+                                       self._config.hedge_max_ratio,
+                                       2 * self._config.max_connections)
+    return self._hedger.request(
+        lambda uri: self._request.get(uri, auth=self._auth, headers=headers,
+                                      stream=True),
+        uris, lambda response: response.close(), lost)
+
   def _acp_to_acl(self, acp):
     '''
     Translate AccessControlPolicy to AccessControlList.
@@ -737,6 +1281,9 @@ class GalaxyFDSClient(object):
       return acl
     return str()
 
+  def _acl_body(self, acl):
+    return json.dumps(self._acl_to_acp(acl), default=lambda x : x.to_string())
+
   def _acl_to_acp(self, acl):
     '''
     Translate AccessControlList to AccessControlPolicy.
@@ -754,12 +1301,15 @@ class GalaxyFDSClient(object):
     '''
     Parse object metadata from the response headers.
     '''
+    # One pass over the headers; keys are validated here, so they are stored
+    # directly rather than through add_header. Pre-defined headers are keyed
+    # by their canonical lower-case names and user metadata by the name the
+    # server sent, matched case-insensitively.
     metadata = FDSObjectMetadata()
-    header_keys = [c.lower() for c in list(response_headers.keys())];
-    for key in FDSObjectMetadata.PRE_DEFINED_METADATA:
-      if key.lower() in header_keys:
-        metadata.add_header(key, response_headers[key])
-    for key in response_headers:
-      if key.lower().startswith(FDSObjectMetadata.USER_DEFINED_METADATA_PREFIX):
-        metadata.add_user_metadata(key, response_headers[key])
+    for key, value in response_headers.items():
+      lower = key.lower()
+      if lower in _PRE_DEFINED_METADATA:
+        metadata.metadata[lower] = value
+      elif lower.startswith(FDSObjectMetadata.USER_DEFINED_METADATA_PREFIX):
+        metadata.metadata[key] = value
     return metadata
@@ -0,0 +1,193 @@
+import collections
+import threading
+import time
+from concurrent import futures
+
+from . import tracing
+from . import utils
+
+
+class LatencyTracker(object):
+  '''
+  Keeps the most recent latencies, in seconds, to derive percentiles from.
+  '''
+
+  def __init__(self, window=256):
+    self._lock = threading.Lock()
+    self._samples = collections.deque(maxlen=window)
+
+  def record(self, latency):
+    with self._lock:
+      self._samples.append(latency)
+
+  def percentile(self, p):
+    with self._lock:
+      samples = list(self._samples)
+    return utils.percentile(samples, p)
+
+  def __len__(self):
+    return len(self._samples)
+
+
+class HedgedResponse(object):
+  '''
+  The outcome of a hedged request: the winning response, the uri it was
+  sent to, its time to headers in seconds and the uris of the requests
+  that were sent and lost the race, by being slower or failing.
+  '''
+
+  def __init__(self, response, uri, latency, losers):
+    self.response = response
+    self.uri = uri
+    self.latency = latency
+    self.losers = losers
+
+
+class HedgedRequester(object):
+  '''
+  Sends a request and, if it has not produced its response headers within
+  the hedge delay, a duplicate of it. Whichever answers first is returned,
+  the other one is closed as soon as it completes (or is never sent if it
+  has not started yet).
+
+  The delay is either fixed or learned as a percentile of recent
+  time-to-first-byte latencies, those of the requests that lost a race
+  included. The delay runs from the moment the first request is sent, so
+  time spent waiting for a free worker never triggers a hedge. Hedges are
+  paid for from a budget that
+  grows by max_ratio with every request, so they never add more than that
+  fraction of extra load, even while the service is slow across the board.
+  '''
+
+  # Used until enough latencies have been observed to learn the delay.
+  DEFAULT_DELAY = 0.05
+
+  MIN_SAMPLES = 20
+
+  def __init__(self, delay=None, percentile=95, max_ratio=0.1,
+               max_workers=16):
+    '''
+    :param delay:       Seconds to wait before hedging, None to learn it
+    :param percentile:  The latency percentile used as learned delay
+    :param max_ratio:   The maximum fraction of requests that are hedged
+    :param max_workers: The number of requests that may be in flight
+    '''
+    self._delay = delay
+    self._percentile = percentile
+    self._max_ratio = max_ratio
+    self._latencies = LatencyTracker()
+    self._lock = threading.Lock()
+    self._budget = 0.0
+    self._requests = 0
+    self._hedges = 0
+    self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+
+  @property
+  def requests(self):
+    return self._requests
+
+  @property
+  def hedges(self):
+    return self._hedges
+
+  def hedge_delay(self):
+    if self._delay is not None:
+      return self._delay
+    if len(self._latencies) < self.MIN_SAMPLES:
+      return self.DEFAULT_DELAY
+    return self._latencies.percentile(self._percentile)
+
+  def request(self, send, uris, close, lost=None):
+    '''
+    Send a request, hedging it if it is slow.
+    :param send:  Callable sending the request to a uri and returning once
+                  the response headers have been received
+    :param uris:  The uri of the first request, optionally followed by an
+                  alternative uri for the hedge
+    :param close: Callable releasing a response that lost the race
+    :param lost:  Callable receiving (uri, latency, response, error) of
+                  every request that was sent and lost the race, once it
+                  completes and before its response is closed; latency
+                  and response are None if it failed with error
+    :return:      A HedgedResponse
+    '''
+    with self._lock:
+      self._requests += 1
+      self._budget = min(self._budget + self._max_ratio, 10.0)
+
+    started = threading.Event()
+    primary = self._submit(send, uris[0], started)
+    started.wait()
+    done, _ = futures.wait([primary], timeout=self.hedge_delay())
+    if done or not self._take_budget():
+      return self._result(primary, uris[0], [])
+
+    hedge = self._submit(send, uris[-1])
+    sent = {primary: uris[0], hedge: uris[-1]}
+    pending = set(sent)
+    error = None
+    while pending:
+      done, pending = futures.wait(pending,
+                                   return_when=futures.FIRST_COMPLETED)
+      for future in done:
+        uri = sent[future]
+        try:
+          result = self._result(future, uri,
+                                [x for x in sent.values() if x != uri])
+        except Exception as e:
+          error = e
+          continue
+        for loser in set(sent) - set([future]):
+          self._discard(loser, sent[loser], close, lost)
+        return result
+    raise error
+
+  def close(self):
+    self._executor.shutdown(wait=False)
+
+  def _submit(self, send, uri, started=None):
+    def timed_send():
+      if started is not None:
+        started.set()
+      start = time.monotonic()
+      response = send(uri)
+      return time.monotonic() - start, response
+    return self._executor.submit(tracing.bind(timed_send))
+
+  def _result(self, future, uri, losers):
+    latency, response = future.result()
+    self._latencies.record(latency)
+    return HedgedResponse(response, uri, latency, losers)
+
+  def _take_budget(self):
+    with self._lock:
+      if self._budget < 1.0:
+        return False
+      self._budget -= 1.0
+      self._hedges += 1
+      return True
+
+  def _discard(self, future, uri, close, lost):
+    '''
+    Close the response of a request that lost the race once it completes,
+    recording its latency so that the learned delay is not biased towards
+    the faster requests.
+    '''
+    if future.cancel():
+      return
+
+    def close_response(f):
+      if f.cancelled():
+        return
+      if f.exception() is not None:
+        if lost is not None:
+          lost(uri, None, None, f.exception())
+        return
+      latency, response = f.result()
+      self._latencies.record(latency)
+      try:
+        if lost is not None:
+          lost(uri, latency, response, None)
+      finally:
+        close(response)
+    future.add_done_callback(close_response)
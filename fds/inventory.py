@@ -0,0 +1,300 @@
+import bisect
+import csv
+import heapq
+import itertools
+import json
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+# The upper bounds of the default size histogram buckets: 1 KiB to 64 GiB by
+# powers of four, and one more bucket for everything larger.
+DEFAULT_HISTOGRAM_BOUNDS = [1024 * 4 ** i for i in range(14)]
+
+
+class Inventory(object):
+  '''
+  The objects of a bucket held in columns instead of one FDSObjectSummary
+  per object: the keys are UTF-8 encoded into one bytearray with their
+  offsets in an array('q'), the sizes are an array('q') and the owners are
+  dictionary encoded into an array('I') of indexes into owner_ids. A
+  million objects take tens of megabytes.
+
+    objects = inventory.build(client, 'logs')
+    for prefix, count, size in objects.du(depth=2):
+      print(prefix, count, size)
+  '''
+
+  def __init__(self, bucket_name=None, prefix=''):
+    self.bucket_name = bucket_name
+    self.prefix = prefix
+    self.owner_ids = []
+    self._owner_codes = {}
+    self._keys = bytearray()
+    self._offsets = array('q', [0])
+    self._sizes = array('q')
+    self._owners = array('I')
+
+  def add(self, object_name, size, owner_id=None):
+    code = self._owner_codes.get(owner_id)
+    if code is None:
+      code = len(self.owner_ids)
+      self._owner_codes[owner_id] = code
+      self.owner_ids.append(owner_id)
+    self._keys += object_name.encode('utf-8')
+    self._offsets.append(len(self._keys))
+    self._sizes.append(size)
+    self._owners.append(code)
+
+  def add_listing(self, listing):
+    '''
+    Add the objects of an FDSObjectListing page.
+    '''
+    names = [x.encode('utf-8') for x in listing.object_names]
+    base = len(self._keys)
+    self._offsets.extend(base + x for x in
+                         itertools.accumulate(len(x) for x in names))
+    self._keys += b''.join(names)
+    self._sizes.extend(listing.sizes)
+    codes = self._owner_codes
+    for owner in listing.owners:
+      owner_id = owner.get('id') if owner else None
+      code = codes.get(owner_id)
+      if code is None:
+        code = codes[owner_id] = len(self.owner_ids)
+        self.owner_ids.append(owner_id)
+      self._owners.append(code)
+
+  def __len__(self):
+    return len(self._sizes)
+
+  def key(self, index):
+    return self._keys[self._offsets[index]:
+                      self._offsets[index + 1]].decode('utf-8')
+
+  def size(self, index):
+    return self._sizes[index]
+
+  def owner(self, index):
+    return self.owner_ids[self._owners[index]]
+
+  def __iter__(self):
+    '''
+    Iterate over (key, size, owner id) tuples.
+    '''
+    keys = self._keys
+    offsets = self._offsets
+    owner_ids = self.owner_ids
+    for i in range(len(self._sizes)):
+      yield (keys[offsets[i]:offsets[i + 1]].decode('utf-8'), self._sizes[i],
+             owner_ids[self._owners[i]])
+
+  @property
+  def total_size(self):
+    return sum(self._sizes)
+
+  def du(self, depth=1, delimiter='/'):
+    '''
+    The number of objects and bytes under every prefix of depth delimited
+    components, like du --max-depth. An object with fewer components counts
+    towards the prefix it is directly under, '' at the top.
+    :return: A list of (prefix, object count, total size) sorted by prefix
+    '''
+    keys = self._keys
+    offsets = self._offsets
+    sizes = self._sizes
+    separator = delimiter.encode('utf-8')
+    totals = {}
+    current = None
+    complete = False
+    for i in range(len(sizes)):
+      start = offsets[i]
+      end = offsets[i + 1]
+      # Listings are sorted, the keys of a prefix are usually consecutive:
+      # only look for delimiters when the key leaves the current prefix.
+      if not (complete and keys.startswith(current, start, end)):
+        cut = start
+        found = 0
+        while found < depth:
+          position = keys.find(separator, cut, end)
+          if position < 0:
+            break
+          cut = position + len(separator)
+          found += 1
+        current = bytes(keys[start:cut])
+        complete = found == depth
+        total = totals.get(current)
+        if total is None:
+          total = totals[current] = [0, 0]
+      total[0] += 1
+      total[1] += sizes[i]
+    return [(prefix.decode('utf-8'), count, size)
+            for prefix, (count, size) in sorted(totals.items())]
+
+  def by_owner(self):
+    '''
+    :return: A list of (owner id, object count, total size), largest first
+    '''
+    counts = [0] * len(self.owner_ids)
+    totals = [0] * len(self.owner_ids)
+    for code, size in zip(self._owners, self._sizes):
+      counts[code] += 1
+      totals[code] += size
+    return sorted(zip(self.owner_ids, counts, totals),
+                  key=lambda x: x[2], reverse=True)
+
+  def top(self, n=10):
+    '''
+    :return: The (key, size, owner id) of the n largest objects, largest
+             first
+    '''
+    indexes = heapq.nlargest(n, range(len(self._sizes)),
+                             key=self._sizes.__getitem__)
+    return [(self.key(i), self._sizes[i], self.owner(i)) for i in indexes]
+
+  def histogram(self, bounds=None):
+    '''
+    Count the objects and bytes by size.
+    :param bounds: The increasing exclusive upper bounds of the buckets,
+                   DEFAULT_HISTOGRAM_BOUNDS if None; a last bucket holds the
+                   larger objects
+    :return: A list of (lower bound, upper bound, object count, total size),
+             the upper bound of the last bucket being None
+    '''
+    if bounds is None:
+      bounds = DEFAULT_HISTOGRAM_BOUNDS
+    counts = [0] * (len(bounds) + 1)
+    totals = [0] * (len(bounds) + 1)
+    for size in self._sizes:
+      i = bisect.bisect_right(bounds, size)
+      counts[i] += 1
+      totals[i] += size
+    lowers = [0] + list(bounds)
+    uppers = list(bounds) + [None]
+    return list(zip(lowers, uppers, counts, totals))
+
+  def to_csv(self, f):
+    '''
+    Write a key,size,owner CSV with a header row.
+    :param f: A text file like object or the path of a local file
+    '''
+    if isinstance(f, str):
+      with open(f, 'w', newline='') as out:
+        return self.to_csv(out)
+    write_csv(self, f)
+
+  def to_jsonl(self, f):
+    '''
+    Write one {"key", "size", "owner"} JSON object per line.
+    :param f: A text file like object or the path of a local file
+    '''
+    if isinstance(f, str):
+      with open(f, 'w') as out:
+        return self.to_jsonl(out)
+    write_jsonl(self, f)
+
+
+def write_csv(rows, f, header=True):
+  '''
+  Write (key, size, owner id) rows as CSV to a text file like object.
+  '''
+  writer = csv.writer(f)
+  if header:
+    writer.writerow(('key', 'size', 'owner'))
+  writer.writerows(rows)
+
+
+def write_jsonl(rows, f):
+  '''
+  Write (key, size, owner id) rows as JSON lines to a text file like object.
+  '''
+  for key, size, owner in rows:
+    f.write(json.dumps({'key': key, 'size': size, 'owner': owner}))
+    f.write('\n')
+
+
+def iter_pages(client, bucket_name, prefix='', marker=None):
+  '''
+  Iterate over the listing pages of every object under a prefix,
+  recursively. The next page is requested on a background thread while the
+  current one is consumed.
+  '''
+  with ThreadPoolExecutor(max_workers=1) as executor:
+    listing = client.list_objects(bucket_name, prefix, '', marker)
+    while listing is not None:
+      following = executor.submit(client.list_next_batch_of_objects, listing)
+      try:
+        yield listing
+      except GeneratorExit:
+        following.cancel()
+        raise
+      listing = following.result()
+
+
+def iter_rows(listings):
+  '''
+  Iterate over the (key, size, owner id) of every object of listing pages.
+  '''
+  for listing in listings:
+    for name, size, owner in zip(listing.object_names, listing.sizes,
+                                 listing.owners):
+      yield name, size, owner.get('id') if owner else None
+
+
+def iter_du(rows, depth=1, delimiter='/'):
+  '''
+  The streaming counterpart of Inventory.du over rows sorted by key, such
+  as the rows of a listing: only the prefixes enclosing the current key
+  are held, '' and its delimiter terminated ancestors, so at most depth + 1
+  of them however the keys prefix each other. A prefix is yielded once no later
+  key can be under it, so nested prefixes come before the prefixes
+  enclosing them, like du.
+  :param rows: An iterable of tuples starting with the key and the size
+  :return: A generator of (prefix, object count, total size)
+  '''
+  # [prefix, count, size] of the open prefixes, each one a prefix of the
+  # next one.
+  stack = []
+  for row in rows:
+    key, size = row[0], row[1]
+    if stack and key.startswith(stack[-1][0]) and \
+        stack[-1][0].count(delimiter) == depth:
+      group = stack[-1]
+    else:
+      cut = 0
+      for _ in range(depth):
+        position = key.find(delimiter, cut)
+        if position < 0:
+          break
+        cut = position + len(delimiter)
+      prefix = key[:cut]
+      while stack and not _encloses(stack[-1][0], prefix, delimiter):
+        yield tuple(stack.pop())
+      if stack and stack[-1][0] == prefix:
+        group = stack[-1]
+      else:
+        group = [prefix, 0, 0]
+        stack.append(group)
+    group[1] += 1
+    group[2] += size
+  while stack:
+    yield tuple(stack.pop())
+
+
+def _encloses(ancestor, prefix, delimiter):
+  return ancestor == '' or (ancestor.endswith(delimiter) and
+                            prefix.startswith(ancestor))
+
+
+def build(client, bucket_name, prefix='', progress=None):
+  '''
+  Build the Inventory of every object under a prefix, recursively, one
+  listing page at a time.
+  :param progress: Callable receiving the Inventory after every page
+  :return: The Inventory
+  '''
+  inventory = Inventory(bucket_name, prefix)
+  for listing in iter_pages(client, bucket_name, prefix):
+    inventory.add_listing(listing)
+    if progress is not None:
+      progress(inventory)
+  return inventory
@@ -1,23 +1,142 @@
+import sys
+import weakref
+from array import array
+from collections.abc import Sequence
+
 from .fds_object_summary import FDSObjectSummary
 from .permission import Owner
 
+# Owners are shared by every listing entry with the same id and name.
+_owners = weakref.WeakValueDictionary()
+
+
+def _intern_owner(json):
+  if not json:
+    return None
+  key = (json.get('id'), json.get('displayName'))
+  owner = _owners.get(key)
+  if owner is None:
+    owner = Owner.from_json(json)
+    _owners[key] = owner
+  return owner
+
+
+class _Summaries(Sequence):
+  '''
+  The objects of a listing, as FDSObjectSummary created on access.
+  '''
+  __slots__ = ('_bucket_name', '_names', '_sizes', '_owners')
+
+  def __init__(self, bucket_name, names, sizes, owners):
+    self._bucket_name = bucket_name
+    self._names = names
+    self._sizes = sizes
+    self._owners = owners
+
+  def __len__(self):
+    return len(self._names)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self)))]
+    summary = FDSObjectSummary()
+    summary.bucket_name = self._bucket_name
+    summary.object_name = self._names[index]
+    summary.owner = self._owners[index]
+    summary.size = self._sizes[index]
+    return summary
+
+  def __iter__(self):
+    bucket_name = self._bucket_name
+    for name, size, owner in zip(self._names, self._sizes, self._owners):
+      summary = FDSObjectSummary()
+      summary.bucket_name = bucket_name
+      summary.object_name = name
+      summary.owner = owner
+      summary.size = size
+      yield summary
+
+
 class FDSObjectListing(dict):
   '''
   The FDS Object Listing class.
+
+  The objects of a page are kept in compact columns (names, sizes and
+  interned owners) instead of the parsed JSON, and FDSObjectSummary
+  instances are only created when objects is accessed. The 'objects' entry
+  of the JSON listing, with the name, size and owner of every object, is
+  rebuilt the first time the listing is used as a dict.
   '''
   def __init__(self, json):
-    dict.__init__(self, json)
-    self._objects = []
-    for obj in self['objects']:
-      summary = FDSObjectSummary()
-      summary.bucket_name = self['name']
-      summary.object_name = obj['name']
-      summary.owner = Owner().from_json(obj['owner'])
-      summary.size = obj['size']
-      self._objects.append(summary)
+    entries = json.get('objects') or []
+    dict.__init__(self, ((k, v) for k, v in json.items() if k != 'objects'))
+    if isinstance(dict.get(self, 'name'), str):
+      dict.__setitem__(self, 'name', sys.intern(self['name']))
+    self._names = [x['name'] for x in entries]
+    self._sizes = array('q', (x['size'] for x in entries))
+    self._owners = [_intern_owner(x.get('owner')) for x in entries]
+    self._objects = None
+
+  def _materialize(self):
+    if not dict.__contains__(self, 'objects'):
+      dict.__setitem__(self, 'objects', [
+        {'name': x.object_name, 'size': x.size,
+         'owner': dict(x.owner) if x.owner is not None else None}
+        for x in self.objects])
+
+  def __missing__(self, key):
+    if key == 'objects':
+      self._materialize()
+      return dict.__getitem__(self, key)
+    raise KeyError(key)
+
+  def __contains__(self, key):
+    return key == 'objects' or dict.__contains__(self, key)
+
+  def __iter__(self):
+    self._materialize()
+    return dict.__iter__(self)
+
+  def __len__(self):
+    self._materialize()
+    return dict.__len__(self)
+
+  def __eq__(self, other):
+    self._materialize()
+    return dict.__eq__(self, other)
+
+  def __ne__(self, other):
+    self._materialize()
+    return dict.__ne__(self, other)
+
+  __hash__ = None
+
+  def __repr__(self):
+    self._materialize()
+    return dict.__repr__(self)
+
+  def get(self, key, default=None):
+    self._materialize()
+    return dict.get(self, key, default)
+
+  def keys(self):
+    self._materialize()
+    return dict.keys(self)
+
+  def values(self):
+    self._materialize()
+    return dict.values(self)
+
+  def items(self):
+    self._materialize()
+    return dict.items(self)
+
+  def copy(self):
+    self._materialize()
+    return dict(self)
 
   def __str__(self):
-      return str([x.object_name for x in self._objects])
+      return str(self.object_names)
 
   @property
   def prefix(self):
@@ -75,18 +194,54 @@ class FDSObjectListing(dict):
   def max_keys(self, max_keys):
     self['maxKeys'] = max_keys
 
+  @property
+  def object_names(self):
+    '''
+    The names of the objects, without creating their summaries.
+    '''
+    if self._objects is not None:
+      return [x.object_name for x in self._objects]
+    return self._names
+
+  @property
+  def sizes(self):
+    '''
+    The sizes of the objects, in the order of object_names.
+    '''
+    if self._objects is not None:
+      return [x.size for x in self._objects]
+    return self._sizes
+
+  @property
+  def owners(self):
+    '''
+    The owners of the objects, in the order of object_names.
+    '''
+    if self._objects is not None:
+      return [x.owner for x in self._objects]
+    return self._owners
+
   @property
   def objects(self):
-    return self._objects
+    '''
+    A sequence of the FDSObjectSummary of every object. Summaries are
+    created when they are accessed and not kept by the listing.
+    '''
+    if self._objects is not None:
+      return self._objects
+    return _Summaries(self['name'], self._names, self._sizes, self._owners)
 
   @objects.setter
   def objects(self, objects):
     objs = []
     for x in objects:
-      if isinstance(x, FDSObjectSummary):
+      if not isinstance(x, FDSObjectSummary):
         raise TypeError("Parameter should be a list of FDSObjectSummary")
       objs.append(x)
     self._objects = objs
+    self._names = self._sizes = self._owners = None
+    # Rebuilt from the new objects when next used as a dict.
+    dict.pop(self, 'objects', None)
 
   @property
   def common_prefixes(self):
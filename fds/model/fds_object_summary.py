@@ -2,12 +2,11 @@ class FDSObjectSummary(object):
   '''
   The FDS Object Summary class.
   '''
+  # Listings create one summary per object, keep them small.
+  __slots__ = ('bucket_name', 'object_name', 'owner', 'size')
+
   def __init__(self):
     self.bucket_name = None
     self.object_name = None
     self.owner = None
     self.size = None
-
-        
-        
-
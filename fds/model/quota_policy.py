@@ -1,16 +1,36 @@
 # -*- coding: utf-8 -*-
-class QuotaPolicy(object):
+class QuotaPolicy(dict):
   """QuotaPolicy is used to manage the quota policy."""
 
+  def __init__(self, json=None):
+    if json:
+      if 'QPS' in list(json.keys()):
+        self.qps = json['QPS']
+      if 'ThroughPut' in list(json.keys()):
+        self.throughput = json['ThroughPut']
+
   @staticmethod
   def get_quota_policy(response_content):
     """Get quota policy from HTTP response."""
 
-    quota = []
-    if response_content != '':
-      if 'QPS' in list(response_content.keys()):
-        quota.qps = response_content['QPS']
-      if 'ThroughPut' in list(response_content.keys()):
-        quota.thoughPut = response_content['ThoughPut']
-      return quota
+    if response_content:
+      return QuotaPolicy(response_content)
     return None
+
+  @property
+  def qps(self):
+    """Requests per second allowed, None if unlimited."""
+    return self.get('QPS')
+
+  @qps.setter
+  def qps(self, qps):
+    self['QPS'] = qps
+
+  @property
+  def throughput(self):
+    """Bytes per second allowed, None if unlimited."""
+    return self.get('ThroughPut')
+
+  @throughput.setter
+  def throughput(self, throughput):
+    self['ThroughPut'] = throughput
@@ -0,0 +1,179 @@
+import collections
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from .galaxy_fds_client_exception import GalaxyFDSClientException
+from .model.fds_object_metadata import FDSObjectMetadata
+
+# User metadata recorded by MultipartUploader so that a download can be
+# verified part by part.
+PART_SIZE_METADATA = 'x-xiaomi-meta-multipart-part-size'
+LENGTH_METADATA = 'x-xiaomi-meta-multipart-length'
+COMPOSITE_MD5_METADATA = 'x-xiaomi-meta-multipart-md5'
+
+DEFAULT_PART_SIZE = 32 * 1024 * 1024
+
+_READ_SIZE = 1024 * 1024
+
+
+def composite_md5(part_digests):
+  '''
+  The checksum of a multipart object: the MD5 of the concatenated binary
+  MD5s of its parts, followed by the number of parts.
+  '''
+  digest = hashlib.md5(b''.join(part_digests)).hexdigest()
+  return '%s-%d' % (digest, len(part_digests))
+
+
+class MultipartUploader(object):
+  '''
+  Uploads a large object in parts, several parts at a time.
+
+  The MD5 of every part is computed on the worker thread that uploads it
+  (hashlib releases the GIL, so parts are hashed concurrently) and sent as
+  Content-MD5 for the server to verify. The part size, the length and the
+  composite MD5 of the object are recorded in its user metadata so that
+  MultipartDownloader can check every range it reads.
+  '''
+
+  def __init__(self, client, part_size=DEFAULT_PART_SIZE, max_workers=8):
+    '''
+    :param client:      The GalaxyFDSClient parts are uploaded with
+    :param part_size:   The size of every part but the last one
+    :param max_workers: The number of parts uploaded concurrently, up to
+                        twice as many parts are held in memory
+    '''
+    self._client = client
+    self._part_size = part_size
+    self._max_workers = max_workers
+
+  def upload(self, bucket_name, object_name, data, metadata=None):
+    '''
+    :param data:     A binary file like object or the path of a local file
+    :param metadata: The FDSObjectMetadata of the object
+    :return:         The PutObjectResult
+    '''
+    if isinstance(data, str):
+      with open(data, 'rb') as f:
+        return self.upload(bucket_name, object_name, f, metadata)
+
+    upload = self._client.init_multipart_upload(bucket_name, object_name)
+    try:
+      parts = self._upload_parts(upload, data)
+    except Exception:
+      self._client.abort_multipart_upload(bucket_name, object_name,
+                                          upload.upload_id)
+      raise
+
+    complete_metadata = FDSObjectMetadata()
+    if metadata is not None:
+      complete_metadata.metadata.update(metadata.metadata)
+    complete_metadata.add_user_metadata(PART_SIZE_METADATA,
+                                        str(self._part_size))
+    complete_metadata.add_user_metadata(
+      LENGTH_METADATA, str(sum(x[2]['partSize'] for x in parts)))
+    complete_metadata.add_user_metadata(
+      COMPOSITE_MD5_METADATA, composite_md5([x[1] for x in parts]))
+    result_list = {'uploadPartResultList': [x[2] for x in parts]}
+    return self._client.complete_multipart_upload(
+      bucket_name, object_name, upload.upload_id, complete_metadata,
+      json.dumps(result_list))
+
+  def _upload_parts(self, upload, f):
+    parts = []
+    with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+      pending = collections.deque()
+      part_number = 0
+      while True:
+        part = f.read(self._part_size)
+        if not part and part_number > 0:
+          break
+        pending.append(executor.submit(self._upload_part, upload, part_number,
+                                       part))
+        part_number += 1
+        while len(pending) >= self._max_workers * 2:
+          parts.append(pending.popleft().result())
+        if len(part) < self._part_size:
+          break
+      while pending:
+        parts.append(pending.popleft().result())
+    return parts
+
+  def _upload_part(self, upload, part_number, part):
+    digest = hashlib.md5(part)
+    result = self._client.upload_part(upload.bucket_name, upload.object_name,
+                                      upload.upload_id, part_number, part,
+                                      content_md5=digest.hexdigest())
+    return part_number, digest.digest(), result
+
+
+class MultipartDownloader(object):
+  '''
+  Downloads an object with concurrent Range GETs, one per part.
+
+  Objects uploaded by MultipartUploader are split along their upload parts
+  and the MD5 of every range is checked against the composite MD5 in their
+  metadata; other objects are split into part_size ranges and not verified.
+  '''
+
+  def __init__(self, client, part_size=DEFAULT_PART_SIZE, max_workers=8):
+    self._client = client
+    self._part_size = part_size
+    self._max_workers = max_workers
+
+  def download(self, bucket_name, object_name, filename, length=None):
+    '''
+    :param filename: The path of the local file to write
+    :param length:   The length of the object, required for objects not
+                     uploaded by MultipartUploader
+    :return:         The number of bytes downloaded
+    '''
+    metadata = self._client.get_object_metadata(bucket_name,
+                                                object_name).metadata
+    metadata = dict((k.lower(), v) for k, v in metadata.items())
+    expected = metadata.get(COMPOSITE_MD5_METADATA)
+    part_size = self._part_size
+    if expected is not None:
+      part_size = int(metadata[PART_SIZE_METADATA])
+      length = int(metadata[LENGTH_METADATA])
+    elif length is None:
+      raise GalaxyFDSClientException(
+        'The length of %s/%s is not recorded in its metadata' % (
+          bucket_name, object_name))
+
+    with open(filename, 'wb') as f:
+      f.truncate(length)
+    ranges = [(x, min(part_size, length - x))
+              for x in range(0, length, part_size)]
+    with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+      digests = list(executor.map(
+        lambda r: self._download_range(bucket_name, object_name, filename,
+                                       r[0], r[1]), ranges))
+    if expected is not None:
+      actual = composite_md5(digests) if digests else \
+        composite_md5([hashlib.md5().digest()])
+      if actual != expected:
+        raise GalaxyFDSClientException(
+          'Checksum mismatch of %s/%s: expected %s, got %s' % (
+            bucket_name, object_name, expected, actual))
+    return length
+
+  def _download_range(self, bucket_name, object_name, filename, position,
+                      length):
+    fds_object = self._client.get_object(bucket_name, object_name,
+                                         position=position, size=_READ_SIZE,
+                                         length=length)
+    digest = hashlib.md5()
+    received = 0
+    with open(filename, 'r+b') as f:
+      f.seek(position)
+      for chunk in fds_object.stream:
+        digest.update(chunk)
+        f.write(chunk)
+        received += len(chunk)
+    if received != length:
+      raise GalaxyFDSClientException(
+        'Short read of %s/%s at %d: expected %d bytes, got %d' % (
+          bucket_name, object_name, position, length, received))
+    return digest.digest()
@@ -0,0 +1,233 @@
+import io
+import json
+import struct
+import threading
+import zlib
+
+from .auth.common import Common
+from .galaxy_fds_client_exception import GalaxyFDSClientException
+from .model.fds_object_metadata import FDSObjectMetadata
+
+# A pack is a single FDS object holding many small members:
+#
+#   magic (8 bytes) | index length (4 bytes, big endian) | index | data
+#
+# The index is JSON, {"members": {name: [offset, length, crc32]}}, offsets
+# being relative to the start of the data section. Keeping the index at the
+# front lets a reader get it, usually with the first members, in one request.
+MAGIC = b'FDSPACK\x01'
+
+_HEADER = struct.Struct('>8sI')
+
+CONTENT_TYPE = 'application/x-fds-pack'
+
+
+class PackWriter(object):
+  '''
+  Batches small payloads into one pack object, uploaded on close().
+
+    with PackWriter(client, 'bucket', 'thumbnails/000001.pack') as pack:
+      for name, data in thumbnails:
+        pack.add(name, data)
+
+  Members are buffered in memory, use size to roll over to a new pack once
+  it reaches the wanted object size.
+  '''
+
+  def __init__(self, client, bucket_name, object_name):
+    self._client = client
+    self._bucket_name = bucket_name
+    self._object_name = object_name
+    self._members = {}
+    self._data = io.BytesIO()
+    self._closed = False
+    self._result = None
+
+  @property
+  def size(self):
+    '''
+    The number of data bytes added so far.
+    '''
+    return self._data.tell()
+
+  @property
+  def result(self):
+    '''
+    The PutObjectResult of the upload, None before close().
+    '''
+    return self._result
+
+  def __len__(self):
+    return len(self._members)
+
+  def __contains__(self, name):
+    return name in self._members
+
+  def add(self, name, data):
+    if self._closed:
+      raise GalaxyFDSClientException('Pack %s is closed' % self._object_name)
+    if name in self._members:
+      raise GalaxyFDSClientException('Duplicated pack member: %s' % name)
+    if isinstance(data, str):
+      data = data.encode('utf-8')
+    self._members[name] = [self.size, len(data), zlib.crc32(data)]
+    self._data.write(data)
+
+  def close(self):
+    '''
+    Upload the pack.
+    :return: The PutObjectResult of the upload
+    '''
+    if self._closed:
+      return self._result
+    self._closed = True
+    index = json.dumps({'members': self._members},
+                       separators=(',', ':')).encode('utf-8')
+    metadata = FDSObjectMetadata()
+    metadata.add_header(Common.CONTENT_TYPE, CONTENT_TYPE)
+    body = _HEADER.pack(MAGIC, len(index)) + index + self._data.getvalue()
+    self._data = None
+    self._result = self._client.put_object(self._bucket_name,
+                                           self._object_name, body, metadata)
+    return self._result
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    if exc_type is None:
+      self.close()
+    else:
+      self._closed = True
+
+
+class PackReader(object):
+  '''
+  Serves members of a pack with Range GETs. The index is fetched on first
+  use and kept for the life of the reader.
+  '''
+
+  # Bytes read with the index, enough for the index of a few thousand members.
+  DEFAULT_PREFETCH = 64 * 1024
+
+  # Members at most this far apart are fetched with one request.
+  DEFAULT_MAX_GAP = 64 * 1024
+
+  # Upper bound on the size of a coalesced request.
+  DEFAULT_MAX_SPAN = 8 * 1024 * 1024
+
+  def __init__(self, client, bucket_name, object_name,
+               prefetch=DEFAULT_PREFETCH):
+    self._client = client
+    self._bucket_name = bucket_name
+    self._object_name = object_name
+    self._prefetch = prefetch
+    self._lock = threading.Lock()
+    self._members = None
+    self._data_offset = None
+    # The start of the data section, read along with the index.
+    self._head = b''
+
+  @property
+  def members(self):
+    '''
+    Map of member name to (offset, length, crc32), offsets being relative
+    to the start of the data section.
+    '''
+    self._load_index()
+    return self._members
+
+  def names(self):
+    return list(self.members.keys())
+
+  def __len__(self):
+    return len(self.members)
+
+  def __contains__(self, name):
+    return name in self.members
+
+  def read(self, name):
+    '''
+    Get a single member with one Range GET.
+    '''
+    return self.read_many([name])[name]
+
+  def read_many(self, names, max_gap=DEFAULT_MAX_GAP,
+                max_span=DEFAULT_MAX_SPAN):
+    '''
+    Get several members, coalescing members that are close to each other in
+    the pack into one Range GET.
+    :param names:    The names of the members
+    :param max_gap:  The most bytes between two members read in one request
+    :param max_span: The most bytes read in one request
+    :return:         Map of member name to its bytes
+    '''
+    members = self.members
+    wanted = []
+    for name in set(names):
+      if name not in members:
+        raise GalaxyFDSClientException('No member %s in pack %s/%s' % (
+          name, self._bucket_name, self._object_name))
+      offset, length, checksum = members[name]
+      wanted.append((offset, length, checksum, name))
+    wanted.sort()
+
+    result = {}
+    for start, end, group in _coalesce(wanted, max_gap, max_span):
+      if end <= len(self._head):
+        data = self._head[start:end]
+      else:
+        data = self._read_range(self._data_offset + start, end - start)
+      for offset, length, checksum, name in group:
+        member = data[offset - start:offset - start + length]
+        if len(member) != length or zlib.crc32(member) != checksum:
+          raise GalaxyFDSClientException(
+            'Checksum mismatch of member %s in pack %s/%s' % (
+              name, self._bucket_name, self._object_name))
+        result[name] = member
+    return result
+
+  def _read_range(self, position, length):
+    fds_object = self._client.get_object(self._bucket_name, self._object_name,
+                                         position=position, size=64 * 1024,
+                                         length=length)
+    return b''.join(fds_object.stream)
+
+  def _load_index(self):
+    with self._lock:
+      if self._members is not None:
+        return
+      head = self._read_range(0, self._prefetch)
+      if len(head) < _HEADER.size:
+        raise GalaxyFDSClientException('%s/%s is not a pack' % (
+          self._bucket_name, self._object_name))
+      magic, index_length = _HEADER.unpack_from(head)
+      if magic != MAGIC:
+        raise GalaxyFDSClientException('%s/%s is not a pack' % (
+          self._bucket_name, self._object_name))
+      index_end = _HEADER.size + index_length
+      if len(head) < index_end:
+        head += self._read_range(len(head), index_end - len(head))
+      index = json.loads(head[_HEADER.size:index_end].decode('utf-8'))
+      self._members = dict((name, tuple(member)) for name, member
+                           in index['members'].items())
+      self._data_offset = index_end
+      self._head = head[index_end:]
+
+
+def _coalesce(wanted, max_gap, max_span):
+  '''
+  Group sorted (offset, length, checksum, name) tuples into byte ranges.
+  :return: List of (start, end, members) with end exclusive
+  '''
+  groups = []
+  for member in wanted:
+    offset, length = member[0], member[1]
+    if groups:
+      start, end, group = groups[-1]
+      if offset - end <= max_gap and offset + length - start <= max_span:
+        groups[-1] = (start, max(end, offset + length), group)
+        group.append(member)
+        continue
+    groups.append((offset, offset + length, [member]))
+  return groups
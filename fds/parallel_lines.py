@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from . import process_pool
+
+DEFAULT_RANGE_SIZE = 64 * 1024 * 1024
+
+DEFAULT_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Read past the end of a range only this much at a time, the last line of a
+# range is usually short.
+_OVERHANG_SIZE = 64 * 1024
+
+
+def split_ranges(length, count):
+  '''
+  Split [0, length) into at most count (start, end) ranges of nearly
+  equal size.
+  '''
+  count = max(1, min(count, length))
+  return [(length * i // count, length * (i + 1) // count)
+          for i in range(count)] if length else []
+
+
+def iter_range_lines(client, bucket_name, object_name, start, end, length,
+                     block_size=DEFAULT_BLOCK_SIZE):
+  '''
+  Iterate over the lines starting in [start, end) of an object, without
+  their line terminator. A line crossing end is read to its end; a line
+  crossing start belongs to the previous range. Together the ranges of
+  split_ranges yield every line of the object exactly once.
+  '''
+  position = start
+  skipping = False
+  if start > 0:
+    # Start one byte early: if it is a newline, a line starts at start.
+    position = start - 1
+    skipping = True
+  pending = b''
+  line_start = position
+  while position < length:
+    size = block_size if position < end else _OVERHANG_SIZE
+    size = min(size, length - position)
+    fds_object = client.get_object(bucket_name, object_name,
+                                   position=position, size=1024 * 1024,
+                                   length=size)
+    data = b''.join(fds_object.stream)
+    position += size
+    if skipping:
+      newline = data.find(b'\n')
+      if newline < 0:
+        if position >= end:
+          # The line crossing start also crosses end.
+          return
+        continue
+      data = data[newline + 1:]
+      skipping = False
+      line_start = position - len(data)
+    pending += data
+    lines = pending.split(b'\n')
+    pending = lines.pop()
+    for line in lines:
+      if line_start >= end:
+        return
+      yield line
+      line_start += len(line) + 1
+    if line_start >= end:
+      return
+  if pending and not skipping and line_start < end:
+    yield pending
+
+
+def _process_range(client, func, bucket_name, object_name, task, block_size):
+  start, end, length = task
+  return func(iter_range_lines(client, bucket_name, object_name, start, end,
+                               length, block_size))
+
+
+def _call(args):
+  return _process_range(process_pool._client, process_pool._func, *args)
+
+
+def process_lines(client, bucket_name, object_name, func, workers=8,
+                  processes=False, range_size=DEFAULT_RANGE_SIZE,
+                  block_size=DEFAULT_BLOCK_SIZE):
+  '''
+  Process the lines of a large object in parallel. The object is split into
+  byte ranges that are read with Range GETs on separate workers, each range
+  is aligned to line boundaries and its lines are handed to func.
+
+    def count_errors(lines):
+      return sum(1 for x in lines if b'ERROR' in x)
+    total = sum(process_lines(client, 'logs', 'big.log', count_errors))
+
+  :param func:       Callable receiving an iterator over the lines (bytes
+                     without the newline) of one range and returning a
+                     result for it
+  :param workers:    The number of ranges processed concurrently
+  :param processes:  Use forked worker processes instead of threads, for
+                     CPU bound func; func's results must then be picklable
+  :param range_size: The target size of a range, the object is split into
+                     at least workers ranges
+  :param block_size: The size of a single Range GET
+  :return: The list of func's results, in the order of the ranges
+  '''
+  length = client.get_object_length(bucket_name, object_name)
+  count = max(workers, -(-length // range_size))
+  tasks = [(start, end, length) for start, end in split_ranges(length, count)]
+  if not tasks:
+    return []
+  if processes:
+    pool = process_pool.fork_pool(workers, client, func)
+    try:
+      return pool.map(_call, [(bucket_name, object_name, x, block_size)
+                              for x in tasks], 1)
+    finally:
+      pool.terminate()
+      pool.join()
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+    return list(executor.map(
+      lambda x: _process_range(client, func, bucket_name, object_name, x,
+                               block_size), tasks))
@@ -0,0 +1,135 @@
+import threading
+import zlib
+from array import array
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+
+class PrefixWatcher(object):
+  '''
+  Detects the objects added, removed and changed under a prefix by listing
+  it periodically:
+
+    watcher = PrefixWatcher(client, 'inbound', 'orders/', interval=60)
+    for event, object_name, size in watcher.events():
+      if event == ADDED:
+        process(object_name)
+
+  By default every poll lists the whole prefix and merges it, page by
+  page, with a snapshot of the previous listing; an object is changed when
+  its size is. The snapshot holds no name as a string: each page is kept
+  as its names zlib compressed in one block, which sorted names sharing
+  long prefixes shrink to a fraction of, and an array of sizes, and only
+  one page is inflated at a time while merging. With
+  append_only, for key schemes where new objects sort after the existing
+  ones (timestamps, sequence numbers), a poll only lists after the last
+  name seen and reports additions, and nothing but that name is kept.
+  '''
+
+  def __init__(self, client, bucket_name, prefix='', interval=60,
+               append_only=False, report_existing=False):
+    '''
+    :param interval:        The seconds between the start of two polls
+    :param append_only:     Only list after the last name seen
+    :param report_existing: Report the objects of the first poll as added,
+                            instead of only taking them as the baseline
+    '''
+    self._client = client
+    self.bucket_name = bucket_name
+    self.prefix = prefix
+    self.interval = interval
+    self.append_only = append_only
+    self._report = report_existing
+    self._snapshot = None
+    self.marker = None
+
+  def poll(self):
+    '''
+    List the prefix once and yield the (event, object name, size) of every
+    difference with the previous poll, size being None for removals. The
+    snapshot is replaced once the generator is exhausted.
+    '''
+    report = self._report
+    if self.append_only:
+      events = self._poll_appended()
+    else:
+      events = self._poll_full()
+    for event in events:
+      if report:
+        yield event
+    self._report = True
+
+  def _pages(self, marker=None):
+    listing = self._client.list_objects(self.bucket_name, self.prefix, '',
+                                        marker)
+    while listing is not None:
+      yield listing
+      listing = self._client.list_next_batch_of_objects(listing)
+
+  def _poll_appended(self):
+    marker = self.marker
+    for listing in self._pages(marker):
+      for name, size in zip(listing.object_names, listing.sizes):
+        marker = name
+        yield ADDED, name, size
+    self.marker = marker
+
+  def _poll_full(self):
+    previous = _unpack(self._snapshot or [])
+    snapshot = []
+    old_name, old_size = next(previous, _END)
+    for listing in self._pages():
+      names, sizes = listing.object_names, listing.sizes
+      if names:
+        snapshot.append(_pack(names, sizes))
+      for name, size in zip(names, sizes):
+        while old_name is not None and old_name < name:
+          yield REMOVED, old_name, None
+          old_name, old_size = next(previous, _END)
+        if old_name == name:
+          if old_size != size:
+            yield CHANGED, name, size
+          old_name, old_size = next(previous, _END)
+        else:
+          yield ADDED, name, size
+    while old_name is not None:
+      yield REMOVED, old_name, None
+      old_name, old_size = next(previous, _END)
+    self._snapshot = snapshot
+
+  def events(self, stop=None):
+    '''
+    Poll every interval seconds and yield the events of every poll.
+    :param stop: A threading.Event ending the generator when set
+    '''
+    if stop is None:
+      stop = threading.Event()
+    while not stop.is_set():
+      for event in self.poll():
+        yield event
+      stop.wait(self.interval)
+
+  def watch(self, callback, stop=None):
+    '''
+    Call callback(event, object_name, size) for every event until stop, a
+    threading.Event, is set.
+    '''
+    for event in self.events(stop):
+      callback(*event)
+
+
+_END = (None, None)
+
+
+def _pack(names, sizes):
+  return (zlib.compress('\0'.join(names).encode('utf-8')),
+          array('q', sizes))
+
+
+def _unpack(pages):
+  for block, sizes in pages:
+    names = zlib.decompress(block).decode('utf-8').split('\0')
+    for name, size in zip(names, sizes):
+      yield name, size
@@ -0,0 +1,63 @@
+import multiprocessing
+
+from . import bulk
+
+# The client and function of a worker process, inherited through fork.
+_client = None
+_func = None
+
+
+def _init_worker(client, func):
+  global _client, _func
+  _client = client
+  _func = func
+
+
+def fork_pool(processes, client, func):
+  '''
+  A pool of forked worker processes holding client and func in _client
+  and _func, for the tasks they run.
+  '''
+  # The client cannot be pickled, the workers have to inherit it.
+  context = multiprocessing.get_context('fork')
+  return context.Pool(processes, _init_worker, (client, func))
+
+
+def _call(task):
+  bucket_name, object_name = task
+  try:
+    return object_name, _func(_client, bucket_name, object_name), None
+  except Exception as e:
+    return object_name, None, bulk.error_message(e)
+
+
+def map_objects(client, func, bucket_name, prefix='', object_names=None,
+                processes=None, chunksize=8):
+  '''
+  Apply func(client, bucket_name, object_name) to every object under a
+  prefix on a pool of worker processes, for CPU heavy per-object work.
+
+  Workers are forked with a copy of client, which opens its own connection
+  pool in the child on first use and keeps it for every object the worker
+  processes. func and its results must be picklable.
+  :param client:       The GalaxyFDSClient the workers use
+  :param func:         Callable taking the client, bucket and object name
+  :param bucket_name:  The name of the bucket
+  :param prefix:       The prefix of the objects, listed recursively
+  :param object_names: The object names to process instead of a listing
+  :param processes:    The number of worker processes, the CPU count if None
+  :param chunksize:    The number of objects sent to a worker at once
+  :return: A generator of (object name, result, error message) tuples in
+           completion order
+  '''
+  if object_names is None:
+    object_names = (x.object_name for x in client.iter_objects(bucket_name,
+                                                               prefix))
+  tasks = ((bucket_name, x) for x in object_names)
+  pool = fork_pool(processes, client, func)
+  try:
+    for result in pool.imap_unordered(_call, tasks, chunksize):
+      yield result
+  finally:
+    pool.terminate()
+    pool.join()
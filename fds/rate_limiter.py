@@ -0,0 +1,258 @@
+import io
+import os
+import threading
+import time
+import weakref
+
+# Every bucket, so a forked child can replace locks that may have been held
+# by a thread of the parent at the time of the fork.
+_buckets = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+  for bucket in list(_buckets):
+    bucket._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+  os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class TokenBucket(object):
+  '''
+  A thread safe token bucket.
+
+  Tokens accumulate at `rate` per second up to `burst`. Acquiring more tokens
+  than are available puts the bucket into debt and the caller sleeps until
+  the debt would have been paid off, so requests larger than the burst size
+  (e.g. a big upload) are still admitted, just correspondingly later, and
+  concurrent callers queue up behind each other instead of all waking up at
+  once.
+  '''
+
+  def __init__(self, rate=None, burst=None, clock=time.monotonic,
+               sleep=time.sleep):
+    '''
+    :param rate:  Tokens per second, None or 0 for no limit
+    :param burst: The bucket capacity, one second worth of tokens if None
+    '''
+    self._lock = threading.Lock()
+    _buckets.add(self)
+    self._clock = clock
+    self._sleep = sleep
+    self._rate = None
+    self._burst = None
+    self._tokens = 0.0
+    self._last = clock()
+    self.set_rate(rate, burst)
+
+  @property
+  def rate(self):
+    return self._rate
+
+  @property
+  def burst(self):
+    return self._burst
+
+  def set_rate(self, rate, burst=None):
+    '''
+    Change the limit. Tokens already accumulated are kept up to the new burst.
+    '''
+    with self._lock:
+      self._refill()
+      if not rate:
+        self._rate = None
+        self._burst = None
+        self._tokens = 0.0
+        return
+      self._rate = float(rate)
+      self._burst = float(burst) if burst else self._rate
+      self._tokens = min(self._tokens, self._burst)
+
+  def acquire(self, tokens=1):
+    '''
+    Take tokens from the bucket, blocking until they are available.
+    :return: The seconds spent waiting
+    '''
+    with self._lock:
+      if self._rate is None:
+        return 0.0
+      self._refill()
+      self._tokens -= tokens
+      wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+    if wait > 0:
+      self._sleep(wait)
+    return wait
+
+  def try_acquire(self, tokens=1):
+    '''
+    Take tokens from the bucket only if they are available right now.
+    :return: True if the tokens were taken
+    '''
+    with self._lock:
+      if self._rate is None:
+        return True
+      self._refill()
+      if self._tokens < tokens:
+        return False
+      self._tokens -= tokens
+      return True
+
+  def _refill(self):
+    now = self._clock()
+    if self._rate is not None:
+      self._tokens = min(self._burst,
+                         self._tokens + (now - self._last) * self._rate)
+    self._last = now
+
+
+class RateLimiter(object):
+  '''
+  Client side limits on requests per second and on upload and download
+  bandwidth, shared by every thread using the client.
+
+  Set it on FDSClientConfiguration.rate_limiter before creating the client.
+  Each HTTP request takes one QPS token, request bodies are throttled as
+  they are read by the connection and object streams returned by
+  get_object are throttled as they are consumed. Limits are per process: a
+  forked child gets its own copy of the limiter.
+  '''
+
+  def __init__(self, qps=None, upload_bytes_per_second=None,
+               download_bytes_per_second=None, burst_seconds=1.0):
+    '''
+    :param qps:                       Requests per second, None for no limit
+    :param upload_bytes_per_second:   Upload bandwidth, None for no limit
+    :param download_bytes_per_second: Download bandwidth, None for no limit
+    :param burst_seconds:             How many seconds worth of tokens may be
+                                      spent at once after an idle period
+    '''
+    self._burst_seconds = burst_seconds
+    self._requests = TokenBucket()
+    self._upload = TokenBucket()
+    self._download = TokenBucket()
+    self.set_rates(qps, upload_bytes_per_second, download_bytes_per_second)
+
+  @staticmethod
+  def from_quota_policy(quota_policy, headroom=0.9):
+    '''
+    Build a limiter that keeps traffic just below the service quota.
+    :param quota_policy: The QuotaPolicy reported by the service
+    :param headroom:     The fraction of the quota to use
+    '''
+    limiter = RateLimiter()
+    limiter.apply_quota_policy(quota_policy, headroom)
+    return limiter
+
+  def apply_quota_policy(self, quota_policy, headroom=0.9):
+    '''
+    Re-seed the limits from a QuotaPolicy. The throughput quota is applied to
+    uploads and downloads independently.
+    '''
+    qps = None
+    throughput = None
+    if quota_policy is not None:
+      if quota_policy.qps:
+        qps = quota_policy.qps * headroom
+      if quota_policy.throughput:
+        throughput = quota_policy.throughput * headroom
+    self.set_rates(qps, throughput, throughput)
+
+  def set_rates(self, qps=None, upload_bytes_per_second=None,
+                download_bytes_per_second=None):
+    for bucket, rate in ((self._requests, qps),
+                         (self._upload, upload_bytes_per_second),
+                         (self._download, download_bytes_per_second)):
+      burst = rate * self._burst_seconds if rate else None
+      # Never let a burst drop below a single request.
+      if bucket is self._requests and burst is not None:
+        burst = max(burst, 1)
+      bucket.set_rate(rate, burst)
+
+  @property
+  def qps(self):
+    return self._requests.rate
+
+  @property
+  def upload_bytes_per_second(self):
+    return self._upload.rate
+
+  @property
+  def download_bytes_per_second(self):
+    return self._download.rate
+
+  def acquire_request(self):
+    return self._requests.acquire(1)
+
+  def acquire_upload(self, size):
+    return self._upload.acquire(size)
+
+  def acquire_download(self, size):
+    return self._download.acquire(size)
+
+  def wrap_upload(self, data):
+    '''
+    Wrap a request body so that it is throttled while being sent.
+    '''
+    if self._upload.rate is None or data is None:
+      return data
+    if isinstance(data, str):
+      data = data.encode('utf-8')
+    if isinstance(data, (bytes, bytearray, memoryview)):
+      if not data:
+        return data
+      data = io.BytesIO(data)
+    if not hasattr(data, 'read'):
+      # Iterables are sent with chunked encoding, throttle them chunk wise.
+      return self._throttle_iterable(data, self._upload)
+    return _ThrottledReader(data, self._upload)
+
+  def wrap_download(self, chunks):
+    '''
+    Wrap an iterator of downloaded chunks so that it is throttled as it is
+    consumed.
+    '''
+    if self._download.rate is None:
+      return chunks
+    return self._throttle_iterable(chunks, self._download)
+
+  @staticmethod
+  def _throttle_iterable(chunks, bucket):
+    for chunk in chunks:
+      bucket.acquire(len(chunk))
+      yield chunk
+
+
+class _ThrottledReader(object):
+  '''
+  File like request body that takes upload tokens for every block read.
+  '''
+
+  def __init__(self, fileobj, bucket):
+    self._fileobj = fileobj
+    self._bucket = bucket
+    self._length = self._remaining_length(fileobj)
+
+  @staticmethod
+  def _remaining_length(fileobj):
+    try:
+      position = fileobj.tell()
+      if hasattr(fileobj, 'getbuffer'):
+        return len(fileobj.getbuffer()) - position
+      return os.fstat(fileobj.fileno()).st_size - position
+    except (AttributeError, OSError, io.UnsupportedOperation):
+      return None
+
+  @property
+  def len(self):
+    # requests sends a Content-Length header when the body has a length, and
+    # falls back to chunked encoding when this raises AttributeError.
+    if self._length is None:
+      raise AttributeError('len')
+    return self._length
+
+  def read(self, size=-1):
+    chunk = self._fileobj.read(size)
+    if chunk:
+      self._bucket.acquire(len(chunk))
+    return chunk
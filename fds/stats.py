@@ -0,0 +1,109 @@
+import threading
+import time
+
+from . import utils
+from .tracing import SpanExporter
+
+
+class _OperationStats(object):
+
+  def __init__(self):
+    self.calls = 0
+    self.errors = 0
+    self.attempts = 0
+    self.bytes = 0
+    # Milliseconds.
+    self.latencies = []
+
+  @property
+  def retries(self):
+    '''
+    The HTTP attempts beyond one per call, hedges included.
+    '''
+    return max(0, self.attempts - self.calls) if self.attempts else 0
+
+
+class StatsExporter(SpanExporter):
+  '''
+  Aggregates the spans of a Tracer into per-operation statistics: calls,
+  errors, retries, bytes sent and received, throughput and latency
+  percentiles.
+
+    stats = StatsExporter()
+    config.tracer = Tracer(stats)
+    ...
+    sys.stderr.write(stats.report())
+  '''
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._operations = {}
+    self._start = time.monotonic()
+
+  def _get(self, name):
+    stats = self._operations.get(name)
+    if stats is None:
+      stats = self._operations[name] = _OperationStats()
+    return stats
+
+  def export(self, span):
+    with self._lock:
+      if span.name.startswith('HTTP '):
+        # Attempts count towards the operation they were made for.
+        stats = self._get(span.attributes.get('fds.operation', span.name))
+        stats.attempts += 1
+        stats.bytes += span.attributes.get('http.request_bytes', 0) + \
+          span.attributes.get('http.response_bytes', 0)
+        if 'fds.operation' in span.attributes:
+          return
+      else:
+        stats = self._get(span.name)
+      stats.calls += 1
+      if span.error is not None:
+        stats.errors += 1
+      stats.latencies.append(span.duration)
+
+  def operations(self):
+    '''
+    :return: A list of (operation name, statistics dict) sorted by name
+    '''
+    with self._lock:
+      items = sorted(self._operations.items())
+    result = []
+    for name, stats in items:
+      total = sum(stats.latencies)
+      result.append((name, {
+        'calls': stats.calls, 'errors': stats.errors,
+        'retries': stats.retries, 'bytes': stats.bytes,
+        'mb_per_second': stats.bytes / 1e6 / (total / 1000.0)
+                         if total else 0.0,
+        'p50': utils.percentile(stats.latencies, 50),
+        'p95': utils.percentile(stats.latencies, 95),
+        'p99': utils.percentile(stats.latencies, 99),
+        'max': max(stats.latencies) if stats.latencies else None}))
+    return result
+
+  def report(self):
+    '''
+    The statistics as a table. MB/s of an operation is its bytes over the
+    summed duration of its calls; the total is over the elapsed time.
+    '''
+    elapsed = time.monotonic() - self._start
+    lines = ['%-28s %7s %6s %7s %12s %8s %9s %9s %9s %9s' % (
+      'operation', 'calls', 'errors', 'retries', 'bytes', 'MB/s',
+      'p50 ms', 'p95 ms', 'p99 ms', 'max ms')]
+    total_bytes = 0
+    for name, stats in self.operations():
+      total_bytes += stats['bytes']
+      lines.append('%-28s %7d %6d %7d %12d %8.2f %9s %9s %9s %9s' % (
+        name, stats['calls'], stats['errors'], stats['retries'],
+        stats['bytes'], stats['mb_per_second'],
+        _format_ms(stats['p50']), _format_ms(stats['p95']),
+        _format_ms(stats['p99']), _format_ms(stats['max'])))
+    lines.append('total %d bytes in %.2fs, %.2f MB/s' % (
+      total_bytes, elapsed, total_bytes / 1e6 / elapsed if elapsed else 0.0))
+    return '\n'.join(lines) + '\n'
+
+
+def _format_ms(value):
+  return '-' if value is None else '%.1f' % value
@@ -20,6 +20,29 @@ class UtilsTest(unittest.TestCase):
     self.assertEqual(bucket, "bucket1")
     self.assertEqual(object, "folder1/folder2/object1")
 
+  def test_percentile(self):
+    self.assertEqual(None, utils.percentile([], 50))
+    self.assertEqual(3, utils.percentile([3], 99))
+    values = [5, 1, 4, 2, 3]
+    self.assertEqual(1, utils.percentile(values, 0))
+    self.assertEqual(3, utils.percentile(values, 50))
+    self.assertEqual(5, utils.percentile(values, 100))
+    self.assertAlmostEqual(4.6, utils.percentile(values, 90))
+
+  def test_imap_unordered(self):
+    def square(x):
+      if x == 3:
+        raise ValueError(x)
+      return x * x
+    results = list(utils.imap_unordered(square, range(100), max_workers=4))
+    self.assertEqual(100, len(results))
+    for item, result, error in results:
+      if item == 3:
+        self.assertTrue(isinstance(error, ValueError))
+      else:
+        self.assertEqual(item * item, result)
+        self.assertEqual(None, error)
+
 if __name__ == "__main__":
   unittest.main()
 
@@ -0,0 +1,359 @@
+import functools
+import http.client
+import inspect
+import json
+import os
+import threading
+import time
+
+import urllib3
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# The spans opened with Tracer.span on the current thread, innermost last.
+_local = threading.local()
+
+
+def current_span():
+  '''
+  The innermost span opened on this thread, None outside of any span.
+  '''
+  stack = getattr(_local, 'stack', None)
+  return stack[-1] if stack else None
+
+
+def bind(fn):
+  '''
+  Make fn run inside the span current on this thread, when it is called
+  from another one: spans it opens become children of that span.
+  '''
+  span = current_span()
+  if span is None:
+    return fn
+
+  @functools.wraps(fn)
+  def bound(*args, **kwargs):
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(span)
+    try:
+      return fn(*args, **kwargs)
+    finally:
+      stack.pop()
+  return bound
+
+
+class Span(object):
+  '''
+  A timed operation. Durations are in milliseconds, start is a Unix time.
+  '''
+
+  def __init__(self, tracer, name, parent=None, attributes=None):
+    self._tracer = tracer
+    self.name = name
+    self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+    self.span_id = os.urandom(8).hex()
+    self.parent_id = parent.span_id if parent else None
+    self.attributes = dict(attributes or ())
+    # The time spent in every phase of an HTTP attempt: connect (DNS and
+    # TCP), tls, send, ttfb (time to first byte) and transfer.
+    self.phases = {}
+    self.error = None
+    self.start = time.time()
+    self._start = time.perf_counter()
+    self.duration = None
+
+  def set_attribute(self, key, value):
+    self.attributes[key] = value
+
+  def add_phase(self, phase, seconds):
+    self.phases[phase] = self.phases.get(phase, 0.0) + seconds * 1000.0
+
+  def end(self, error=None):
+    '''
+    Stop the span and export it; only the first call has an effect.
+    '''
+    if self.duration is not None:
+      return
+    self.duration = (time.perf_counter() - self._start) * 1000.0
+    if error is not None:
+      self.error = '%s: %s' % (type(error).__name__,
+                               getattr(error, 'message', None) or error)
+    self._tracer.export(self)
+
+  def to_dict(self):
+    return {'trace_id': self.trace_id, 'span_id': self.span_id,
+            'parent_id': self.parent_id, 'name': self.name,
+            'start': self.start, 'duration_ms': self.duration,
+            'attributes': self.attributes, 'phases': self.phases,
+            'error': self.error}
+
+
+class SpanExporter(object):
+  '''
+  Receives every span once it has ended. export is called from the thread
+  ending the span and must be thread safe.
+  '''
+
+  def export(self, span):
+    raise NotImplementedError()
+
+  def close(self):
+    pass
+
+
+class JsonLinesExporter(SpanExporter):
+  '''
+  Appends one JSON object per span to a file.
+  '''
+
+  def __init__(self, f):
+    '''
+    :param f: A text file like object or the path of a local file
+    '''
+    self._own = isinstance(f, str)
+    self._file = open(f, 'a') if self._own else f
+    self._lock = threading.Lock()
+
+  def export(self, span):
+    line = json.dumps(span.to_dict()) + '\n'
+    with self._lock:
+      self._file.write(line)
+      self._file.flush()
+
+  def close(self):
+    if self._own:
+      self._file.close()
+
+
+class Tracer(object):
+  '''
+  Creates spans and hands them to an exporter once ended. Set it as the
+  tracer of FDSClientConfiguration to trace every client operation, with
+  one child span per HTTP attempt:
+
+    config.tracer = Tracer(JsonLinesExporter('/tmp/fds-spans.jsonl'))
+  '''
+
+  def __init__(self, exporter):
+    self._exporter = exporter
+
+  def export(self, span):
+    self._exporter.export(span)
+
+  def start_span(self, name, parent=None, attributes=None):
+    '''
+    Start a span that is not made current, a child of parent or else of
+    the current span.
+    '''
+    if parent is None:
+      parent = current_span()
+    return Span(self, name, parent, attributes)
+
+  def span(self, name, **attributes):
+    '''
+    A context manager starting a span, current on this thread until the
+    block exits, and ending it; an exception leaving the block is recorded
+    as the error of the span.
+    '''
+    return _ActiveSpan(self.start_span(name, attributes=attributes))
+
+  def close(self):
+    self._exporter.close()
+
+
+class _ActiveSpan(object):
+
+  def __init__(self, span):
+    self._span = span
+
+  def __enter__(self):
+    _local.__dict__.setdefault('stack', []).append(self._span)
+    return self._span
+
+  def __exit__(self, exc_type, exc, tb):
+    _local.stack.pop()
+    self._span.end(exc)
+    return False
+
+
+def traced(func):
+  '''
+  Decorate a GalaxyFDSClient method to run it in a span named after it
+  when the client has a tracer. The bucket and object names are recorded
+  as attributes.
+  '''
+  parameters = list(inspect.signature(func).parameters)
+  names = [(x, parameters.index(x) - 1) for x in ('bucket_name', 'object_name')
+           if x in parameters]
+
+  @functools.wraps(func)
+  def wrapper(self, *args, **kwargs):
+    tracer = self._tracer
+    if tracer is None:
+      return func(self, *args, **kwargs)
+    attributes = {}
+    for name, index in names:
+      value = args[index] if index < len(args) else kwargs.get(name)
+      if value is not None:
+        attributes[name] = value
+    with tracer.span(func.__name__, **attributes):
+      return func(self, *args, **kwargs)
+  return wrapper
+
+
+class _TimedFirstByte(http.client.HTTPConnection):
+  # urllib3's getresponse reads the status line and headers through
+  # http.client and then, unless streaming, the whole body. Placed between
+  # them in the method resolution order of the traced connections, this
+  # times the former alone.
+
+  def getresponse(self):
+    span = getattr(self, '_fds_span', None)
+    if span is None:
+      return super(_TimedFirstByte, self).getresponse()
+    start = time.perf_counter()
+    response = super(_TimedFirstByte, self).getresponse()
+    span.add_phase('ttfb', time.perf_counter() - start)
+    self._fds_headers = time.perf_counter()
+    return response
+
+
+class _TracedConnectionMixin(object):
+
+  def _new_conn(self):
+    span = getattr(self, '_fds_span', None)
+    start = time.perf_counter()
+    try:
+      return super(_TracedConnectionMixin, self)._new_conn()
+    finally:
+      if span is not None:
+        span.add_phase('connect', time.perf_counter() - start)
+
+  def connect(self):
+    span = getattr(self, '_fds_span', None)
+    if span is None or not isinstance(self, HTTPSConnection):
+      return super(_TracedConnectionMixin, self).connect()
+    before = span.phases.get('connect', 0.0)
+    start = time.perf_counter()
+    super(_TracedConnectionMixin, self).connect()
+    # What connect spent beyond opening the socket is the TLS handshake.
+    connect = (span.phases.get('connect', 0.0) - before) / 1000.0
+    span.add_phase('tls', time.perf_counter() - start - connect)
+
+  def request(self, *args, **kwargs):
+    span = getattr(self, '_fds_span', None)
+    if span is None:
+      return super(_TracedConnectionMixin, self).request(*args, **kwargs)
+    before = span.phases.get('connect', 0.0)
+    start = time.perf_counter()
+    super(_TracedConnectionMixin, self).request(*args, **kwargs)
+    # A plain HTTP connection is opened by the first send.
+    connect = (span.phases.get('connect', 0.0) - before) / 1000.0
+    span.add_phase('send', time.perf_counter() - start - connect)
+
+
+class _TracedHTTPConnection(_TracedConnectionMixin, HTTPConnection,
+                            _TimedFirstByte):
+  pass
+
+
+class _TracedHTTPSConnection(_TracedConnectionMixin, HTTPSConnection,
+                             _TimedFirstByte):
+  pass
+
+
+class _TracedPoolMixin(object):
+  '''
+  Runs every attempt of a connection pool in a span, from sending the
+  request until its body has been read or the response is released.
+  '''
+  tracer = None
+
+  def _make_request(self, conn, method, url, *args, **kwargs):
+    # urlopen passes everything after url by keyword; the arguments are
+    # forwarded as they are.
+    body = kwargs.get('body', args[0] if args else None)
+    headers = kwargs.get('headers', args[1] if len(args) > 1 else None)
+    parent = current_span()
+    attributes = {'http.method': method, 'http.host': self.host,
+                  'http.url': url}
+    if parent is not None:
+      attributes['fds.operation'] = parent.name
+    sent = _body_size(body, headers)
+    if sent is not None:
+      attributes['http.request_bytes'] = sent
+    span = self.tracer.start_span('HTTP %s' % method, parent, attributes)
+    conn._fds_span = span
+    conn._fds_headers = None
+    try:
+      response = super(_TracedPoolMixin, self)._make_request(
+        conn, method, url, *args, **kwargs)
+    except Exception as e:
+      conn._fds_span = None
+      span.end(e)
+      raise
+    conn._fds_span = None
+    span.set_attribute('http.status_code', response.status)
+    received = conn._fds_headers
+
+    def end():
+      if received is not None:
+        span.add_phase('transfer', time.perf_counter() - received)
+      # release_conn runs before the last read is counted by tell.
+      received_bytes = 0 if method == 'HEAD' else \
+        _body_size(None, response.headers)
+      span.set_attribute('http.response_bytes', response.tell()
+                         if received_bytes is None else received_bytes)
+      span.end()
+
+    if response.connection is None:
+      # The body was read along with the headers.
+      end()
+    else:
+      _end_on(response, 'release_conn', end)
+      _end_on(response, 'close', end)
+    return response
+
+
+def _body_size(body, headers):
+  if isinstance(body, (bytes, bytearray)):
+    return len(body)
+  for key, value in (headers or {}).items():
+    if key.lower() == 'content-length':
+      return int(value)
+  return None
+
+
+def _end_on(response, name, end):
+  method = getattr(response, name)
+
+  @functools.wraps(method)
+  def wrapper(*args, **kwargs):
+    try:
+      return method(*args, **kwargs)
+    finally:
+      end()
+  setattr(response, name, wrapper)
+
+
+def instrument(pool_manager, tracer):
+  '''
+  Trace the HTTP attempts of the connection pools pool_manager creates
+  from now on, a urllib3.PoolManager such as the pool_manager of the
+  transports. The connection pools of urllib3 1.x return a different
+  response from _make_request and are left alone: client operations are
+  still traced, without a span per HTTP attempt.
+  :return: Whether the pools are traced
+  '''
+  if int(urllib3.__version__.split('.')[0]) < 2:
+    return False
+  pool_manager.pool_classes_by_scheme = {
+    'http': type('TracedHTTPConnectionPool',
+                 (_TracedPoolMixin, HTTPConnectionPool),
+                 {'tracer': tracer, 'ConnectionCls': _TracedHTTPConnection}),
+    'https': type('TracedHTTPSConnectionPool',
+                  (_TracedPoolMixin, HTTPSConnectionPool),
+                  {'tracer': tracer,
+                   'ConnectionCls': _TracedHTTPSConnection}),
+  }
+  return True
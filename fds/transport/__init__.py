@@ -0,0 +1,30 @@
+from ..galaxy_fds_client_exception import GalaxyFDSClientException
+
+REQUESTS = 'requests'
+URLLIB3 = 'urllib3'
+
+TRANSPORTS = (REQUESTS, URLLIB3)
+
+
+def create_transport(name, max_retries, max_connections):
+  '''
+  Create the HTTP backend FDSRequest sends its requests through.
+
+  A transport has a send(method, url, **kwargs) method accepting the keyword
+  arguments of requests.request that FDSRequest uses (auth, headers, data,
+  json, timeout, allow_redirects, stream) and returning an object with the
+  status_code, headers, content, iter_content() and close() of a
+  requests.Response. Connection failures are raised as
+  requests.exceptions.RequestException subclasses regardless of backend.
+  :param name:            One of TRANSPORTS
+  :param max_retries:     Retries on connection errors
+  :param max_connections: Pooled connections kept per host
+  '''
+  if name == REQUESTS:
+    from .requests_transport import RequestsTransport
+    return RequestsTransport(max_retries, max_connections)
+  if name == URLLIB3:
+    from .urllib3_transport import Urllib3Transport
+    return Urllib3Transport(max_retries, max_connections)
+  raise GalaxyFDSClientException('Unknown transport: %s, expect one of %s' %
+                                 (name, '/'.join(TRANSPORTS)))
@@ -0,0 +1,28 @@
+import requests
+from requests.sessions import HTTPAdapter
+
+
+class RequestsTransport(object):
+  '''
+  Transport sending requests through one pooled requests.Session.
+  '''
+
+  def __init__(self, max_retries, max_connections):
+    self._adapter = HTTPAdapter(max_retries = max_retries,
+                                pool_maxsize = max_connections)
+    # One session for the lifetime of the client so that connections are
+    # pooled across requests (and threads) instead of being torn down after
+    # every call.
+    self._session = requests.Session()
+    self._session.mount("http://", self._adapter)
+    self._session.mount("https://", self._adapter)
+
+  @property
+  def pool_manager(self):
+    return self._adapter.poolmanager
+
+  def send(self, method, url, **kwargs):
+    return self._session.request(method=method, url=url, **kwargs)
+
+  def close(self):
+    self._session.close()
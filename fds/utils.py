@@ -1,3 +1,5 @@
+from concurrent import futures
+
 def uri_to_bucket_and_object(uri):
   if uri.startswith("fds://") == False:
     return None, None
@@ -6,3 +8,47 @@ def uri_to_bucket_and_object(uri):
   bucket = bucket_object_pair[0]
   object = bucket_object_pair[1]
   return bucket, object
+
+def percentile(values, p):
+  '''
+  The p-th percentile (0 <= p <= 100) of values, linearly interpolated
+  between the closest ranks. Returns None for an empty sequence.
+  '''
+  if not values:
+    return None
+  ordered = sorted(values)
+  rank = (len(ordered) - 1) * p / 100.0
+  low = int(rank)
+  high = min(low + 1, len(ordered) - 1)
+  return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def imap_unordered(func, items, max_workers=8):
+  '''
+  Apply func to every item on a thread pool, yielding (item, result, error)
+  tuples in completion order; error is the exception func raised, if any.
+  Items are consumed lazily with at most twice max_workers calls in flight,
+  so arbitrarily long iterables run in constant memory.
+  '''
+  items = iter(items)
+  with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+    pending = {}
+    try:
+      while True:
+        for item in items:
+          pending[executor.submit(func, item)] = item
+          if len(pending) >= max_workers * 2:
+            break
+        if not pending:
+          return
+        done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+        for future in done:
+          item = pending.pop(future)
+          error = future.exception()
+          if error is not None:
+            yield item, None, error
+          else:
+            yield item, future.result(), None
+    finally:
+      # The consumer stopped early: drop the calls that have not started.
+      for future in pending:
+        future.cancel()
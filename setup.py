@@ -10,9 +10,10 @@ setup(
   author='http://xiangyang.li',
   author_email='wo@xiangyang.li',
   include_package_data=True,
-  install_requires=['requests>=2.6.0', 'argcomplete>=1.4.1'],
+  install_requires=['requests>=2.6.0', 'urllib3>=2', 'argcomplete>=1.4.1'],
   license='Apache License',
-  packages=['fds', 'fds.auth', 'fds.auth.signature', 'fds.model'],
+  packages=['fds', 'fds.auth', 'fds.auth.signature', 'fds.model',
+            'fds.transport'],
   description='Galaxy FDS SDK for Python3.x',
   entry_points={
     'console_scripts': [
@@ -0,0 +1,75 @@
+import random
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.bench import Bench
+from fds.bench import SizeDistribution
+from fds.bench import parse_mix
+from fds.bench import parse_size
+from fds.galaxy_fds_client_exception import GalaxyFDSClientException
+from test.listing_client import MemoryClient
+
+
+class BenchTest(unittest.TestCase):
+
+  def test_parse(self):
+    self.assertEqual(4096, parse_size('4K'))
+    self.assertEqual(1536 * 1024, parse_size('1.5m'))
+    self.assertEqual(512, parse_size('512'))
+    self.assertEqual([('put', 1.0), ('get', 4.0), ('head', 1.0)],
+                     parse_mix('put=1,get=4,head'))
+    self.assertRaises(GalaxyFDSClientException, parse_mix, 'copy=1')
+    self.assertRaises(GalaxyFDSClientException, parse_size, 'lots')
+
+  def test_size_distributions(self):
+    rng = random.Random(1)
+    self.assertEqual(4096, SizeDistribution('4K').sample(rng))
+    uniform = SizeDistribution('1K-2K')
+    self.assertTrue(all(1024 <= uniform.sample(rng) <= 2048
+                        for _ in range(100)))
+    choice = SizeDistribution('1K,4K')
+    self.assertEqual({1024, 4096}, set(choice.sample(rng)
+                                       for _ in range(100)))
+    lognormal = SizeDistribution('lognormal:1K:2.0')
+    self.assertEqual(64 * 1024, lognormal.max_size)
+    self.assertTrue(all(0 <= lognormal.sample(rng) <= 64 * 1024
+                        for _ in range(1000)))
+
+  def test_run(self):
+    client = MemoryClient()
+    bench = Bench(client, 'bucket', parse_mix('put=1,get=2,head=1,delete=1'),
+                  SizeDistribution('1K-4K'), workers=4, operations=200,
+                  seed=7)
+    result = bench.run()
+    self.assertEqual(200, result.total)
+    summary = dict(result.summary())
+    # A get or head may race with the delete of its object, puts and
+    # deletes never fail.
+    self.assertEqual(0, summary['put']['errors'] + summary['delete']['errors'])
+    self.assertGreater(summary['get']['mb_per_second'], 0)
+    self.assertGreaterEqual(summary['get']['p99'], summary['get']['p50'])
+    # The objects left are deleted at the end.
+    self.assertEqual({}, client.data)
+    self.assertIn('total 200 operations', result.report())
+
+  def test_keep_and_errors(self):
+    client = MemoryClient(fail_heads=True)
+    bench = Bench(client, 'bucket', parse_mix('put=1,head=1'),
+                  SizeDistribution('16'), workers=2, operations=50,
+                  prefix='run/', keep=True)
+    result = bench.run()
+    self.assertTrue(client.objects)
+    self.assertTrue(all(x.startswith('run/') for x in client.objects))
+    self.assertEqual(result.operations['head'].count,
+                     result.operations['head'].errors)
+    self.assertEqual('head failed', result.first_errors['head'])
+    self.assertIn('first head error: head failed', result.report())
+
+  def test_requires_a_limit(self):
+    self.assertRaises(GalaxyFDSClientException, Bench, MemoryClient(),
+                      'bucket', parse_mix('put'), SizeDistribution('1K'))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,119 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.bucket_index import BucketIndex
+from fds.fds_client_configuration import FDSClientConfiguration
+from fds.galaxy_fds_client import GalaxyFDSClient
+from test.listing_client import ListingClient
+
+
+class Response(object):
+
+  def __init__(self, content=b''):
+    self.status_code = 200
+    self.content = content
+    self.headers = {}
+
+
+class Request(object):
+
+  def put(self, uri, data=None, **kwargs):
+    return Response(json.dumps({
+      'bucketName': 'bucket', 'objectName': 'x', 'accessKeyId': 'ak',
+      'signature': 's', 'expires': 0}).encode())
+
+  def delete(self, uri, **kwargs):
+    return Response()
+
+
+class BucketIndexTest(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, 'index.db')
+    self.client = ListingClient({'p/a/1': 1, 'p/a/2': 2, 'p/b': 3,
+                                 'p/c/d/e': 4, 'q': 5})
+    self.index = BucketIndex(self.client, 'bucket', self.path, 'p/')
+
+  def tearDown(self):
+    self.index.close()
+    shutil.rmtree(self.directory)
+
+  def test_refresh_from_marker(self):
+    self.assertEqual(4, self.index.refresh())
+    self.assertEqual('p/c/d/e', self.index.marker)
+    self.client.objects['p/d'] = 6
+    self.client.objects['p/0'] = 7
+    # Only names after the marker are listed again.
+    self.assertEqual(1, self.index.refresh())
+    self.assertFalse(self.index.exists('p/0'))
+    self.assertTrue(self.index.exists('p/d'))
+    self.assertFalse(self.index.exists('q'))
+    self.assertEqual(6, self.index.rebuild())
+    self.assertTrue(self.index.exists('p/0'))
+
+  def test_queries(self):
+    self.index.refresh()
+    self.assertEqual([('p/a/1', 1), ('p/a/2', 2)],
+                     list(self.index.iter_objects('p/a/')))
+    self.assertEqual((4, 10), self.index.stat())
+    self.assertEqual((2, 3), self.index.stat('p/a'))
+    self.assertEqual(['p/a/', 'p/c/'], self.index.common_prefixes('p/'))
+    self.assertEqual(['p/c/d/'], self.index.common_prefixes('p/c/'))
+    self.assertEqual(2, self.index.get_size('p/a/2'))
+
+  def test_persistence(self):
+    self.index.refresh()
+    self.index.close()
+    self.index = BucketIndex(self.client, 'bucket', self.path, 'p/')
+    self.assertEqual(4, len(self.index))
+    self.assertEqual(0, self.index.refresh())
+    self.assertRaises(ValueError, BucketIndex, self.client, 'other',
+                      self.path, 'p/')
+
+  def test_own_writes(self):
+    self.index.refresh()
+    self.index.attach()
+    listener = self.client.listener
+    listener('put', 'bucket', 'p/0', 10)
+    listener('put', 'bucket', 'q/1', 10)
+    listener('put', 'other', 'p/1', 10)
+    listener('delete', 'bucket', 'p/b', None)
+    listener('rename', 'bucket', 'p/a/1', 'p/z')
+    self.assertEqual(['p/0', 'p/a/2', 'p/c/d/e', 'p/z'],
+                     [x[0] for x in self.index.iter_objects()])
+    self.assertEqual(1, self.index.get_size('p/z'))
+    self.index.detach()
+    self.assertIsNone(self.client.listener)
+
+  def test_client_notifies_writes(self):
+    client = GalaxyFDSClient('ak', 'sk', FDSClientConfiguration())
+    client._request = Request()
+    events = []
+    client.add_write_listener(lambda *x: events.append(x))
+    client.put_object('bucket', 'a', b'data')
+    client.rename_object('bucket', 'a', 'b')
+    client.delete_object('bucket', 'b')
+    self.assertEqual([('put', 'bucket', 'a', 4), ('rename', 'bucket', 'a', 'b'),
+                      ('delete', 'bucket', 'b', None)], events)
+
+  def test_diff(self):
+    self.index.refresh()
+    local = os.path.join(self.directory, 'local')
+    os.makedirs(os.path.join(local, 'a'))
+    for name, data in (('a/1', b'x'), ('a/2', b'xyz'), ('new', b'')):
+      with open(os.path.join(local, name), 'wb') as f:
+        f.write(data)
+    diff = self.index.diff(local)
+    self.assertEqual(['new'], diff.only_local)
+    self.assertEqual(['b', 'c/d/e'], diff.only_remote)
+    self.assertEqual(['a/2'], diff.changed)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+
+import sys
+sys.path.append('../')
+from fds import bulk
+from fds.fds_client_configuration import FDSClientConfiguration
+from fds.galaxy_fds_client import GalaxyFDSClient
+from fds.galaxy_fds_client_exception import GalaxyFDSClientException
+
+
+class Summary(object):
+
+  def __init__(self, object_name):
+    self.object_name = object_name
+
+
+class BulkTest(unittest.TestCase):
+
+  def test_failures_are_reported(self):
+    def func(name):
+      if name.endswith('3'):
+        raise GalaxyFDSClientException('Set object acl failed, status=403')
+    names = ['k%02d' % i for i in range(40)]
+    result = bulk.run(func, names, max_workers=4)
+    self.assertEqual(36, result.succeeded)
+    self.assertEqual(['k03', 'k13', 'k23', 'k33'],
+                     sorted(x[0] for x in result.failures))
+    self.assertEqual('Set object acl failed, status=403',
+                     result.failures[0][1])
+    self.assertEqual('k39', result.marker)
+    self.assertEqual(40, result.total)
+
+  def test_marker_waits_for_slow_objects(self):
+    release = threading.Event()
+    markers = []
+
+    def func(name):
+      if name == 'k00':
+        release.wait()
+
+    def progress(result):
+      markers.append(result.marker)
+      if result.total == 9:
+        release.set()
+    bulk.run(func, ['k%02d' % i for i in range(10)], max_workers=4,
+             progress=progress)
+    # Nothing is behind the marker until the first object has completed.
+    self.assertEqual([None] * 9 + ['k09'], markers)
+
+  def test_qps(self):
+    start = time.monotonic()
+    result = bulk.run(lambda x: None, range(6), max_workers=4, qps=20)
+    self.assertEqual(6, result.succeeded)
+    self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+
+  def test_prefetch_hottest_first(self):
+    client = GalaxyFDSClient('ak', 'sk', FDSClientConfiguration())
+    prefetched = []
+    client.prefetch_object = lambda bucket, name: prefetched.append(name)
+    weights = {'hot': 100, 'warm': 10}
+    result = client.prefetch_objects('bucket', ['cold', 'warm', 'hot'],
+                                     weights=weights, max_workers=1)
+    self.assertEqual(3, result.succeeded)
+    self.assertEqual(['hot', 'warm', 'cold'], prefetched)
+    self.assertRaises(GalaxyFDSClientException, client.refresh_objects,
+                      'bucket')
+    client.close()
+
+
+  def test_move_prefix_is_idempotent(self):
+    client = GalaxyFDSClient('ak', 'sk', FDSClientConfiguration())
+    objects = set(['old/a', 'old/b', 'new/c'])
+    listing = ['old/a', 'old/b', 'old/c', 'old/d']
+
+    def rename(bucket, src, dst):
+      if src not in objects:
+        raise GalaxyFDSClientException('Rename object failed, status=404')
+      objects.remove(src)
+      objects.add(dst)
+    client.rename_object = rename
+    client.does_object_exists = lambda bucket, name: name in objects
+    client.iter_objects = lambda bucket, prefix, marker: [
+      Summary(x) for x in listing if marker is None or x > marker]
+
+    result = client.move_prefix('bucket', 'old/', 'new/', max_workers=2)
+    # old/c was moved before, old/d does not exist anywhere.
+    self.assertEqual(3, result.succeeded)
+    self.assertEqual(['old/d'], [x[0] for x in result.failures])
+    self.assertEqual(set(['new/a', 'new/b', 'new/c']), objects)
+    self.assertRaises(GalaxyFDSClientException, client.move_prefix,
+                      'bucket', 'old/', 'old/sub/')
+    client.close()
+
+
+if __name__ == '__main__':
+  unittest.main()
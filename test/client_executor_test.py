@@ -0,0 +1,78 @@
+import threading
+import unittest
+
+import sys
+sys.path.append('../')
+from fds import tracing
+from fds.client_executor import ClientExecutor, as_completed, wait
+from fds.tracing import Tracer, SpanExporter
+
+
+class FakeClient(object):
+
+  def __init__(self):
+    self.release = threading.Event()
+
+  def does_object_exists(self, bucket_name, object_name):
+    return object_name != 'missing'
+
+  def block(self):
+    self.release.wait()
+
+  def _private(self):
+    pass
+
+
+class Collector(SpanExporter):
+
+  def __init__(self):
+    self.spans = []
+
+  def export(self, span):
+    self.spans.append(span)
+
+
+class ClientExecutorTest(unittest.TestCase):
+
+  def setUp(self):
+    self.client = FakeClient()
+    self.executor = ClientExecutor(self.client, 2)
+
+  def tearDown(self):
+    self.client.release.set()
+    self.executor.shutdown()
+
+  def test_methods_return_futures(self):
+    futures = [self.executor.does_object_exists('bucket', x)
+               for x in ('a', 'missing', 'b')]
+    results = [f.result() for f in as_completed(futures)]
+    self.assertEqual([False, True, True], sorted(results))
+    self.assertTrue(self.executor.submit('does_object_exists', 'b',
+                                         'a').result())
+    self.assertEqual([True, False], list(self.executor.map(
+      'does_object_exists', ['b', 'b'], ['a', 'missing'])))
+
+  def test_calls_run_in_the_callers_span(self):
+    tracer = Tracer(Collector())
+    with tracer.span('parent') as parent:
+      submitted = self.executor.submit(tracing.current_span)
+      mapped = list(self.executor.map(lambda x: tracing.current_span(),
+                                      range(3)))
+    self.assertIs(parent, submitted.result())
+    self.assertEqual([parent] * 3, mapped)
+
+  def test_unknown_and_private_methods(self):
+    self.assertRaises(AttributeError, getattr, self.executor, 'no_such')
+    self.assertRaises(AttributeError, getattr, self.executor, '_private')
+
+  def test_cancel_queued_call(self):
+    running = [self.executor.block(), self.executor.block()]
+    queued = self.executor.does_object_exists('bucket', 'a')
+    self.assertTrue(queued.cancel())
+    self.client.release.set()
+    done, not_done = wait(running, timeout=5)
+    self.assertEqual(2, len(done))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,149 @@
+import gzip
+import http.server
+import io
+import json
+import threading
+import unittest
+
+import sys
+sys.path.append('../')
+from fds import compression
+from fds.fds_client_configuration import FDSClientConfiguration
+from fds.galaxy_fds_client import GalaxyFDSClient
+from fds.transport import REQUESTS, URLLIB3
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  objects = {}
+
+  def do_PUT(self):
+    body = self.rfile.read(int(self.headers['Content-Length']))
+    self.objects[self.path] = (body, self.headers.get('Content-Encoding'))
+    bucket_name, object_name = self.path.lstrip('/').split('/', 1)
+    self._send(200, json.dumps({
+      'bucketName': bucket_name, 'objectName': object_name,
+      'accessKeyId': 'ak', 'signature': '', 'expires': 0}).encode())
+
+  def do_GET(self):
+    body, encoding = self.objects[self.path]
+    status = 200
+    headers = {}
+    if 'Range' in self.headers:
+      first, last = self.headers['Range'][len('bytes='):].split('-')
+      last = int(last) if last else len(body) - 1
+      headers['Content-Range'] = 'bytes %s-%d/%d' % (first, last, len(body))
+      body = body[int(first):last + 1]
+      status = 206
+    if encoding:
+      headers['Content-Encoding'] = encoding
+    self._send(status, body, headers)
+
+  def _send(self, status, body, headers=None):
+    self.send_response(status)
+    for key, value in (headers or {}).items():
+      self.send_header(key, value)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *args):
+    pass
+
+
+class CompressionTest(unittest.TestCase):
+
+  def test_is_compressible(self):
+    types = compression.DEFAULT_CONTENT_TYPES
+    self.assertTrue(compression.is_compressible('text/csv', types))
+    self.assertTrue(compression.is_compressible(
+      'application/json; charset=utf-8', types))
+    self.assertFalse(compression.is_compressible('image/png', types))
+    self.assertFalse(compression.is_compressible(None, types))
+    self.assertTrue(compression.is_compressible('image/png', ['*']))
+
+  def test_compress_bytes(self):
+    data = b'line\n' * 1000
+    encoded = compression.compress_bytes(data, compression.GZIP)
+    self.assertLess(len(encoded), len(data))
+    self.assertEqual(data, gzip.decompress(encoded))
+
+  def test_stream_round_trip(self):
+    data = b'0123456789abcdef' * 100000
+    chunks = list(compression.compress_stream(io.BytesIO(data),
+                                              compression.GZIP))
+    decoded = compression.decompress_stream(iter(chunks), compression.GZIP)
+    self.assertEqual(data, b''.join(decoded))
+
+  def test_concatenated_members(self):
+    encoded = (compression.compress_bytes(b'first', compression.GZIP) +
+               compression.compress_bytes(b'second', compression.GZIP))
+    decoded = compression.decompress_stream([encoded[:7], encoded[7:]],
+                                            compression.GZIP)
+    self.assertEqual(b'firstsecond', b''.join(decoded))
+
+  def test_unsupported_encoding(self):
+    self.assertRaises(Exception, compression.compressor, 'br')
+
+
+class ClientTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.server.shutdown()
+    cls.server.server_close()
+
+  def _client(self, transport):
+    config = FDSClientConfiguration(enable_cdn_for_download=False,
+                                    enable_https=False)
+    config.set_endpoint('127.0.0.1:%d' % self.server.server_address[1])
+    config.transport = transport
+    config.compression = compression.GZIP
+    config.enable_decompression = True
+    return GalaxyFDSClient('ak', 'sk', config)
+
+  def test_round_trip(self):
+    data = b'id,name\n' + b'1,first\n' * 10000
+    for transport in (REQUESTS, URLLIB3):
+      client = self._client(transport)
+      client.put_object('bucket', 'table.csv', data)
+      stored, encoding = Handler.objects['/bucket/table.csv']
+      self.assertEqual('gzip', encoding)
+      self.assertLess(len(stored), len(data))
+      fds_object = client.get_object('bucket', 'table.csv', size=1000)
+      self.assertEqual(data, b''.join(fds_object.stream))
+
+  def test_write_listeners_get_the_object_size(self):
+    data = b'id,name\n' + b'1,first\n' * 10000
+    for transport in (REQUESTS, URLLIB3):
+      client = self._client(transport)
+      writes = []
+      client.add_write_listener(lambda *args: writes.append(args))
+      client.put_object('bucket', 'sized.csv', data)
+      self.assertLess(len(Handler.objects['/bucket/sized.csv'][0]), len(data))
+      self.assertEqual([('put', 'bucket', 'sized.csv', len(data))], writes)
+
+  def test_range_of_encoded_object(self):
+    data = b'id,name\n' + b'1,first\n' * 10000
+    for transport in (REQUESTS, URLLIB3):
+      client = self._client(transport)
+      client.put_object('bucket', 'range.csv', data)
+      stored = Handler.objects['/bucket/range.csv'][0]
+      # Ranges are returned as stored, not decoded by the transport.
+      fds_object = client.get_object('bucket', 'range.csv', position=10,
+                                     length=20)
+      self.assertEqual(stored[10:30], b''.join(fds_object.stream))
+      fds_object = client.get_object('bucket', 'range.csv', position=0,
+                                     length=20)
+      self.assertEqual(stored[:20], b''.join(fds_object.stream))
+      fds_object = client.get_object('bucket', 'range.csv', position=100)
+      self.assertEqual(stored[100:], b''.join(fds_object.stream))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,99 @@
+import hashlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.dedup import DedupStore, chunk_stream
+from fds.model.fds_object import FDSObject
+
+
+class FakeClient(object):
+
+  def __init__(self):
+    self.objects = {}
+    self.puts = 0
+
+  def put_object(self, bucket_name, object_name, data, metadata=None):
+    self.puts += 1
+    self.objects[(bucket_name, object_name)] = bytes(data)
+
+  def does_object_exists(self, bucket_name, object_name):
+    return (bucket_name, object_name) in self.objects
+
+  def get_object(self, bucket_name, object_name, position=0, size=4096):
+    obj = FDSObject()
+    obj.stream = iter([self.objects[(bucket_name, object_name)]])
+    return obj
+
+
+def random_bytes(rng, n):
+  return bytes(rng.getrandbits(8) for _ in range(n))
+
+
+class ChunkStreamTest(unittest.TestCase):
+
+  def test_sizes(self):
+    data = random_bytes(random.Random(1), 200000)
+    chunks = list(chunk_stream(io.BytesIO(data), 1024, 4096, 16384))
+    self.assertEqual(data, b''.join(chunks))
+    for chunk in chunks[:-1]:
+      self.assertTrue(1024 <= len(chunk) <= 16384)
+
+  def test_boundaries_resynchronize(self):
+    rng = random.Random(2)
+    data = random_bytes(rng, 200000)
+    edited = data[:5000] + b'inserted' + data[5000:]
+    digests = lambda d: [hashlib.sha256(c).digest() for c in
+                         chunk_stream(io.BytesIO(d), 1024, 4096, 16384)]
+    before = set(digests(data))
+    after = digests(edited)
+    shared = sum(1 for x in after if x in before)
+    self.assertGreaterEqual(shared, len(after) - 2)
+
+
+class DedupStoreTest(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.client = FakeClient()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def write(self, name, data):
+    path = os.path.join(self.directory, name)
+    with open(path, 'wb') as f:
+      f.write(data)
+    return path
+
+  def test_upload_only_new_chunks(self):
+    rng = random.Random(3)
+    data = random_bytes(rng, 300000)
+    first = self.write('first', data)
+    second = self.write('second', data[:100000] + b'x' + data[100000:])
+    index = os.path.join(self.directory, 'index')
+    store = DedupStore(self.client, 'bucket', index_path=index,
+                       min_size=2048, average_size=8192, max_size=32768)
+    stats = store.upload(first, 'first.manifest')['stats']
+    self.assertEqual(stats['chunks'], stats['uploaded_chunks'])
+    stats = store.upload(second, 'second.manifest')['stats']
+    self.assertLessEqual(stats['uploaded_chunks'], 2)
+
+    # A store reopened with the same index does not check known chunks.
+    reopened = DedupStore(self.client, 'bucket', index_path=index,
+                          min_size=2048, average_size=8192, max_size=32768)
+    self.assertEqual(len(store.index), len(reopened.index))
+
+    restored = os.path.join(self.directory, 'restored')
+    reopened.download('second.manifest', restored)
+    with open(restored, 'rb') as f:
+      self.assertEqual(data[:100000] + b'x' + data[100000:], f.read())
+
+
+if __name__ == '__main__':
+  unittest.main()
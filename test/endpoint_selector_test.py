@@ -0,0 +1,183 @@
+import time
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.endpoint_selector import EndpointHealth, EndpointSelector
+from fds.fds_client_configuration import FDSClientConfiguration
+from fds.galaxy_fds_client import GalaxyFDSClient
+
+
+class FakeClock(object):
+
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+class Response(object):
+
+  def __init__(self, status_code):
+    self.status_code = status_code
+    self.headers = {'content-length': '4'}
+    self.content = b'data'
+
+  def iter_content(self, chunk_size=1):
+    return iter([self.content])
+
+  def close(self):
+    pass
+
+
+class Request(object):
+  '''
+  Answers GETs after the delay of the endpoint they are sent to.
+  '''
+
+  def __init__(self, delays):
+    self.delays = delays
+
+  def get(self, uri, auth=None, headers=None, stream=False):
+    for base_uri, (delay, status_code) in self.delays.items():
+      if uri.startswith(base_uri):
+        time.sleep(delay)
+        return Response(status_code)
+
+  def close(self):
+    pass
+
+
+class EndpointSelectorTest(unittest.TestCase):
+
+  def setUp(self):
+    self.clock = FakeClock()
+    self.selector = EndpointSelector(['cdn', 'origin'], failure_threshold=2,
+                                     probe_interval=10, clock=self.clock)
+
+  def state(self, base_uri):
+    for endpoint in self.selector.endpoints:
+      if endpoint.base_uri == base_uri:
+        return endpoint.state
+
+  def test_preference_order_before_measurement(self):
+    self.assertEqual(['cdn', 'origin'], self.selector.candidates())
+
+  def test_lowest_latency_first(self):
+    self.selector.record_success('cdn', 0.5)
+    self.selector.record_success('origin', 0.1)
+    self.assertEqual(['origin', 'cdn'], self.selector.candidates())
+
+  def test_errors_inflate_score(self):
+    self.selector.record_success('cdn', 0.1)
+    self.selector.record_success('origin', 0.2)
+    self.selector.record_failure('cdn')
+    self.assertEqual(['origin', 'cdn'], self.selector.candidates())
+
+  def test_circuit_breaker(self):
+    self.selector.record_success('origin', 0.1)
+    self.selector.record_failure('cdn')
+    self.selector.record_failure('cdn')
+    self.assertEqual(EndpointHealth.OPEN, self.state('cdn'))
+    self.assertEqual(['origin'], self.selector.candidates())
+
+    # Probe after the interval, a failing probe re-opens the circuit.
+    self.clock.now = 10
+    self.assertEqual(['cdn', 'origin'], self.selector.candidates())
+    self.assertEqual(EndpointHealth.HALF_OPEN, self.state('cdn'))
+    self.selector.record_failure('cdn')
+    self.assertEqual(EndpointHealth.OPEN, self.state('cdn'))
+    self.clock.now = 15
+    self.assertEqual(['origin'], self.selector.candidates())
+
+    # A successful probe closes it.
+    self.clock.now = 20
+    self.selector.record_success('origin', 0.1)
+    self.assertEqual('cdn', self.selector.candidates()[0])
+    self.selector.record_success('cdn', 0.05)
+    self.assertEqual(EndpointHealth.CLOSED, self.state('cdn'))
+    # Its error rate decays with further successes.
+    self.assertEqual(['origin', 'cdn'], self.selector.candidates())
+    for _ in range(10):
+      self.selector.record_success('cdn', 0.05)
+    self.assertEqual(['cdn', 'origin'], self.selector.candidates())
+
+  def test_all_open(self):
+    for _ in range(2):
+      self.selector.record_failure('origin')
+    self.clock.now = 1
+    for _ in range(2):
+      self.selector.record_failure('cdn')
+    self.assertEqual(['origin', 'cdn'], self.selector.candidates())
+
+  def test_idle_endpoint_is_remeasured(self):
+    self.selector.record_success('cdn', 0.5)
+    self.selector.record_success('origin', 0.1)
+    self.clock.now = 5
+    self.selector.record_success('origin', 0.1)
+    self.clock.now = 11
+    self.assertEqual(['cdn', 'origin'], self.selector.candidates())
+    self.assertEqual(['origin', 'cdn'], self.selector.candidates())
+
+class FailoverTest(unittest.TestCase):
+
+  def client(self, delays, hedge=False):
+    config = FDSClientConfiguration(enable_cdn_for_download=False,
+                                    enable_https=False)
+    config.set_endpoint('primary')
+    config.add_download_endpoint('mirror')
+    config.enable_endpoint_selection = True
+    if hedge:
+      config.enable_hedged_get = True
+      config.hedge_delay = 0.01
+      config.hedge_max_ratio = 1
+    client = GalaxyFDSClient('ak', 'sk', config)
+    client._request = Request(delays)
+    return client
+
+  def endpoint(self, client, base_uri):
+    for endpoint in client.endpoint_selector.endpoints:
+      if endpoint.base_uri == base_uri:
+        return endpoint
+
+  def test_server_error_fails_over(self):
+    client = self.client({'http://primary/': (0, 503),
+                          'http://mirror/': (0, 200)})
+    fds_object = client.get_object('bucket', 'object')
+    self.assertEqual(b'data', b''.join(fds_object.stream))
+    self.assertEqual(1, self.endpoint(client,
+                                      'http://primary/').consecutive_failures)
+    self.assertIsNotNone(self.endpoint(client, 'http://mirror/').latency)
+
+  def test_hedge_winner_is_credited(self):
+    client = self.client({'http://primary/': (0.3, 200),
+                          'http://mirror/': (0, 200)}, hedge=True)
+    client.get_object('bucket', 'object')
+    primary = self.endpoint(client, 'http://primary/')
+    mirror = self.endpoint(client, 'http://mirror/')
+    # The slow primary lost the race, the mirror answered.
+    self.assertIsNone(primary.latency)
+    self.assertLess(mirror.latency, 0.3)
+    self.assertEqual(0, mirror.consecutive_failures)
+    # Being slower is no failure, the latency of the primary is recorded
+    # once it completes.
+    time.sleep(0.4)
+    self.assertGreaterEqual(primary.latency, 0.3)
+    self.assertEqual(0, primary.consecutive_failures)
+    self.assertEqual(0, primary.error_rate)
+    client.close()
+
+  def test_failed_hedge_loser_counts(self):
+    client = self.client({'http://primary/': (0.2, 503),
+                          'http://mirror/': (0, 200)}, hedge=True)
+    client.get_object('bucket', 'object')
+    time.sleep(0.3)
+    primary = self.endpoint(client, 'http://primary/')
+    self.assertIsNone(primary.latency)
+    self.assertEqual(1, primary.consecutive_failures)
+    client.close()
+
+
+if __name__ == '__main__':
+  unittest.main()
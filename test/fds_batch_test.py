@@ -0,0 +1,117 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.fds_batch import BatchRunner
+from test.listing_client import MemoryClient
+
+
+def results(output):
+  return sorted((json.loads(x) for x in output.getvalue().splitlines()),
+                key=lambda x: x['id'])
+
+
+class BatchRunnerTest(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def test_operations(self):
+    path = os.path.join(self.directory, 'in')
+    with open(path, 'wb') as f:
+      f.write(b'from a file')
+    copy = os.path.join(self.directory, 'out')
+    client = MemoryClient()
+    runner = BatchRunner(client, max_workers=1)
+    lines = [
+      {'op': 'put', 'bucket': 'b', 'object': 'a', 'data': 'inline'},
+      {'op': 'put', 'bucket': 'b', 'object': 'c/d', 'file': path},
+      {'op': 'get', 'bucket': 'b', 'object': 'c/d', 'file': copy},
+      {'op': 'get', 'bucket': 'b', 'object': 'a', 'offset': 2},
+      {'op': 'head', 'bucket': 'b', 'object': 'a', 'id': 'exists'},
+      {'op': 'list', 'bucket': 'b', 'prefix': ''},
+      {'op': 'delete', 'bucket': 'b', 'object': 'a'},
+    ]
+    output = io.StringIO()
+    # One worker runs the operations in order.
+    self.assertEqual(0, runner.run([json.dumps(x) for x in lines], output))
+    runner.close()
+    result = dict((x['id'], x) for x in map(json.loads,
+                                            output.getvalue().splitlines()))
+    self.assertEqual({'id': 3, 'op': 'get', 'size': 11, 'ok': True}, result[3])
+    self.assertEqual(4, result[4]['size'])
+    self.assertEqual(True, result['exists']['exists'])
+    self.assertEqual(['a', 'c/d'], result[6]['objects'])
+    with open(copy, 'rb') as f:
+      self.assertEqual(b'from a file', f.read())
+    self.assertEqual({'c/d': b'from a file'}, client.data)
+
+  def test_errors_are_reported_per_line(self):
+    runner = BatchRunner(MemoryClient(), max_workers=2)
+    lines = ['{"op": "put", "bucket": "b", "object": "a", "data": "x"}',
+             'not json',
+             '',
+             '[1, 2]',
+             '{"op": "copy", "bucket": "b"}',
+             '{"op": "get", "bucket": "b", "object": "missing"}',
+             '{"op": "put", "bucket": "b"}',
+             '{"op": "head", "bucket": "b", "object": "a"}']
+    output = io.StringIO()
+    self.assertEqual(5, runner.run(lines, output))
+    runner.close()
+    result = results(output)
+    # The blank line produces no result, the others one each.
+    self.assertEqual([1, 2, 4, 5, 6, 7, 8], [x['id'] for x in result])
+    self.assertEqual([True, False, False, False, False, False, True],
+                     [x['ok'] for x in result])
+    self.assertTrue(result[1]['error'].startswith('Invalid operation'))
+    self.assertEqual('Unknown operation: copy', result[3]['error'])
+    self.assertIn('status=404', result[4]['error'])
+    self.assertEqual("KeyError: 'object'", result[5]['error'])
+
+  def test_concurrency(self):
+    barrier = threading.Barrier(4, timeout=5)
+    client = MemoryClient(lambda op, name: barrier.wait())
+    runner = BatchRunner(client, max_workers=4)
+    lines = [json.dumps({'op': 'put', 'bucket': 'b', 'object': str(i)})
+             for i in range(8)]
+    output = io.StringIO()
+    # Every put waits for three others, so they must run together.
+    self.assertEqual(0, runner.run(lines, output))
+    runner.close()
+    self.assertEqual(8, len(client.data))
+
+  def test_bounded_read_ahead(self):
+    release = threading.Event()
+    client = MemoryClient(lambda op, name: release.wait(5))
+    runner = BatchRunner(client, max_workers=2)
+    read = []
+
+    def lines():
+      for i in range(100):
+        read.append(i)
+        yield json.dumps({'op': 'put', 'bucket': 'b', 'object': str(i)})
+
+    thread = threading.Thread(target=runner.run, args=(lines(), io.StringIO()))
+    thread.start()
+    thread.join(0.1)
+    # Four operations in flight, twice max_workers, and the runner waits for
+    # a slot before submitting the fifth.
+    self.assertEqual(5, len(read))
+    release.set()
+    thread.join(5)
+    self.assertEqual(100, len(client.data))
+    runner.close()
+
+
+if __name__ == '__main__':
+  unittest.main()
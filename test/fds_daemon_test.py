@@ -0,0 +1,139 @@
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import sys
+sys.path.append('../')
+from fds import fds_cmd
+from fds.fds_daemon import FDSDaemon, forward
+from test.listing_client import MemoryClient
+
+
+class FDSDaemonTest(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.socket_path = os.path.join(self.directory, 'fds.sock')
+    self.client = MemoryClient()
+    self.daemon = FDSDaemon(self.client, self.socket_path, max_workers=2)
+    self.thread = threading.Thread(target=self.daemon.serve_forever)
+    self.thread.start()
+    for _ in range(100):
+      if os.path.exists(self.socket_path):
+        break
+      time.sleep(0.01)
+    self.stdout = sys.stdout
+    self.stderr = sys.stderr
+    sys.stdout = io.StringIO()
+    sys.stderr = io.StringIO()
+
+  def tearDown(self):
+    sys.stdout = self.stdout
+    sys.stderr = self.stderr
+    fds_cmd.fds_client = None
+    self.daemon.shutdown()
+    self.thread.join()
+    shutil.rmtree(self.directory)
+
+  def test_forward(self):
+    lines = [json.dumps({'op': 'put', 'bucket': 'b', 'object': str(i),
+                         'data': 'x' * i}) for i in range(20)]
+    lines.append('{"op": "get", "bucket": "b", "object": "missing"}')
+    output = io.StringIO()
+    self.assertEqual(1, forward(self.socket_path, lines, output))
+    results = [json.loads(x) for x in output.getvalue().splitlines()]
+    self.assertEqual(list(range(1, 22)), sorted(x['id'] for x in results))
+    self.assertEqual(20, len(self.client.data))
+    # The client is shared by the connections of the daemon.
+    output = io.StringIO()
+    forward(self.socket_path, ['{"op": "list", "bucket": "b"}'], output)
+    self.assertEqual(20, len(json.loads(output.getvalue())['objects']))
+
+  def test_run_batch(self):
+    path = os.path.join(self.directory, 'batch')
+    with open(path, 'w') as f:
+      f.write('{"op": "put", "bucket": "b", "object": "a", "data": "x"}\n')
+      f.write('{"op": "delete", "bucket": "b", "object": "missing"}\n')
+    self.assertEqual(1, fds_cmd.run_batch(path, 2, self.socket_path))
+    self.assertEqual(2, len(sys.stdout.getvalue().splitlines()))
+    self.assertEqual({'a': b'x'}, self.client.data)
+    # Without a socket the batch runs on the client of this process.
+    fds_cmd.fds_client = MemoryClient()
+    self.assertEqual(1, fds_cmd.run_batch(path, 2, None))
+    self.assertEqual({'a': b'x'}, fds_cmd.fds_client.data)
+
+  def test_socket_is_private(self):
+    self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+  def test_forwarded_file_paths_are_absolute(self):
+    cwd = os.getcwd()
+    os.chdir(self.directory)
+    try:
+      lines = list(fds_cmd.absolute_file_paths([
+        '{"op": "get", "bucket": "b", "object": "a", "file": "out/a"}\n',
+        '{"op": "delete", "bucket": "b", "object": "a"}\n',
+        'not json\n', '\n']))
+    finally:
+      os.chdir(cwd)
+    self.assertEqual(os.path.join(os.path.realpath(self.directory), 'out/a'),
+                     json.loads(lines[0])['file'])
+    self.assertEqual(['{"op": "delete", "bucket": "b", "object": "a"}\n',
+                      'not json\n', '\n'], lines[1:])
+
+  def test_forward_operation(self):
+    op = {'op': 'head', 'bucket': 'b', 'object': 'a'}
+    self.assertEqual(1, fds_cmd.forward_operation(self.socket_path, op))
+    self.client.put_object('b', 'a', b'x')
+    self.assertEqual(0, fds_cmd.forward_operation(self.socket_path, op))
+    op = {'op': 'get', 'bucket': 'b', 'object': 'missing',
+          'file': os.path.join(self.directory, 'missing')}
+    self.assertEqual(1, fds_cmd.forward_operation(self.socket_path, op))
+    self.assertIn('status=404', sys.stderr.getvalue())
+
+  def test_no_daemon(self):
+    missing = os.path.join(self.directory, 'missing.sock')
+    op = {'op': 'head', 'bucket': 'b', 'object': 'a'}
+    self.assertRaises(FileNotFoundError, fds_cmd.forward_operation, missing,
+                      op)
+    # A socket file left behind by a daemon that exited.
+    stale = os.path.join(self.directory, 'stale.sock')
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(stale)
+    sock.close()
+    self.assertRaises(ConnectionRefusedError, fds_cmd.forward_operation,
+                      stale, op)
+
+  def test_main_falls_back_to_local_execution(self):
+    path = os.path.join(self.directory, 'batch')
+    with open(path, 'w') as f:
+      f.write('{"op": "put", "bucket": "b", "object": "a", "data": "x"}\n')
+    client = MemoryClient()
+    create_client = fds_cmd.create_client
+    argv = sys.argv
+    home = os.environ.get('HOME')
+    fds_cmd.create_client = lambda: (client, None)
+    sys.argv = ['fds', '--batch', path, '--socket',
+                os.path.join(self.directory, 'missing.sock')]
+    os.environ['HOME'] = self.directory
+    try:
+      fds_cmd.main()
+    finally:
+      fds_cmd.create_client = create_client
+      sys.argv = argv
+      if home is None:
+        del os.environ['HOME']
+      else:
+        os.environ['HOME'] = home
+    self.assertEqual({'a': b'x'}, client.data)
+    self.assertEqual({}, self.client.data)
+    self.assertTrue(json.loads(sys.stdout.getvalue())['ok'])
+
+
+if __name__ == '__main__':
+  unittest.main()
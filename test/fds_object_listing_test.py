@@ -0,0 +1,103 @@
+import json
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.model.fds_object_listing import FDSObjectListing
+from fds.model.fds_object_summary import FDSObjectSummary
+
+
+def listing_json(count):
+  return {'name': 'bucket', 'prefix': 'a/', 'delimiter': '/', 'marker': '',
+          'nextMarker': 'a/%d' % (count - 1), 'maxKeys': count,
+          'truncated': False, 'commonPrefixes': ['a/b/'],
+          'objects': [{'name': 'a/%d' % i, 'size': i * 10,
+                       'owner': {'id': 'u%d' % (i % 2),
+                                 'displayName': 'user%d' % (i % 2)}}
+                      for i in range(count)]}
+
+
+class FDSObjectListingTest(unittest.TestCase):
+
+  def test_objects(self):
+    json = listing_json(5)
+    listing = FDSObjectListing(json)
+    self.assertIn('objects', json)
+    self.assertNotIn('objects', dict.keys(listing))
+    self.assertEqual(5, len(listing.objects))
+    self.assertEqual(['a/%d' % i for i in range(5)], listing.object_names)
+    summary = listing.objects[3]
+    self.assertEqual('bucket', summary.bucket_name)
+    self.assertEqual('a/3', summary.object_name)
+    self.assertEqual(30, summary.size)
+    self.assertEqual({'id': 'u1', 'displayName': 'user1'}, summary.owner)
+    self.assertEqual([0, 10, 20, 30, 40], [x.size for x in listing.objects])
+    self.assertEqual(['a/3', 'a/4'],
+                     [x.object_name for x in listing.objects[-2:]])
+    self.assertEqual(['a/b/'], listing.common_prefixes)
+    self.assertEqual('a/4', listing.next_marker)
+
+  def test_owners_are_shared(self):
+    first = FDSObjectListing(listing_json(4)).objects
+    second = FDSObjectListing(listing_json(4)).objects
+    self.assertIs(first[0].owner, first[2].owner)
+    self.assertIs(first[1].owner, second[1].owner)
+    self.assertIsNot(first[0].owner, first[1].owner)
+
+  def test_raw_objects(self):
+    listing = FDSObjectListing(listing_json(2))
+    raw = [{'name': 'a/0', 'size': 0,
+            'owner': {'id': 'u0', 'displayName': 'user0'}},
+           {'name': 'a/1', 'size': 10,
+            'owner': {'id': 'u1', 'displayName': 'user1'}}]
+    self.assertEqual(raw, listing['objects'])
+    self.assertIs(dict, type(listing['objects'][0]['owner']))
+    self.assertIs(listing['objects'], listing['objects'])
+    self.assertRaises(KeyError, lambda: listing['missing'])
+
+  def test_dict_access(self):
+    json_listing = listing_json(3)
+    for access in (lambda x: x.get('objects'),
+                   lambda x: dict(x)['objects'],
+                   lambda x: json.loads(json.dumps(x))['objects'],
+                   lambda x: dict(x.items())['objects'],
+                   lambda x: x.copy()['objects']):
+      listing = FDSObjectListing(json_listing)
+      self.assertEqual(json_listing['objects'], access(listing))
+    listing = FDSObjectListing(json_listing)
+    self.assertIn('objects', listing)
+    self.assertIn('objects', listing.keys())
+    self.assertEqual(len(json_listing), len(listing))
+    self.assertEqual(json_listing, listing)
+    self.assertEqual(json.dumps(json_listing, sort_keys=True),
+                     json.dumps(listing, sort_keys=True))
+    self.assertIsNone(listing.get('missing'))
+
+  def test_raw_objects_follow_set_objects(self):
+    listing = FDSObjectListing(listing_json(2))
+    self.assertEqual(2, len(listing['objects']))
+    summary = FDSObjectSummary()
+    summary.object_name = 'other'
+    summary.size = 1
+    listing.objects = [summary]
+    self.assertEqual([{'name': 'other', 'size': 1, 'owner': None}],
+                     listing.get('objects'))
+
+  def test_set_objects(self):
+    listing = FDSObjectListing(listing_json(2))
+    summary = FDSObjectSummary()
+    summary.object_name = 'other'
+    listing.objects = [summary]
+    self.assertEqual(['other'], listing.object_names)
+    self.assertRaises(TypeError, setattr, listing, 'objects', ['other'])
+
+  def test_empty(self):
+    json = listing_json(1)
+    json['objects'] = []
+    listing = FDSObjectListing(json)
+    self.assertEqual([], list(listing.objects))
+    self.assertEqual([], listing.object_names)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,100 @@
+import threading
+import unittest
+
+from requests.structures import CaseInsensitiveDict
+
+import sys
+sys.path.append('../')
+from fds.fds_client_configuration import FDSClientConfiguration
+from fds.galaxy_fds_client import GalaxyFDSClient
+from fds.galaxy_fds_client_exception import GalaxyFDSClientException
+
+
+class Response(object):
+
+  def __init__(self, status_code, headers=None):
+    self.status_code = status_code
+    self.headers = CaseInsensitiveDict(headers or {})
+    self.content = b''
+
+
+class Request(object):
+  '''
+  Answers HEAD and GET ?metadata requests from a dict of object headers,
+  recording the most requests in flight at once.
+  '''
+
+  def __init__(self, objects):
+    self.objects = objects
+    self.lock = threading.Lock()
+    self.in_flight = 0
+    self.max_in_flight = 0
+    self.barrier = threading.Barrier(2, timeout=0.2)
+
+  def _respond(self, uri):
+    object_name = uri.rsplit('/', 1)[1].split('?')[0]
+    with self.lock:
+      self.in_flight += 1
+      self.max_in_flight = max(self.max_in_flight, self.in_flight)
+    try:
+      # Wait a little for a concurrent request.
+      self.barrier.wait()
+    except threading.BrokenBarrierError:
+      pass
+    with self.lock:
+      self.in_flight -= 1
+    if object_name == 'broken':
+      return Response(500)
+    if object_name not in self.objects:
+      return Response(404)
+    return Response(200, self.objects[object_name])
+
+  def head(self, uri, auth=None):
+    return self._respond(uri)
+
+  def get(self, uri, auth=None):
+    return self._respond(uri)
+
+
+class GalaxyFDSClientTest(unittest.TestCase):
+
+  def setUp(self):
+    self.client = GalaxyFDSClient('ak', 'sk', FDSClientConfiguration())
+    self.client._request = Request({
+      'a': {'Content-Type': 'text/plain', 'Cache-Control': 'no-cache',
+            'Content-Length': '4', 'Date': 'Mon, 19 Oct 2026 12:00:00 GMT',
+            'X-Xiaomi-Meta-Owner': 'ops', 'x-xiaomi-meta-tier': 'hot'},
+      'b': {'content-type': 'image/png'}})
+
+  def test_metadata_header_case(self):
+    metadata = self.client.get_object_metadata('bucket', 'a')
+    # Pre-defined headers under their canonical names, user metadata as the
+    # server sent it.
+    self.assertEqual({'content-type': 'text/plain',
+                      'cache-control': 'no-cache',
+                      'content-length': '4',
+                      'X-Xiaomi-Meta-Owner': 'ops',
+                      'x-xiaomi-meta-tier': 'hot'}, metadata.metadata)
+
+  def test_objects_exist(self):
+    results = sorted(self.client.objects_exist(
+      'bucket', iter(['a', 'b', 'missing', 'broken']), max_workers=2),
+      key=lambda x: x[0])
+    self.assertEqual([('a', True, None), ('b', True, None)], results[:2])
+    self.assertEqual(('broken', None), results[2][:2])
+    self.assertIsInstance(results[2][2], GalaxyFDSClientException)
+    self.assertEqual(('missing', False, None), results[3])
+    self.assertEqual(2, self.client._request.max_in_flight)
+
+  def test_get_objects_metadata(self):
+    results = dict((x[0], x[1:]) for x in self.client.get_objects_metadata(
+      'bucket', ['a', 'b', 'missing'], max_workers=2))
+    self.assertEqual('ops', results['a'][0].metadata['X-Xiaomi-Meta-Owner'])
+    self.assertEqual({'content-type': 'image/png'}, results['b'][0].metadata)
+    metadata, error = results['missing']
+    self.assertIsNone(metadata)
+    self.assertIn('status=404', error.message)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.hedged_request import HedgedRequester
+
+
+class HedgedRequesterTest(unittest.TestCase):
+
+  def setUp(self):
+    self.closed = []
+    self.sent = []
+
+  def send(self, delays):
+    lock = threading.Lock()
+
+    def send(uri):
+      with lock:
+        self.sent.append(uri)
+        delay = delays[len(self.sent) - 1]
+      time.sleep(delay)
+      return '%s#%d' % (uri, len(self.sent))
+    return send
+
+  def test_fast_request_is_not_hedged(self):
+    requester = HedgedRequester(delay=0.5, max_ratio=1)
+    result = requester.request(self.send([0]), ['a', 'b'], self.closed.append)
+    self.assertEqual('a#1', result.response)
+    self.assertEqual('a', result.uri)
+    self.assertEqual([], result.losers)
+    self.assertEqual(['a'], self.sent)
+    self.assertEqual(0, requester.hedges)
+    requester.close()
+
+  def test_slow_request_is_hedged(self):
+    requester = HedgedRequester(delay=0.01, max_ratio=1)
+    result = requester.request(self.send([0.5, 0]), ['a', 'b'],
+                               self.closed.append)
+    self.assertEqual('b#2', result.response)
+    self.assertEqual('b', result.uri)
+    self.assertEqual(['a'], result.losers)
+    self.assertLess(result.latency, 0.5)
+    self.assertEqual(['a', 'b'], self.sent)
+    self.assertEqual(1, requester.hedges)
+    requester.close()
+    time.sleep(0.6)
+    # The loser is released once it completes.
+    self.assertEqual(['a#2'], self.closed)
+
+  def test_lost_requests_are_reported(self):
+    lost = []
+    requester = HedgedRequester(delay=0.01, max_ratio=1)
+    requester.request(self.send([0.2, 0]), ['a', 'b'], self.closed.append,
+                      lambda *x: lost.append(x))
+    self.assertEqual([], lost)
+    time.sleep(0.3)
+    uri, latency, response, error = lost[0]
+    self.assertEqual(('a', 'a#2', None), (uri, response, error))
+    self.assertGreaterEqual(latency, 0.2)
+    self.assertEqual(['a#2'], self.closed)
+
+    def send(uri):
+      if uri == 'a':
+        time.sleep(0.05)
+        raise IOError('connection reset')
+      time.sleep(0.1)
+      return uri
+    lost = []
+    requester.request(send, ['a', 'b'], self.closed.append,
+                      lambda *x: lost.append(x))
+    self.assertEqual(1, len(lost))
+    self.assertEqual(('a', None, None), lost[0][:3])
+    self.assertIsInstance(lost[0][3], IOError)
+    requester.close()
+
+  def test_budget(self):
+    requester = HedgedRequester(delay=0.001, max_ratio=0.5)
+    requester.request(self.send([0.02, 0.02]), ['a'], self.closed.append)
+    self.assertEqual(0, requester.hedges)
+    self.sent = []
+    requester.request(self.send([0.02, 0]), ['a'], self.closed.append)
+    self.assertEqual(1, requester.hedges)
+    requester.close()
+
+  def test_failed_request_falls_back_to_hedge(self):
+    def send(uri):
+      if uri == 'a':
+        time.sleep(0.05)
+        raise IOError('connection reset')
+      time.sleep(0.1)
+      return uri
+    requester = HedgedRequester(delay=0.01, max_ratio=1)
+    result = requester.request(send, ['a', 'b'], self.closed.append)
+    self.assertEqual(('b', 'b', ['a']),
+                     (result.response, result.uri, result.losers))
+    requester.close()
+
+  def test_queued_request_is_not_hedged(self):
+    requester = HedgedRequester(delay=0.05, max_ratio=1, max_workers=1)
+    requester._executor.submit(time.sleep, 0.2)
+    # Waits for the only worker longer than the delay, but is fast once sent.
+    result = requester.request(self.send([0.01]), ['a', 'b'],
+                               self.closed.append)
+    self.assertEqual('a#1', result.response)
+    self.assertEqual(['a'], self.sent)
+    self.assertEqual(0, requester.hedges)
+    requester.close()
+
+  def test_loser_latency_is_recorded(self):
+    requester = HedgedRequester(delay=0.01, max_ratio=1)
+    requester.request(self.send([0.2, 0]), ['a', 'b'], self.closed.append)
+    self.assertEqual(1, len(requester._latencies))
+    time.sleep(0.3)
+    self.assertEqual(['a#2'], self.closed)
+    self.assertEqual(2, len(requester._latencies))
+    self.assertGreaterEqual(requester._latencies.percentile(100), 0.2)
+    requester.close()
+
+  def test_learned_delay(self):
+    requester = HedgedRequester(percentile=50)
+    self.assertEqual(HedgedRequester.DEFAULT_DELAY, requester.hedge_delay())
+    for i in range(HedgedRequester.MIN_SAMPLES):
+      requester._latencies.record(i % 2)
+    self.assertEqual(0.5, requester.hedge_delay())
+    requester.close()
+
+if __name__ == '__main__':
+  unittest.main()
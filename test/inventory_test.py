@@ -0,0 +1,105 @@
+import io
+import json
+import unittest
+
+import sys
+sys.path.append('../')
+from fds import inventory
+from test.listing_client import ListingClient
+
+
+OBJECTS = [('a/b/1', 10, 'u1'), ('a/b/2', 20, 'u2'), ('a/c/1', 5000, 'u1'),
+           ('a/x', 1, 'u1'), ('d/é', 2000000, 'u2'), ('top', 3, 'u3')]
+
+
+def listing_client(page_size=3):
+  return ListingClient(dict((x[0], x[1]) for x in OBJECTS), page_size,
+                       dict((x[0], x[2]) for x in OBJECTS))
+
+
+class InventoryTest(unittest.TestCase):
+
+  def setUp(self):
+    self.pages = []
+    self.inventory = inventory.build(listing_client(), 'bucket',
+                                     progress=self.pages.append)
+
+  def test_build(self):
+    self.assertEqual(6, len(self.inventory))
+    self.assertEqual(2, len(self.pages))
+    self.assertEqual(OBJECTS, list(self.inventory))
+    self.assertEqual('d/é', self.inventory.key(4))
+    self.assertEqual(['u1', 'u2', 'u3'], self.inventory.owner_ids)
+    self.assertEqual(2005034, self.inventory.total_size)
+
+  def test_du(self):
+    self.assertEqual([('', 1, 3), ('a/', 4, 5031), ('d/', 1, 2000000)],
+                     self.inventory.du())
+    self.assertEqual([('', 1, 3), ('a/', 1, 1), ('a/b/', 2, 30),
+                      ('a/c/', 1, 5000), ('d/', 1, 2000000)],
+                     self.inventory.du(depth=2))
+    self.assertEqual([('', 6, 2005034)], self.inventory.du(depth=0))
+
+  def test_aggregations(self):
+    self.assertEqual([('u2', 2, 2000020), ('u1', 3, 5011), ('u3', 1, 3)],
+                     self.inventory.by_owner())
+    self.assertEqual([('d/é', 2000000, 'u2'), ('a/c/1', 5000, 'u1')],
+                     self.inventory.top(2))
+    self.assertEqual([(0, 100, 4, 34), (100, 10000, 1, 5000),
+                      (10000, None, 1, 2000000)],
+                     self.inventory.histogram([100, 10000]))
+
+  def test_export(self):
+    out = io.StringIO()
+    self.inventory.to_csv(out)
+    lines = out.getvalue().splitlines()
+    self.assertEqual('key,size,owner', lines[0])
+    self.assertEqual('a/b/1,10,u1', lines[1])
+    out = io.StringIO()
+    self.inventory.to_jsonl(out)
+    rows = [json.loads(x) for x in out.getvalue().splitlines()]
+    self.assertEqual({'key': 'top', 'size': 3, 'owner': 'u3'}, rows[-1])
+    self.assertEqual(6, len(rows))
+
+  def test_iter_du(self):
+    for depth in range(4):
+      streamed = list(inventory.iter_du(OBJECTS, depth))
+      # Nested prefixes come first, every object is counted once.
+      self.assertEqual(self.inventory.du(depth), sorted(streamed))
+    self.assertEqual([('a/b/', 2, 30), ('a/c/', 1, 5000), ('a/', 1, 1),
+                      ('d/', 1, 2000000), ('', 1, 3)],
+                     list(inventory.iter_du(OBJECTS, 2)))
+
+  def test_iter_du_keys_prefixing_each_other(self):
+    rows = [('x', 1), ('x/1', 2), ('x/1/a', 3), ('xy', 4), ('xy/2', 5),
+            ('xyz', 6), ('xyz/', 7)]
+    flat = inventory.Inventory()
+    for key, size in rows:
+      flat.add(key, size)
+    for depth in range(4):
+      for delimiter in ('/', 'y'):
+        self.assertEqual(flat.du(depth, delimiter),
+                         sorted(inventory.iter_du(rows, depth, delimiter)))
+
+    read = []
+    def keys():
+      for n in range(1, 50):
+        for key in ('x' * n, 'x' * n + '/1'):
+          read.append(key)
+          yield key, 1
+    for done, group in enumerate(inventory.iter_du(keys(), 1)):
+      # '' and one directory are open, the rest were already yielded
+      self.assertLessEqual(len(set(key.split('/')[0] for key in read)),
+                           done + 2)
+
+  def test_iter_rows(self):
+    client = listing_client(page_size=4)
+    pages = inventory.iter_pages(client, 'bucket', 'a/')
+    self.assertEqual(OBJECTS[:4], list(inventory.iter_rows(pages)))
+    out = io.StringIO()
+    inventory.write_csv(OBJECTS[:1], out, header=False)
+    self.assertEqual('a/b/1,10,u1\r\n', out.getvalue())
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,94 @@
+import sys
+sys.path.append('../')
+from fds.galaxy_fds_client_exception import GalaxyFDSClientException
+from fds.model.fds_object import FDSObject
+from fds.model.fds_object_listing import FDSObjectListing
+from fds.model.fds_object_metadata import FDSObjectMetadata
+
+
+class ListingClient(object):
+  '''
+  Lists a dict of object sizes page_size objects per page. Objects are
+  owned by the id owners maps their name to, 'u' by default.
+  '''
+
+  def __init__(self, objects, page_size=2, owners=None):
+    self.objects = objects
+    self.page_size = page_size
+    self.owners = owners or {}
+    self.listener = None
+
+  def list_objects(self, bucket_name, prefix='', delimiter=None, marker=None):
+    names = sorted(x for x in self.objects
+                   if x.startswith(prefix) and (not marker or x > marker))
+    page = names[:self.page_size]
+    return FDSObjectListing({
+      'name': bucket_name, 'prefix': prefix, 'delimiter': '',
+      'marker': marker, 'nextMarker': page[-1] if page else None,
+      'maxKeys': self.page_size, 'commonPrefixes': [],
+      'truncated': len(names) > self.page_size,
+      'objects': [{'name': x, 'size': self.objects[x],
+                   'owner': {'id': self.owners.get(x, 'u'),
+                             'displayName': self.owners.get(x, 'u')}}
+                  for x in page]})
+
+  def list_next_batch_of_objects(self, previous):
+    if not previous.is_truncated:
+      return None
+    return self.list_objects(previous.bucket_name, previous.prefix, '',
+                             previous.next_marker)
+
+  def add_write_listener(self, listener):
+    self.listener = listener
+
+  def remove_write_listener(self, listener):
+    self.listener = None
+
+
+class MemoryClient(ListingClient):
+  '''
+  Keeps the objects put in memory, calling hook(op, object_name) at the
+  start of every operation. With fail_heads, get_object_metadata fails.
+  '''
+
+  def __init__(self, hook=None, fail_heads=False):
+    super(MemoryClient, self).__init__({})
+    self.data = {}
+    self.hook = hook
+    self.fail_heads = fail_heads
+
+  def _call(self, op, object_name):
+    if self.hook is not None:
+      self.hook(op, object_name)
+
+  def put_object(self, bucket_name, object_name, data, metadata=None):
+    self._call('put', object_name)
+    if hasattr(data, 'read'):
+      data = data.read()
+    self.data[object_name] = data
+    self.objects[object_name] = len(data)
+
+  def get_object(self, bucket_name, object_name, position=0, size=4096):
+    self._call('get', object_name)
+    if object_name not in self.data:
+      raise GalaxyFDSClientException('Get object failed, status=404')
+    fds_object = FDSObject()
+    fds_object.stream = (x for x in [self.data[object_name][position:]])
+    return fds_object
+
+  def delete_object(self, bucket_name, object_name):
+    self._call('delete', object_name)
+    self.data.pop(object_name)
+    self.objects.pop(object_name)
+
+  def get_object_metadata(self, bucket_name, object_name):
+    self._call('head', object_name)
+    if self.fail_heads:
+      raise GalaxyFDSClientException('head failed')
+    if object_name not in self.data:
+      raise GalaxyFDSClientException('Get object metadata failed, status=404')
+    return FDSObjectMetadata()
+
+  def does_object_exists(self, bucket_name, object_name):
+    self._call('head', object_name)
+    return object_name in self.data
@@ -0,0 +1,105 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.galaxy_fds_client_exception import GalaxyFDSClientException
+from fds.model.fds_object import FDSObject
+from fds.model.init_multipart_upload_result import InitMultipartUploadResult
+from fds.multipart import MultipartDownloader, MultipartUploader, \
+  composite_md5
+
+
+class FakeClient(object):
+
+  def __init__(self):
+    self.objects = {}
+    self.parts = {}
+    self.aborted = []
+
+  def init_multipart_upload(self, bucket_name, object_name):
+    return InitMultipartUploadResult({'bucketName': bucket_name,
+                                      'objectName': object_name,
+                                      'uploadId': 'upload'})
+
+  def upload_part(self, bucket_name, object_name, upload_id, part_number,
+                  data, content_md5=None):
+    if content_md5 != hashlib.md5(data).hexdigest():
+      raise GalaxyFDSClientException('Upload part failed, BadDigest')
+    self.parts[part_number] = data
+    return {'partNumber': part_number, 'etag': content_md5,
+            'partSize': len(data)}
+
+  def complete_multipart_upload(self, bucket_name, object_name, upload_id,
+                                metadata, upload_part_result_list):
+    numbers = [x['partNumber'] for x in
+               json.loads(upload_part_result_list)['uploadPartResultList']]
+    data = b''.join(self.parts[x] for x in numbers)
+    self.objects[(bucket_name, object_name)] = (data, metadata)
+
+  def abort_multipart_upload(self, bucket_name, object_name, upload_id):
+    self.aborted.append(upload_id)
+
+  def get_object_metadata(self, bucket_name, object_name):
+    return self.objects[(bucket_name, object_name)][1]
+
+  def get_object(self, bucket_name, object_name, position=0, size=4096,
+                 length=None):
+    data = self.objects[(bucket_name, object_name)][0]
+    obj = FDSObject()
+    obj.stream = iter([data[position:position + length]])
+    return obj
+
+
+class MultipartTest(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.client = FakeClient()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def test_composite_md5(self):
+    parts = [b'a' * 10, b'b' * 3]
+    expected = hashlib.md5(b''.join(hashlib.md5(x).digest() for x in parts))
+    self.assertEqual(expected.hexdigest() + '-2',
+                     composite_md5([hashlib.md5(x).digest() for x in parts]))
+
+  def test_round_trip(self):
+    data = os.urandom(10000)
+    uploader = MultipartUploader(self.client, part_size=1024, max_workers=4)
+    uploader.upload('bucket', 'object', io.BytesIO(data))
+    self.assertEqual(10, len(self.client.parts))
+    path = os.path.join(self.directory, 'object')
+    downloader = MultipartDownloader(self.client, max_workers=4)
+    self.assertEqual(len(data), downloader.download('bucket', 'object', path))
+    with open(path, 'rb') as f:
+      self.assertEqual(data, f.read())
+
+  def test_corrupted_download(self):
+    uploader = MultipartUploader(self.client, part_size=1024)
+    uploader.upload('bucket', 'object', io.BytesIO(os.urandom(3000)))
+    data, metadata = self.client.objects[('bucket', 'object')]
+    self.client.objects[('bucket', 'object')] = (b'x' + data[1:], metadata)
+    downloader = MultipartDownloader(self.client)
+    self.assertRaises(GalaxyFDSClientException, downloader.download,
+                      'bucket', 'object', os.path.join(self.directory, 'o'))
+
+  def test_failed_upload_is_aborted(self):
+    def fail(*args, **kwargs):
+      raise GalaxyFDSClientException('Upload part failed')
+    self.client.upload_part = fail
+    uploader = MultipartUploader(self.client, part_size=1024)
+    self.assertRaises(GalaxyFDSClientException, uploader.upload, 'bucket',
+                      'object', io.BytesIO(b'data'))
+    self.assertEqual(['upload'], self.client.aborted)
+
+
+if __name__ == '__main__':
+  unittest.main()
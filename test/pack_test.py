@@ -0,0 +1,80 @@
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.galaxy_fds_client_exception import GalaxyFDSClientException
+from fds.model.fds_object import FDSObject
+from fds.pack import PackReader, PackWriter
+
+
+class FakeClient(object):
+  '''
+  Keeps objects in memory and records the ranges that are read.
+  '''
+
+  def __init__(self):
+    self.objects = {}
+    self.ranges = []
+
+  def put_object(self, bucket_name, object_name, data, metadata=None):
+    self.objects[(bucket_name, object_name)] = data
+
+  def get_object(self, bucket_name, object_name, position=0, size=4096,
+                 length=None):
+    data = self.objects[(bucket_name, object_name)]
+    self.ranges.append((position, length))
+    obj = FDSObject()
+    obj.stream = iter([data[position:position + length]])
+    return obj
+
+
+class PackTest(unittest.TestCase):
+
+  def setUp(self):
+    self.client = FakeClient()
+    self.members = dict(('m%03d' % i, ('payload %d' % i).encode() * i)
+                        for i in range(100))
+    with PackWriter(self.client, 'bucket', 'test.pack') as writer:
+      for name, data in sorted(self.members.items()):
+        writer.add(name, data)
+
+  def test_read(self):
+    reader = PackReader(self.client, 'bucket', 'test.pack', prefetch=64)
+    self.assertEqual(100, len(reader))
+    self.assertEqual(self.members['m042'], reader.read('m042'))
+    self.assertEqual(b'', reader.read('m000'))
+    self.assertRaises(GalaxyFDSClientException, reader.read, 'missing')
+
+  def test_index_is_read_once(self):
+    reader = PackReader(self.client, 'bucket', 'test.pack')
+    reader.read('m001')
+    reader.read('m099')
+    # The whole pack fits in the prefetch, so nothing else is fetched.
+    self.assertEqual(1, len(self.client.ranges))
+
+  def test_read_many_coalesces(self):
+    reader = PackReader(self.client, 'bucket', 'test.pack', prefetch=64)
+    names = ['m010', 'm011', 'm012', 'm090']
+    self.client.ranges = []
+    result = reader.read_many(names, max_gap=0)
+    self.assertEqual(len(names), len(result))
+    for name in names:
+      self.assertEqual(self.members[name], result[name])
+    # Two index reads, then one range for m010-m012 and one for m090.
+    self.assertEqual(4, len(self.client.ranges))
+
+  def test_corrupt_member(self):
+    data = bytearray(self.client.objects[('bucket', 'test.pack')])
+    data[-1] ^= 0xff
+    self.client.objects[('bucket', 'test.pack')] = bytes(data)
+    reader = PackReader(self.client, 'bucket', 'test.pack', prefetch=64)
+    self.assertRaises(GalaxyFDSClientException, reader.read, 'm099')
+
+  def test_not_a_pack(self):
+    self.client.objects[('bucket', 'other')] = b'plain object'
+    reader = PackReader(self.client, 'bucket', 'other')
+    self.assertRaises(GalaxyFDSClientException, reader.names)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,62 @@
+import random
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.model.fds_object import FDSObject
+from fds.parallel_lines import iter_range_lines, process_lines, split_ranges
+
+
+class FakeClient(object):
+
+  def __init__(self, data):
+    self.data = data
+
+  def get_object_length(self, bucket_name, object_name):
+    return len(self.data)
+
+  def get_object(self, bucket_name, object_name, position=0, size=4096,
+                 length=None):
+    obj = FDSObject()
+    obj.stream = iter([self.data[position:position + length]])
+    return obj
+
+
+class ParallelLinesTest(unittest.TestCase):
+
+  def test_split_ranges(self):
+    self.assertEqual([], split_ranges(0, 4))
+    self.assertEqual([(0, 1), (1, 2)], split_ranges(2, 4))
+    self.assertEqual([(0, 3), (3, 6), (6, 10)], split_ranges(10, 3))
+
+  def test_every_line_once(self):
+    rng = random.Random(4)
+    for trailing_newline in (True, False):
+      lines = [b'x' * rng.choice([0, 1, 5, 40, 300]) + b'%d' % i
+               for i in range(500)]
+      data = b'\n'.join(lines) + (b'\n' if trailing_newline else b'')
+      client = FakeClient(data)
+      for count in (1, 3, 17, 200):
+        for block_size in (7, 64, 4096):
+          result = []
+          for start, end in split_ranges(len(data), count):
+            result.extend(iter_range_lines(client, 'b', 'o', start, end,
+                                           len(data), block_size))
+          self.assertEqual(lines, result)
+
+  def test_process_lines(self):
+    data = b''.join(b'%d\n' % i for i in range(10000))
+    client = FakeClient(data)
+    sums = process_lines(client, 'b', 'o', lambda x: sum(int(l) for l in x),
+                         workers=4, range_size=1000)
+    self.assertEqual(sum(range(10000)), sum(sums))
+    self.assertEqual(len(split_ranges(len(data), -(-len(data) // 1000))),
+                     len(sums))
+    counts = process_lines(client, 'b', 'o', lambda x: sum(1 for _ in x),
+                           workers=2, processes=True)
+    self.assertEqual(10000, sum(counts))
+    self.assertEqual([], process_lines(FakeClient(b''), 'b', 'o', list))
+
+
+if __name__ == '__main__':
+  unittest.main()
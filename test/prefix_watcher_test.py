@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.prefix_watcher import PrefixWatcher, ADDED, REMOVED, CHANGED
+from test.listing_client import ListingClient
+
+
+class PrefixWatcherTest(unittest.TestCase):
+
+  def setUp(self):
+    self.client = ListingClient({'in/a': 1, 'in/c': 3, 'in/e': 5, 'out': 9})
+
+  def test_full_diff(self):
+    watcher = PrefixWatcher(self.client, 'bucket', 'in/')
+    self.assertEqual([], list(watcher.poll()))
+    del self.client.objects['in/a']
+    del self.client.objects['in/e']
+    self.client.objects['in/b'] = 2
+    self.client.objects['in/c'] = 30
+    self.client.objects['in/f'] = 6
+    self.assertEqual([(REMOVED, 'in/a', None), (ADDED, 'in/b', 2),
+                      (CHANGED, 'in/c', 30), (REMOVED, 'in/e', None),
+                      (ADDED, 'in/f', 6)], list(watcher.poll()))
+    self.assertEqual([], list(watcher.poll()))
+    self.client.objects.clear()
+    self.assertEqual([(REMOVED, 'in/b', None), (REMOVED, 'in/c', None),
+                      (REMOVED, 'in/f', None)], list(watcher.poll()))
+
+  def test_snapshot_is_compressed(self):
+    names = ['in/2026/10/19/part-%06d.gz' % i for i in range(2000)]
+    client = ListingClient(dict((x, 1) for x in names), page_size=500)
+    watcher = PrefixWatcher(client, 'bucket', 'in/')
+    self.assertEqual([], list(watcher.poll()))
+    self.assertEqual(4, len(watcher._snapshot))
+    held = sum(len(block) for block, sizes in watcher._snapshot)
+    self.assertLess(held * 5, sum(len(x) for x in names))
+    del client.objects[names[700]]
+    client.objects[names[1999]] = 2
+    self.assertEqual([(REMOVED, names[700], None), (CHANGED, names[1999], 2)],
+                     list(watcher.poll()))
+
+  def test_append_only(self):
+    watcher = PrefixWatcher(self.client, 'bucket', 'in/', append_only=True,
+                            report_existing=True)
+    self.assertEqual(['in/a', 'in/c', 'in/e'],
+                     [x[1] for x in watcher.poll()])
+    self.assertEqual('in/e', watcher.marker)
+    self.client.objects['in/f'] = 6
+    self.client.objects['in/g'] = 7
+    self.assertEqual([(ADDED, 'in/f', 6), (ADDED, 'in/g', 7)],
+                     list(watcher.poll()))
+    self.assertEqual([], list(watcher.poll()))
+
+  def test_watch(self):
+    watcher = PrefixWatcher(self.client, 'bucket', 'in/', interval=0.01)
+    stop = threading.Event()
+    events = []
+
+    def callback(event, name, size):
+      events.append((event, name, size))
+      stop.set()
+    polls = []
+    client_list = self.client.list_objects
+
+    def list_objects(bucket_name, prefix, delimiter, marker=None):
+      if marker is None:
+        polls.append(prefix)
+      if len(polls) == 2:
+        self.client.objects['in/z'] = 1
+      return client_list(bucket_name, prefix, delimiter, marker)
+    self.client.list_objects = list_objects
+    watcher.watch(callback, stop)
+    self.assertEqual([(ADDED, 'in/z', 1)], events)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,55 @@
+import os
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.fds_client_configuration import FDSClientConfiguration
+from fds.galaxy_fds_client import GalaxyFDSClient
+from fds.process_pool import map_objects
+
+
+def describe(client, bucket_name, object_name):
+  if object_name == 'bad':
+    raise ValueError('bad object')
+  return os.getpid(), id(client._request), bucket_name + '/' + object_name
+
+
+class ProcessPoolTest(unittest.TestCase):
+
+  def setUp(self):
+    self.client = GalaxyFDSClient('ak', 'sk', FDSClientConfiguration())
+
+  def tearDown(self):
+    self.client.close()
+
+  def test_map_objects(self):
+    names = ['o%d' % i for i in range(20)] + ['bad']
+    results = list(map_objects(self.client, describe, 'bucket',
+                               object_names=names, processes=2, chunksize=2))
+    self.assertEqual(21, len(results))
+    errors = [x for x in results if x[2] is not None]
+    self.assertEqual([('bad', None, 'ValueError: bad object')], errors)
+    for object_name, result, error in results:
+      if error is None:
+        pid, request, path = result
+        self.assertNotEqual(os.getpid(), pid)
+        self.assertEqual('bucket/' + object_name, path)
+
+  def test_fork_creates_new_connection_pool(self):
+    parent_request = self.client._request
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+      os.close(read)
+      fresh = self.client._request is not parent_request
+      os.write(write, b'1' if fresh else b'0')
+      os._exit(0)
+    os.close(write)
+    self.assertEqual(b'1', os.read(read, 1))
+    os.close(read)
+    os.waitpid(pid, 0)
+    self.assertTrue(self.client._request is parent_request)
+
+
+if __name__ == '__main__':
+  unittest.main()
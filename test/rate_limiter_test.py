@@ -0,0 +1,96 @@
+import io
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.model.quota_policy import QuotaPolicy
+from fds.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock(object):
+
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+  def sleep(self, seconds):
+    self.now += seconds
+
+
+class TokenBucketTest(unittest.TestCase):
+
+  def setUp(self):
+    self.clock = FakeClock()
+
+  def test_unlimited(self):
+    bucket = TokenBucket(None, clock=self.clock, sleep=self.clock.sleep)
+    self.assertEqual(0.0, bucket.acquire(10 ** 9))
+    self.assertTrue(bucket.try_acquire(10 ** 9))
+
+  def test_rate(self):
+    bucket = TokenBucket(10, clock=self.clock, sleep=self.clock.sleep)
+    # The bucket starts empty, so 20 tokens take two seconds at 10/s.
+    for _ in range(20):
+      bucket.acquire()
+    self.assertAlmostEqual(2.0, self.clock.now)
+
+  def test_burst_after_idle(self):
+    bucket = TokenBucket(10, burst=5, clock=self.clock, sleep=self.clock.sleep)
+    self.clock.now = 100.0
+    self.assertTrue(bucket.try_acquire(5))
+    self.assertFalse(bucket.try_acquire(1))
+
+  def test_acquire_more_than_burst(self):
+    bucket = TokenBucket(100, clock=self.clock, sleep=self.clock.sleep)
+    self.assertAlmostEqual(10.0, bucket.acquire(1000))
+    # The debt has been slept off, the next token takes 1/rate.
+    self.assertAlmostEqual(0.01, bucket.acquire(1))
+
+  def test_set_rate(self):
+    bucket = TokenBucket(10, clock=self.clock, sleep=self.clock.sleep)
+    bucket.set_rate(None)
+    self.assertEqual(0.0, bucket.acquire(100))
+    self.assertEqual(None, bucket.rate)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+  def test_from_quota_policy(self):
+    policy = QuotaPolicy({'QPS': 100, 'ThroughPut': 1000})
+    limiter = RateLimiter.from_quota_policy(policy, headroom=0.5)
+    self.assertEqual(50, limiter.qps)
+    self.assertEqual(500, limiter.upload_bytes_per_second)
+    self.assertEqual(500, limiter.download_bytes_per_second)
+
+    limiter.apply_quota_policy(QuotaPolicy({'QPS': 10}))
+    self.assertEqual(9, limiter.qps)
+    self.assertEqual(None, limiter.upload_bytes_per_second)
+
+  def test_quota_policy(self):
+    self.assertEqual(None, QuotaPolicy.get_quota_policy({}))
+    policy = QuotaPolicy.get_quota_policy({'QPS': 3})
+    self.assertEqual(3, policy.qps)
+    self.assertEqual(None, policy.throughput)
+
+  def test_wrap_upload(self):
+    limiter = RateLimiter()
+    data = b'x' * 10
+    self.assertTrue(limiter.wrap_upload(data) is data)
+
+    limiter.set_rates(upload_bytes_per_second=10 ** 9)
+    body = limiter.wrap_upload(data)
+    self.assertEqual(10, body.len)
+    self.assertEqual(data, body.read())
+
+    stream = io.BytesIO(b'abcdef')
+    stream.read(2)
+    self.assertEqual(4, limiter.wrap_upload(stream).len)
+
+  def test_wrap_download(self):
+    limiter = RateLimiter(download_bytes_per_second=10 ** 9)
+    self.assertEqual([b'ab', b'c'], list(limiter.wrap_download([b'ab', b'c'])))
+
+if __name__ == '__main__':
+  unittest.main()
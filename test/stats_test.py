@@ -0,0 +1,47 @@
+import unittest
+
+import sys
+sys.path.append('../')
+from fds.stats import StatsExporter
+from fds.tracing import Tracer
+
+
+class StatsTest(unittest.TestCase):
+
+  def test_operations(self):
+    stats = StatsExporter()
+    tracer = Tracer(stats)
+    for size in (100, 300):
+      with tracer.span('get_object'):
+        for status in (503, 200):
+          attempt = tracer.start_span('HTTP GET')
+          attempt.set_attribute('fds.operation', 'get_object')
+          attempt.set_attribute('http.response_bytes',
+                                size if status == 200 else 0)
+          attempt.end()
+    try:
+      with tracer.span('put_object'):
+        raise ValueError('failed')
+    except ValueError:
+      pass
+    operations = dict(stats.operations())
+    get = operations['get_object']
+    self.assertEqual(2, get['calls'])
+    self.assertEqual(2, get['retries'])
+    self.assertEqual(400, get['bytes'])
+    self.assertEqual(0, get['errors'])
+    self.assertIsNotNone(get['p99'])
+    self.assertGreaterEqual(get['max'], get['p50'])
+    put = operations['put_object']
+    self.assertEqual((1, 1, 0), (put['calls'], put['errors'], put['retries']))
+    report = stats.report()
+    self.assertIn('get_object', report)
+    self.assertIn('total 400 bytes', report)
+
+  def test_empty(self):
+    self.assertEqual([], StatsExporter().operations())
+    self.assertIn('total 0 bytes', StatsExporter().report())
+
+
+if __name__ == '__main__':
+  unittest.main()
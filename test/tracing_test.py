@@ -0,0 +1,140 @@
+import http.server
+import io
+import json
+import threading
+import unittest
+
+import sys
+sys.path.append('../')
+from fds import tracing
+from fds.tracing import Tracer, JsonLinesExporter, SpanExporter
+from fds.transport import URLLIB3, REQUESTS, create_transport
+
+
+class Collector(SpanExporter):
+
+  def __init__(self):
+    self.spans = []
+
+  def export(self, span):
+    self.spans.append(span)
+
+
+class Client(object):
+
+  def __init__(self, tracer):
+    self._tracer = tracer
+
+  @tracing.traced
+  def get_object(self, bucket_name, object_name, size=10):
+    return self.get_object_length(bucket_name, object_name)
+
+  @tracing.traced
+  def get_object_length(self, bucket_name, object_name):
+    if object_name == 'missing':
+      raise ValueError('no such object')
+    return tracing.current_span()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+
+  def do_GET(self):
+    body = b'x' * 1000
+    self.send_response(200)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *args):
+    pass
+
+
+class TracingTest(unittest.TestCase):
+
+  def test_spans(self):
+    collector = Collector()
+    client = Client(Tracer(collector))
+    inner = client.get_object('bucket', object_name='a')
+    self.assertEqual(['get_object_length', 'get_object'],
+                     [x.name for x in collector.spans])
+    outer = collector.spans[1]
+    self.assertIs(inner, collector.spans[0])
+    self.assertEqual(outer.span_id, inner.parent_id)
+    self.assertEqual(outer.trace_id, inner.trace_id)
+    self.assertIsNone(outer.parent_id)
+    self.assertEqual({'bucket_name': 'bucket', 'object_name': 'a'},
+                     outer.attributes)
+    self.assertIsNone(tracing.current_span())
+    self.assertRaises(ValueError, client.get_object, 'bucket', 'missing')
+    self.assertEqual('ValueError: no such object', collector.spans[-1].error)
+    self.assertIsNone(Client(None).get_object('bucket', 'a'))
+
+  def test_bind(self):
+    collector = Collector()
+    tracer = Tracer(collector)
+    spans = []
+    with tracer.span('parent') as parent:
+      thread = threading.Thread(target=tracing.bind(
+        lambda: spans.append(tracing.current_span())))
+    thread.start()
+    thread.join()
+    self.assertIs(parent, spans[0])
+
+  def test_json_lines(self):
+    out = io.StringIO()
+    tracer = Tracer(JsonLinesExporter(out))
+    with tracer.span('put_object', bucket_name='b') as span:
+      span.add_phase('send', 0.002)
+    line = json.loads(out.getvalue())
+    self.assertEqual('put_object', line['name'])
+    self.assertEqual({'bucket_name': 'b'}, line['attributes'])
+    self.assertAlmostEqual(2.0, line['phases']['send'])
+    self.assertGreaterEqual(line['duration_ms'], 0)
+
+  def test_http_attempts(self):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:%d/bucket/object' % server.server_address[1]
+    try:
+      for name in (REQUESTS, URLLIB3):
+        collector = Collector()
+        tracer = Tracer(collector)
+        transport = create_transport(name, 1, 2)
+        tracing.instrument(transport.pool_manager, tracer)
+        with tracer.span('get_object') as parent:
+          for _ in range(2):
+            response = transport.send('get', url, timeout=5)
+            self.assertEqual(1000, len(response.content))
+        transport.close()
+        first, second = collector.spans[:2]
+        self.assertEqual(['HTTP GET', 'HTTP GET', 'get_object'],
+                         [x.name for x in collector.spans])
+        self.assertEqual(parent.span_id, first.parent_id)
+        self.assertEqual(200, first.attributes['http.status_code'])
+        self.assertEqual(set(['connect', 'send', 'ttfb', 'transfer']),
+                         set(first.phases))
+        # The second attempt reuses the pooled connection.
+        self.assertNotIn('connect', second.phases)
+    finally:
+      server.shutdown()
+      server.server_close()
+
+  def test_urllib3_1_is_not_instrumented(self):
+    transport = create_transport(URLLIB3, 1, 2)
+    classes = transport.pool_manager.pool_classes_by_scheme
+    version = tracing.urllib3.__version__
+    tracing.urllib3.__version__ = '1.26.18'
+    try:
+      self.assertFalse(tracing.instrument(transport.pool_manager,
+                                          Tracer(Collector())))
+    finally:
+      tracing.urllib3.__version__ = version
+    self.assertIs(classes, transport.pool_manager.pool_classes_by_scheme)
+    self.assertTrue(tracing.instrument(transport.pool_manager,
+                                       Tracer(Collector())))
+    transport.close()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,188 @@
+import http.server
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+import requests
+import urllib3
+
+import sys
+sys.path.append('../')
+from fds.transport import urllib3_transport
+from fds.transport.urllib3_transport import Urllib3Transport
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+
+  def do_GET(self):
+    if self.path.startswith('/slow'):
+      time.sleep(0.5)
+    size = int(self.path.rsplit('/', 1)[1]) if self.path.startswith('/bytes') \
+      else 0
+    body = bytes(bytearray(i % 256 for i in range(size)))
+    self.send_response(200)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def do_PUT(self):
+    body = self.rfile.read(int(self.headers['Content-Length']))
+    echo = json.dumps({'headers': dict(self.headers.items()),
+                       'body': body.decode('utf-8')}).encode('utf-8')
+    self.send_response(200)
+    self.send_header('Content-Length', str(len(echo)))
+    self.end_headers()
+    self.wfile.write(echo)
+
+  def log_message(self, *args):
+    pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+  daemon_threads = True
+
+  def handle_error(self, request, client_address):
+    # Closed and timed out connections are part of the tests.
+    pass
+
+
+class Urllib3TransportTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    cls.server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+    cls.base = 'http://127.0.0.1:%d' % cls.server.server_address[1]
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.server.shutdown()
+    cls.server.server_close()
+
+  def setUp(self):
+    self.transport = Urllib3Transport(max_retries=0, max_connections=2)
+
+  def tearDown(self):
+    self.transport.close()
+
+  def put(self, **kwargs):
+    response = self.transport.send('put', self.base + '/echo', **kwargs)
+    self.assertEqual(200, response.status_code)
+    return json.loads(response.content.decode('utf-8'))
+
+  def test_body_length(self):
+    self.assertIsNone(urllib3_transport._body_length(b'bytes'))
+    self.assertIsNone(urllib3_transport._body_length('text'))
+    self.assertIsNone(urllib3_transport._body_length(iter([b'chunk'])))
+    buf = io.BytesIO(b'0123456789')
+    buf.seek(4)
+    self.assertEqual(6, urllib3_transport._body_length(buf))
+    directory = tempfile.mkdtemp()
+    try:
+      path = os.path.join(directory, 'body')
+      with open(path, 'wb') as f:
+        f.write(b'x' * 100)
+      with open(path, 'rb') as f:
+        f.seek(30)
+        self.assertEqual(70, urllib3_transport._body_length(f))
+    finally:
+      shutil.rmtree(directory)
+
+    class Sized(object):
+      len = 42
+    self.assertEqual(42, urllib3_transport._body_length(Sized()))
+
+  def test_json_body(self):
+    echo = self.put(json={'a': 1})
+    self.assertEqual({'a': 1}, json.loads(echo['body']))
+    self.assertEqual('application/json', echo['headers']['Content-Type'])
+    echo = self.put(json={'a': 1}, headers={'Content-Type': 'text/x-json'})
+    self.assertEqual('text/x-json', echo['headers']['Content-Type'])
+    # A body in data wins over json, as with requests.
+    echo = self.put(data=b'raw', json={'a': 1})
+    self.assertEqual('raw', echo['body'])
+    self.assertNotIn('Content-Type', echo['headers'])
+
+  def test_file_body_length(self):
+    buf = io.BytesIO(b'skip:body')
+    buf.seek(5)
+    echo = self.put(data=buf)
+    self.assertEqual('4', echo['headers']['Content-Length'])
+    self.assertEqual('body', echo['body'])
+
+  def test_auth_signs_request(self):
+    seen = []
+
+    def auth(request):
+      seen.append((request.method, request.url))
+      request.headers['Authorization'] = 'Galaxy-V2 ak:signature'
+    echo = self.put(data=b'x', auth=auth)
+    self.assertEqual([('PUT', self.base + '/echo')], seen)
+    self.assertEqual('Galaxy-V2 ak:signature',
+                     echo['headers']['Authorization'])
+
+  def test_translate(self):
+    translate = urllib3_transport._translate
+    self.assertIs(requests.exceptions.ConnectionError,
+                  type(translate(urllib3.exceptions.NewConnectionError(
+                    None, 'refused'))))
+    self.assertIsInstance(
+      translate(urllib3.exceptions.ConnectTimeoutError('timeout')),
+      requests.exceptions.ConnectTimeout)
+    self.assertIsInstance(
+      translate(urllib3.exceptions.ReadTimeoutError(None, '/', 'timeout')),
+      requests.exceptions.ReadTimeout)
+    self.assertIsInstance(translate(urllib3.exceptions.SSLError('bad')),
+                          requests.exceptions.SSLError)
+    self.assertIs(requests.exceptions.ConnectionError,
+                  type(translate(urllib3.exceptions.ProtocolError('reset'))))
+
+  def test_connection_errors(self):
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    self.assertRaises(requests.exceptions.ConnectionError, self.transport.send,
+                      'get', 'http://127.0.0.1:%d/' % port)
+    self.assertRaises(requests.exceptions.ReadTimeout, self.transport.send,
+                      'get', self.base + '/slow', timeout=0.1)
+
+  def test_content(self):
+    response = self.transport.send('get', self.base + '/bytes/1000')
+    self.assertEqual(1000, len(response.content))
+    # The body was preloaded, iter_content slices it.
+    chunks = list(response.iter_content(300))
+    self.assertEqual([300, 300, 300, 100], [len(x) for x in chunks])
+    self.assertEqual(response.content, b''.join(chunks))
+
+  def test_streaming(self):
+    response = self.transport.send('get', self.base + '/bytes/100000',
+                                   stream=True)
+    data = b''.join(response.iter_content(4096))
+    self.assertEqual(100000, len(data))
+    self.assertRaises(RuntimeError, lambda: response.content)
+    response = self.transport.send('get', self.base + '/bytes/1000',
+                                   stream=True)
+    self.assertEqual(1000, len(response.content))
+    self.assertEqual(1000, len(b''.join(response.iter_content(100))))
+
+  def test_close_unread_body(self):
+    response = self.transport.send('get', self.base + '/bytes/1000000',
+                                   stream=True)
+    next(response.iter_content(10))
+    response.close()
+    self.assertTrue(response.raw.isclosed())
+    # The pool carries on with a new connection.
+    response = self.transport.send('get', self.base + '/bytes/10')
+    self.assertEqual(10, len(response.content))
+
+
+if __name__ == '__main__':
+  unittest.main()